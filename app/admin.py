@@ -1,7 +1,10 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.contrib.auth.admin import UserAdmin
+from .ledger import adjust_to
+from .notification_templates import render_notification
 from .models import (
+    Account,
     CustomUser, 
     Transaction, 
     PaymentMethod, 
@@ -11,6 +14,7 @@ from .models import (
     TraderPortfolio,
     UserTraderCopy,
     Notification,
+    BroadcastNotification,
     Portfolio,
     News,
     Stock, 
@@ -119,6 +123,13 @@ class UserCopyTraderHistoryAdmin(admin.ModelAdmin):
 
 
 
+class AccountInline(admin.StackedInline):
+    model = Account
+    can_delete = False
+    fields = ('balance', 'profit', 'unread_notification_count', 'broadcasts_read_at')
+    readonly_fields = ('unread_notification_count', 'broadcasts_read_at')
+
+
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
     """Admin configuration for CustomUser model"""
@@ -168,7 +179,7 @@ class CustomUserAdmin(UserAdmin):
         }),
         ('Financial', {
             'fields': (
-                'account_id', 'balance', 'profit','can_transfer', 
+                'account_id', 'can_transfer', 
                 'current_loyalty_status', 'next_loyalty_status',
                 'next_amount_to_upgrade',
             )
@@ -196,6 +207,21 @@ class CustomUserAdmin(UserAdmin):
     
     readonly_fields = ('date_joined', 'last_login', 'account_id')
 
+    inlines = [AccountInline]
+    list_select_related = ('account',)
+
+    def save_formset(self, request, form, formset, change):
+        if formset.model is not Account:
+            return super().save_formset(request, form, formset, change)
+        # Balance and profit change through ledger adjustments, never by saving
+        # the row; save(commit=False) only records what changed for the history
+        formset.save(commit=False)
+        edits = formset.changed_objects + [(account, ('balance', 'profit')) for account in formset.new_objects]
+        for account, changed in edits:
+            for field in ('balance', 'profit'):
+                if field in changed:
+                    adjust_to(form.instance, field, getattr(account, field), memo=f'Set by {request.user.email} in admin')
+
 
 
 @admin.register(Portfolio)
@@ -235,7 +261,39 @@ admin.site.register(News)
 
 
 # Register Notification model
-admin.site.register(Notification)
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    # Template rows store template_key/params and leave title/message empty,
+    # so the text shown here is rendered the same way the API renders it
+    list_display = ['user', 'type', 'rendered_title', 'count', 'read', 'created_at']
+    list_filter = ['type', 'read']
+    list_select_related = ['user']
+    search_fields = ['user__email', 'template_key', 'source', 'title']
+    readonly_fields = [
+        'rendered_title', 'rendered_message', 'rendered_full_details',
+        'template_key', 'params', 'source', 'count', 'created_at', 'updated_at',
+    ]
+    ordering = ['-created_at']
+
+    def get_exclude(self, request, obj=None):
+        if obj is not None and obj.template_key:
+            return ['title', 'message', 'full_details']
+        return super().get_exclude(request, obj)
+
+    def rendered_title(self, obj):
+        return render_notification(obj)['title']
+    rendered_title.short_description = 'Title'
+
+    def rendered_message(self, obj):
+        return render_notification(obj)['message']
+    rendered_message.short_description = 'Message'
+
+    def rendered_full_details(self, obj):
+        return render_notification(obj)['full_details']
+    rendered_full_details.short_description = 'Full details'
+
+
+admin.site.register(BroadcastNotification)
 
 # Connect WALLET
 admin.site.register(WalletConnection)
@@ -489,6 +547,7 @@ class UserStockPositionAdmin(admin.ModelAdmin):
 
 from django.contrib import admin
 from .models import Signal, UserSignalPurchase
+from .signal_views import invalidate_signal_catalog
 
 
 @admin.register(Signal)
@@ -568,16 +627,19 @@ class SignalAdmin(admin.ModelAdmin):
     
     def mark_as_featured(self, request, queryset):
         updated = queryset.update(is_featured=True)
+        invalidate_signal_catalog()
         self.message_user(request, f'{updated} signal(s) marked as featured.')
     mark_as_featured.short_description = "Mark selected signals as featured"
     
     def mark_as_not_featured(self, request, queryset):
         updated = queryset.update(is_featured=False)
+        invalidate_signal_catalog()
         self.message_user(request, f'{updated} signal(s) removed from featured.')
     mark_as_not_featured.short_description = "Remove from featured"
     
     def mark_as_expired(self, request, queryset):
         updated = queryset.update(status='expired')
+        invalidate_signal_catalog()
         self.message_user(request, f'{updated} signal(s) marked as expired.')
     mark_as_expired.short_description = "Mark selected signals as expired"
 
@@ -608,7 +670,7 @@ class UserSignalPurchaseAdmin(admin.ModelAdmin):
         'signal',
         'amount_paid',
         'purchase_reference',
-        'signal_data',
+        'snapshot_data',
         'purchased_at',
         'accessed_at'
     ]
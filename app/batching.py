@@ -0,0 +1,74 @@
+"""
+Collect rows produced during a transaction and write them in one go on commit.
+
+buffer_until_commit(flush, items) registers the items with a public
+transaction.on_commit() callback of their own, so a rolled-back savepoint
+discards them just like any other on_commit callback. The callbacks for the
+same flush in one transaction share a group: the first one to run calls
+flush(items) once with the items of every callback still registered, and the
+rest do nothing. Outside a transaction flush runs immediately.
+
+Django drops the callbacks of a rolled-back savepoint (or transaction), and
+with them the last reference to their part, so the group only holds weak
+references and never sees discarded items.
+"""
+
+import threading
+import weakref
+
+from django.db import transaction
+
+_local = threading.local()
+
+
+class CommitGroup:
+    """The parts queued for one flush function in one transaction"""
+
+    def __init__(self, flush):
+        self.flush = flush
+        self.parts = []
+        self.flushed = False
+
+
+class CommitPart:
+    """One buffer_until_commit call's items; called by on_commit"""
+
+    def __init__(self, group, items):
+        self.group = group
+        self.items = list(items)
+        group.parts.append(weakref.ref(self))
+
+    def __call__(self):
+        group = self.group
+        if group.flushed:
+            return
+        group.flushed = True
+        items = []
+        for ref in group.parts:
+            part = ref()
+            if part is not None:
+                items.extend(part.items)
+        group.flush(items)
+
+
+def _groups():
+    groups = getattr(_local, 'groups', None)
+    if groups is None:
+        groups = _local.groups = weakref.WeakValueDictionary()
+    return groups
+
+
+def buffer_until_commit(flush, items, using=None):
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        flush(list(items))
+        return
+
+    # A live group belongs to the current transaction: groups only live as
+    # long as one of their parts is waiting in its on_commit queue
+    groups = _groups()
+    key = (connection.alias, flush)
+    group = groups.get(key)
+    if group is None or group.flushed:
+        group = groups[key] = CommitGroup(flush)
+    transaction.on_commit(CommitPart(group, items), using=using)
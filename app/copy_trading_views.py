@@ -2,7 +2,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Q
+from django.db.models import F, Q
 from .models import Trader, UserTraderCopy, UserCopyTraderHistory
 
 
@@ -188,8 +188,8 @@ def copy_trader_action(request):
                 copy_record.minimum_threshold_at_start = trader.min_account_threshold
                 copy_record.save()
 
-        trader.copiers += 1
-        trader.save()
+        # Relative UPDATE so concurrent copies don't lose counts
+        Trader.objects.filter(pk=trader.pk).update(copiers=F('copiers') + 1)
 
         return Response({
             "success": True,
@@ -210,9 +210,7 @@ def copy_trader_action(request):
         copy_record.is_actively_copying = False
         copy_record.save()
 
-        if trader.copiers > 0:
-            trader.copiers -= 1
-            trader.save()
+        Trader.objects.filter(pk=trader.pk, copiers__gt=0).update(copiers=F('copiers') - 1)
 
         return Response({
             "success": True,
@@ -233,6 +231,34 @@ def copy_trader_status(request, trader_id):
     return Response({"success": True, "is_copying": is_copying})
 
 
+def copy_trade_data(trade, copy):
+    """API representation of a copied trade, with the user's P/L for their copy"""
+    user_pl = trade.calculate_user_profit_loss(copy.initial_investment_amount)
+    return {
+        "id": trade.id,
+        "market": trade.market,
+        "market_name": trade.market_name,
+        "market_logo_url": trade.market_logo_url,
+        "direction": trade.direction,
+        "duration": trade.duration,
+        "amount": str(trade.amount),
+        "entry_price": str(trade.entry_price),
+        "exit_price": str(trade.exit_price) if trade.exit_price else None,
+        "profit_loss_percent": str(trade.profit_loss_percent),
+        "user_profit_loss": str(user_pl),
+        "status": trade.status,
+        "status_display": trade.get_status_display(),
+        "direction_display": trade.get_direction_display(),
+        "time_ago": trade.time_ago,
+        "is_profit": trade.is_profit,
+        "opened_at": trade.opened_at.isoformat() if trade.opened_at else None,
+        "closed_at": trade.closed_at.isoformat() if trade.closed_at else None,
+        "reference": trade.reference,
+        "trader_name": copy.trader.name,
+        "trader_id": copy.trader.id,
+    }
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def user_copied_trades(request):
@@ -249,30 +275,7 @@ def user_copied_trades(request):
         ).order_by("-opened_at")
 
         for trade in trade_history:
-            user_pl = trade.calculate_user_profit_loss(copy.initial_investment_amount)
-            trades_list.append({
-                "id": trade.id,
-                "market": trade.market,
-                "market_name": trade.market_name,
-                "market_logo_url": trade.market_logo_url,
-                "direction": trade.direction,
-                "duration": trade.duration,
-                "amount": str(trade.amount),
-                "entry_price": str(trade.entry_price),
-                "exit_price": str(trade.exit_price) if trade.exit_price else None,
-                "profit_loss_percent": str(trade.profit_loss_percent),
-                "user_profit_loss": str(user_pl),
-                "status": trade.status,
-                "status_display": trade.get_status_display(),
-                "direction_display": trade.get_direction_display(),
-                "time_ago": trade.time_ago,
-                "is_profit": trade.is_profit,
-                "opened_at": trade.opened_at.isoformat() if trade.opened_at else None,
-                "closed_at": trade.closed_at.isoformat() if trade.closed_at else None,
-                "reference": trade.reference,
-                "trader_name": copy.trader.name,
-                "trader_id": copy.trader.id,
-            })
+            trades_list.append(copy_trade_data(trade, copy))
 
     # Sort all trades by opened_at descending
     trades_list.sort(key=lambda x: x["opened_at"] or "", reverse=True)
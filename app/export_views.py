@@ -0,0 +1,199 @@
+"""
+Statement exports.
+Rows are streamed straight from a server-side iterator, so memory use stays
+flat no matter how long a user's history is.
+"""
+
+import csv
+import json
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .models import TradeHistory, Transaction, UserCopyTraderHistory, UserTraderCopy
+
+# Rows fetched per round-trip by the streaming iterator
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+}
+
+
+class _Echo:
+    """File-like object whose write() just returns the line, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def _parse_bound(value, end=False):
+    """
+    Parse a from/to query value. Accepts a date (YYYY-MM-DD) or an ISO datetime.
+    A bare date used as the upper bound covers the whole day.
+    """
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        parsed = datetime.combine(day + timedelta(days=1) if end else day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _date_range(request):
+    """Return (start, end) datetimes from ?from=&to=, either may be None"""
+    start = request.GET.get("from", "").strip()
+    end = request.GET.get("to", "").strip()
+    return (
+        _parse_bound(start) if start else None,
+        _parse_bound(end, end=True) if end else None,
+    )
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _stream(filetype, columns, rows):
+    if filetype == "csv":
+        writer = csv.writer(_Echo())
+        yield writer.writerow(columns)
+        for row in rows:
+            yield writer.writerow([_plain(value) for value in row])
+    else:
+        for row in rows:
+            yield json.dumps({column: _plain(value) for column, value in zip(columns, row)}) + "\n"
+
+
+def _export(request, name, columns, build_rows):
+    filetype = request.GET.get("filetype", "csv").strip().lower()
+    if filetype not in EXPORT_FORMATS:
+        return Response({
+            "success": False,
+            "error": f"filetype must be one of: {', '.join(EXPORT_FORMATS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        start, end = _date_range(request)
+    except ValueError as e:
+        return Response({
+            "success": False,
+            "error": f"Invalid date: {e}. Use YYYY-MM-DD or an ISO datetime."
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    response = StreamingHttpResponse(
+        _stream(filetype, columns, build_rows(start, end)),
+        content_type=EXPORT_FORMATS[filetype],
+    )
+    stamp = timezone.now().strftime("%Y%m%d")
+    response["Content-Disposition"] = f'attachment; filename="{name}-{stamp}.{filetype}"'
+    return response
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def export_trade_history(request):
+    """
+    Export the user's stock trades.
+    Query params: filetype=csv|jsonl, from, to
+    """
+    columns = [
+        "executed_at", "reference", "trade_type", "symbol", "shares",
+        "price_per_share", "total_amount", "profit_loss",
+    ]
+
+    def build_rows(start, end):
+        trades = TradeHistory.objects.filter(user=request.user)
+        if start:
+            trades = trades.filter(executed_at__gte=start)
+        if end:
+            trades = trades.filter(executed_at__lt=end)
+        # Ordered to match the (user, -executed_at) index
+        return trades.order_by("-executed_at").values_list(
+            "executed_at", "reference", "trade_type", "stock__symbol", "shares",
+            "price_per_share", "total_amount", "profit_loss",
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    return _export(request, "trade-history", columns, build_rows)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def export_transactions(request):
+    """
+    Export the user's deposits and withdrawals.
+    Query params: filetype=csv|jsonl, from, to, type=deposit|withdrawal
+    """
+    columns = [
+        "created_at", "reference", "transaction_type", "status", "amount",
+        "currency", "unit", "description",
+    ]
+    tx_type = request.GET.get("type", "all")
+
+    def build_rows(start, end):
+        transactions = Transaction.objects.filter(user=request.user)
+        if tx_type in ("deposit", "withdrawal"):
+            transactions = transactions.filter(transaction_type=tx_type)
+        if start:
+            transactions = transactions.filter(created_at__gte=start)
+        if end:
+            transactions = transactions.filter(created_at__lt=end)
+        return transactions.order_by("-created_at").values_list(
+            "created_at", "reference", "transaction_type", "status", "amount",
+            "currency", "unit", "description",
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    return _export(request, "transactions", columns, build_rows)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def export_copy_trade_history(request):
+    """
+    Export trades from every trader the user is or was copying,
+    with the user's P/L based on their copy investment.
+    Query params: filetype=csv|jsonl, from, to
+    """
+    columns = [
+        "opened_at", "closed_at", "reference", "trader", "market", "direction",
+        "status", "amount", "entry_price", "exit_price", "profit_loss_percent",
+        "user_profit_loss",
+    ]
+    investments = dict(
+        UserTraderCopy.objects.filter(user=request.user).values_list(
+            "trader_id", "initial_investment_amount"
+        )
+    )
+
+    def build_rows(start, end):
+        trades = UserCopyTraderHistory.objects.filter(trader_id__in=list(investments))
+        if start:
+            trades = trades.filter(opened_at__gte=start)
+        if end:
+            trades = trades.filter(opened_at__lt=end)
+        rows = trades.order_by("-opened_at").values_list(
+            "opened_at", "closed_at", "reference", "trader__name", "market", "direction",
+            "status", "amount", "entry_price", "exit_price", "profit_loss_percent", "trader_id",
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        for *row, trader_id in rows:
+            # Same formula as UserCopyTraderHistory.calculate_user_profit_loss
+            percent = row[-1] or Decimal("0.00")
+            user_pl = (Decimal(investments[trader_id]) * percent) / Decimal("100")
+            yield (*row, user_pl)
+
+    return _export(request, "copy-trade-history", columns, build_rows)
@@ -0,0 +1,237 @@
+"""
+Money ledger behind Account.balance and Account.profit (user.balance and
+user.profit).
+
+The two columns are still what every screen reads, but they only change
+through post(): each change appends a balanced posting (the user's legs plus
+a house-account leg, summing to zero) and applies the same amounts to the
+columns with an F() update in the same transaction. Concurrent writers can't
+lose each other's updates, and every change has an audit row.
+
+Balances can also be derived from the ledger alone: the user's latest
+BalanceSnapshot plus their entries after it, an index range on (user, id).
+take_snapshots() rolls snapshots forward and the reconcile_ledger command
+compares the derived figures with the columns.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Account, BalanceSnapshot, CustomUser, LedgerEntry
+from .portfolio_views import portfolio_summary_cache_key
+from .realtime import publish_balance
+from .references import new_ulid
+
+ZERO = Decimal('0.00')
+MONEY = DecimalField(max_digits=20, decimal_places=2)
+
+# House account that balances each kind of posting. Transfers move money
+# between the user's own accounts, so their legs already cancel out.
+CONTRA_ACCOUNTS = {
+    'opening': 'adjustments',
+    'deposit': 'external',
+    'withdrawal': 'external',
+    'stock_buy': 'stocks',
+    'stock_sell': 'stocks',
+    'signal_purchase': 'signals',
+    'transfer': 'adjustments',
+    'copy_trade': 'copy_trading',
+    'trade': 'trading',
+    'earning': 'earnings',
+    'adjustment': 'adjustments',
+}
+
+# Entries younger than this are left out of new snapshots, so a posting whose
+# transaction commits late is never skipped
+SNAPSHOT_LAG = timedelta(minutes=5)
+SNAPSHOT_CHUNK = 1000
+
+
+class InsufficientFunds(Exception):
+    pass
+
+
+def _entries(user_id, kind, balance, profit, reference, memo):
+    posting = new_ulid()
+    now = timezone.now()
+    legs = [('balance', balance), ('profit', profit), (CONTRA_ACCOUNTS[kind], -(balance + profit))]
+    return [
+        LedgerEntry(
+            posting=posting, user_id=user_id, account=account, kind=kind, amount=amount,
+            reference=reference, memo=memo[:255], created_at=now,
+        )
+        for account, amount in legs
+        if amount
+    ]
+
+
+def _balance_changed(user):
+    # The F() update bypasses save(), so do what the user post_save receivers would
+    publish_balance(user)
+    cache.delete(portfolio_summary_cache_key(user.pk))
+
+
+def post(user, kind, *, balance=ZERO, profit=ZERO, reference="", memo="", guard=False):
+    """
+    Append a posting and apply it to user.balance / user.profit, which are
+    refreshed afterwards. With guard=True a debited column may not go below
+    zero: InsufficientFunds is raised and nothing is written.
+    """
+    balance, profit = Decimal(balance), Decimal(profit)
+    changes, conditions = {}, {}
+    for field, amount in (('balance', balance), ('profit', profit)):
+        if amount:
+            changes[field] = F(field) + amount
+            if guard and amount < 0:
+                conditions[f'{field}__gte'] = -amount
+    if not changes:
+        return
+
+    with transaction.atomic():
+        if not Account.objects.filter(pk=user.pk, **conditions).update(**changes):
+            raise InsufficientFunds
+        LedgerEntry.objects.bulk_create(_entries(user.pk, kind, balance, profit, reference, memo))
+
+    user.get_account().refresh_from_db(fields=list(changes))
+    transaction.on_commit(lambda: _balance_changed(user))
+
+
+def debit(user, amount, kind, reference="", memo=""):
+    """
+    Take amount from user.balance if it covers it. The check and the write
+    are one conditional UPDATE (... SET balance = balance - amount WHERE
+    user_id = ... AND balance >= amount), so there is no row lock and no
+    window between reading the balance and spending it. Returns whether the
+    debit happened; on False nothing was written and user.balance is current.
+    """
+    try:
+        post(user, kind, balance=-amount, reference=reference, memo=memo, guard=True)
+    except InsufficientFunds:
+        user.get_account().refresh_from_db(fields=['balance'])
+        return False
+    return True
+
+
+def credit(user, amount, kind, reference="", memo=""):
+    """Add amount to user.balance; the counterpart of debit()"""
+    post(user, kind, balance=amount, reference=reference, memo=memo)
+    return True
+
+
+def adjust_to(user, field, value, memo=""):
+    """Post an adjustment that brings user.balance or user.profit to an exact value"""
+    with transaction.atomic():
+        current = Account.objects.select_for_update().values_list(field, flat=True).get(pk=user.pk)
+        post(user, 'adjustment', **{field: value - current}, memo=memo)
+
+
+def with_ledger_balances(users, upto=None, full=False):
+    """
+    Annotate a CustomUser queryset with ledger_balance and ledger_profit:
+    the latest snapshot plus the entries after it, or with full=True the sum
+    of every entry. upto limits both to entries with id <= upto.
+    """
+    entries = LedgerEntry.objects.filter(user=OuterRef('pk')).order_by().values('user')
+    if upto is not None:
+        entries = entries.filter(id__lte=upto)
+
+    if full:
+        base = {'snapshot_id': Value(0), 'snapshot_balance': Value(ZERO), 'snapshot_profit': Value(ZERO)}
+    else:
+        latest = BalanceSnapshot.objects.filter(user=OuterRef('pk')).order_by('-last_entry_id')
+        if upto is not None:
+            latest = latest.filter(last_entry_id__lte=upto)
+        base = {
+            'snapshot_id': Coalesce(Subquery(latest.values('last_entry_id')[:1]), Value(0)),
+            'snapshot_balance': Coalesce(Subquery(latest.values('balance')[:1]), Value(ZERO), output_field=MONEY),
+            'snapshot_profit': Coalesce(Subquery(latest.values('profit')[:1]), Value(ZERO), output_field=MONEY),
+        }
+
+    def tail(account):
+        total = entries.filter(account=account, id__gt=OuterRef('snapshot_id')).annotate(total=Sum('amount'))
+        return Coalesce(Subquery(total.values('total'), output_field=MONEY), Value(ZERO), output_field=MONEY)
+
+    return users.annotate(**base).annotate(
+        ledger_balance=F('snapshot_balance') + tail('balance'),
+        ledger_profit=F('snapshot_profit') + tail('profit'),
+    )
+
+
+def current_balances(user_id):
+    """(balance, profit) derived from the ledger, in one query"""
+    return with_ledger_balances(CustomUser.objects.filter(pk=user_id)).values_list(
+        'ledger_balance', 'ledger_profit'
+    ).get()
+
+
+def take_snapshots(now=None, chunk_size=SNAPSHOT_CHUNK):
+    """
+    Snapshot every user with entries since the last run, up to the newest
+    entry older than SNAPSHOT_LAG. Returns the number of snapshots written.
+    """
+    now = now or timezone.now()
+    cutoff = (
+        LedgerEntry.objects.filter(created_at__lte=now - SNAPSHOT_LAG)
+        .order_by('-id').values_list('id', flat=True).first()
+    )
+    previous = (
+        BalanceSnapshot.objects.order_by('-last_entry_id').values_list('last_entry_id', flat=True).first()
+        or 0
+    )
+    if cutoff is None or cutoff <= previous:
+        return 0
+
+    user_ids = sorted(set(
+        LedgerEntry.objects.filter(id__gt=previous, id__lte=cutoff).values_list('user_id', flat=True)
+    ))
+    written = 0
+    for start in range(0, len(user_ids), chunk_size):
+        chunk = user_ids[start:start + chunk_size]
+        rows = with_ledger_balances(CustomUser.objects.filter(pk__in=chunk), upto=cutoff).values_list(
+            'pk', 'ledger_balance', 'ledger_profit'
+        )
+        snapshots = BalanceSnapshot.objects.bulk_create(
+            BalanceSnapshot(user_id=pk, balance=balance, profit=profit, last_entry_id=cutoff)
+            for pk, balance, profit in rows
+        )
+        written += len(snapshots)
+    return written
+
+
+def reconcile(full=False, chunk_size=SNAPSHOT_CHUNK):
+    """
+    Yield (user_id, email, balance, ledger_balance, profit, ledger_profit) for
+    every user whose stored columns disagree with the ledger. Columns and
+    ledger are read in the same statement, so in-flight postings don't show
+    up as differences.
+    """
+    last_pk = 0
+    while True:
+        rows = list(
+            with_ledger_balances(CustomUser.objects.filter(pk__gt=last_pk), full=full)
+            .order_by('pk')
+            .values_list(
+                'pk', 'email', 'account__balance', 'ledger_balance', 'account__profit', 'ledger_profit'
+            )[:chunk_size]
+        )
+        if not rows:
+            return
+        last_pk = rows[-1][0]
+        for pk, email, balance, ledger_balance, profit, ledger_profit in rows:
+            if balance != ledger_balance or profit != ledger_profit:
+                yield pk, email, balance, ledger_balance, profit, ledger_profit
+
+
+def unbalanced_postings(limit=100):
+    """Postings whose legs don't sum to zero. Scans the whole ledger."""
+    return list(
+        LedgerEntry.objects.order_by().values('posting')
+        .annotate(total=Sum('amount')).exclude(total=0)
+        .values_list('posting', 'total')[:limit]
+    )
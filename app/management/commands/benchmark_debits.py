@@ -0,0 +1,144 @@
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+from django.db.models import F
+
+from app.ledger import debit
+from app.models import Account, CustomUser
+
+BENCHMARK_EMAIL = 'benchmark-debit-{}@example.invalid'
+
+
+def conditional_debit(user, amount):
+    """The primitive under app.ledger.debit, without the ledger INSERT"""
+    return Account.objects.filter(pk=user.pk, balance__gte=amount).update(balance=F('balance') - amount) == 1
+
+
+def locking_debit(user, amount):
+    """The check-then-save pattern made safe with a row lock"""
+    with transaction.atomic():
+        account = Account.objects.select_for_update().get(pk=user.pk)
+        if account.balance < amount:
+            return False
+        account.balance -= amount
+        account.save(update_fields=['balance'])
+        return True
+
+
+def ledger_debit(user, amount):
+    return debit(user, amount, 'adjustment', memo='benchmark')
+
+
+STRATEGIES = {
+    'conditional': conditional_debit,
+    'select_for_update': locking_debit,
+    'ledger': ledger_debit,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the conditional-UPDATE debit with a select_for_update debit (and the full ledger '
+        'debit) under concurrent load. Uses throwaway users that are deleted afterwards. Accounts are '
+        'funded for half the attempts, so every strategy must end with exactly that many successes '
+        'and no negative balance.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=8,
+            help='Concurrent workers, each with its own connection (default: 8)',
+        )
+        parser.add_argument(
+            '--operations',
+            type=int,
+            default=2000,
+            help='Debit attempts per strategy (default: 2000)',
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=1,
+            help='Accounts the attempts are spread over; 1 means one hot row (default: 1)',
+        )
+        parser.add_argument(
+            '--strategy',
+            action='append',
+            dest='strategies',
+            choices=sorted(STRATEGIES),
+            help='Strategy to run; repeat for several (default: all)',
+        )
+
+    def handle(self, *args, **options):
+        if options['threads'] < 1 or options['operations'] < 1 or options['users'] < 1:
+            raise CommandError('--threads, --operations and --users must be at least 1')
+        amount = Decimal('1.00')
+        user_ids = [
+            CustomUser.objects.create_user(email=BENCHMARK_EMAIL.format(i)).pk
+            for i in range(options['users'])
+        ]
+        try:
+            for name in options['strategies'] or STRATEGIES:
+                self._run(name, STRATEGIES[name], user_ids, amount, options)
+        finally:
+            CustomUser.objects.filter(pk__in=user_ids).delete()
+        self.stdout.write('Benchmark users deleted.')
+
+    def _run(self, name, strategy, user_ids, amount, options):
+        operations = options['operations']
+        expected = operations // 2
+        # Fund the accounts for exactly `expected` debits between them
+        for index, user_id in enumerate(user_ids):
+            share = expected // len(user_ids) + (1 if index < expected % len(user_ids) else 0)
+            Account.objects.filter(pk=user_id).update(balance=amount * share)
+
+        results = []
+        per_thread = [operations // options['threads'] + (1 if i < operations % options['threads'] else 0)
+                      for i in range(options['threads'])]
+
+        def worker(count, offset):
+            succeeded, errors, latencies = 0, 0, []
+            try:
+                users = list(CustomUser.objects.filter(pk__in=user_ids).select_related('account'))
+                for i in range(count):
+                    user = users[(offset + i) % len(users)]
+                    started = time.perf_counter()
+                    try:
+                        succeeded += strategy(user, amount)
+                    except OperationalError:
+                        # e.g. SQLite's "database is locked" when a lock upgrade collides
+                        errors += 1
+                    latencies.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+            results.append((succeeded, errors, latencies))
+
+        threads = [threading.Thread(target=worker, args=(count, i)) for i, count in enumerate(per_thread)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        succeeded = sum(r[0] for r in results)
+        errors = sum(r[1] for r in results)
+        latencies = sorted(latency for r in results for latency in r[2])
+        remaining = sum(Account.objects.filter(pk__in=user_ids).values_list('balance', flat=True))
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+        consistent = remaining >= 0 and remaining == amount * (expected - succeeded)
+
+        line = (
+            f'{name}: {operations / elapsed:,.0f} attempts/sec, p50 {p50:.2f} ms, p99 {p99:.2f} ms | '
+            f'{succeeded}/{expected} debits succeeded, {errors} errors, {remaining} left'
+        )
+        if consistent and succeeded + errors >= expected:
+            self.stdout.write(self.style.SUCCESS(line))
+        else:
+            self.stdout.write(self.style.ERROR(line + ' (inconsistent)'))
@@ -0,0 +1,114 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from app.models import News
+from app.news_search import get_backend, rebuild_index, search_news
+
+FINANCE_WORDS = (
+    "earnings revenue guidance dividend buyback inflation rates treasury yield bond "
+    "equity rally selloff volatility merger acquisition ipo crypto bitcoin ethereum "
+    "oil gold silver forex dollar euro yen tariff regulation antitrust semiconductor "
+    "cloud ai battery electric vehicle bank lending mortgage housing jobs payrolls"
+).split()
+
+DEFAULT_QUERIES = ("inflation", "bitcoin rally", "semiconductor earnings guidance", "mortgage rates", "tesl")
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare full-text news search with the old icontains search on a synthetic corpus. '
+        'Everything runs in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--articles',
+            type=int,
+            default=100000,
+            help='Number of synthetic articles (default: 100000)',
+        )
+        parser.add_argument(
+            '--words',
+            type=int,
+            default=300,
+            help='Words of content per article (default: 300)',
+        )
+        parser.add_argument(
+            '--query',
+            action='append',
+            dest='queries',
+            help='Search query to time; repeat for several (default: a built-in set)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=1,
+            help='Random seed for the corpus (default: 1)',
+        )
+
+    def handle(self, *args, **options):
+        queries = options['queries'] or DEFAULT_QUERIES
+        rng = random.Random(options['seed'])
+        # Zipf-ish vocabulary: a few common filler words, many rare ones
+        filler = [f'w{i}' for i in range(5000)]
+        vocabulary = FINANCE_WORDS + filler
+        weights = [20] * len(FINANCE_WORDS) + [1000 / (i + 1) for i in range(len(filler))]
+
+        def text(words):
+            return ' '.join(rng.choices(vocabulary, weights, k=words))
+
+        with transaction.atomic():
+            started = time.perf_counter()
+            now = timezone.now()
+            categories = [choice for choice, _ in News.CATEGORY_CHOICES]
+            News.objects.bulk_create(
+                (
+                    News(
+                        title=text(8).title(),
+                        summary=text(30),
+                        content=text(options['words']),
+                        category=rng.choice(categories),
+                        source='Benchmark',
+                        author='Benchmark',
+                        published_at=now - timedelta(minutes=i),
+                    )
+                    for i in range(options['articles'])
+                ),
+                batch_size=2000,
+            )
+            self.stdout.write(f'Inserted {options["articles"]} articles in {time.perf_counter() - started:.1f}s')
+
+            started = time.perf_counter()
+            rebuild_index()
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE app_news')
+            self.stdout.write(
+                f'Indexed with {type(get_backend()).__name__} in {time.perf_counter() - started:.1f}s'
+            )
+
+            for query in queries:
+                started = time.perf_counter()
+                old = News.objects.filter(
+                    Q(title__icontains=query) | Q(summary__icontains=query) | Q(content__icontains=query)
+                ).values_list('id', flat=True)
+                old_count = len(list(old))
+                old_ms = (time.perf_counter() - started) * 1000
+
+                started = time.perf_counter()
+                hits = search_news(query, limit=20)
+                new_ms = (time.perf_counter() - started) * 1000
+
+                self.stdout.write(self.style.SUCCESS(
+                    f'{query!r}: icontains {old_ms:,.1f} ms ({old_count} rows, unranked) | '
+                    f'full-text {new_ms:,.1f} ms (top {len(hits)} ranked with snippets)'
+                ))
+
+            transaction.set_rollback(True)
+        self.stdout.write('Synthetic articles rolled back.')
@@ -0,0 +1,158 @@
+import gzip
+import json
+import time
+import zlib
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from app.models import Notification, NotificationArchive
+from app.sync import SYNC_TOMBSTONE_DAYS, expired_tombstones, tombstones_suppressed
+
+ARCHIVED_FIELDS = (
+    'id', 'user_id', 'type', 'source', 'count', 'template_key', 'params', 'title',
+    'message', 'full_details', 'metadata', 'read', 'created_at',
+)
+
+
+def _json_default(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete expired JWT blacklist tokens and sync tombstones, and archive old read notifications. '
+        'Works in small chunks, each in its own short transaction, so it is safe to run on a live database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--notification-days',
+            type=int,
+            default=90,
+            help='Archive read notifications older than this many days (default: 90)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Rows deleted per transaction (default: 1000)',
+        )
+        parser.add_argument(
+            '--archive-file',
+            help='Append archived notifications to this gzip JSONL file instead of the archive table',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Seconds to sleep between chunks to leave room for other writers (default: 0)',
+        )
+        parser.add_argument(
+            '--skip-tokens',
+            action='store_true',
+            help='Leave the token blacklist tables alone',
+        )
+        parser.add_argument(
+            '--skip-notifications',
+            action='store_true',
+            help='Leave the notification table alone',
+        )
+        parser.add_argument(
+            '--skip-tombstones',
+            action='store_true',
+            help='Leave the delta sync tombstones alone',
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        self.chunk_size = options['chunk_size']
+        self.pause = options['pause']
+
+        if not options['skip_tokens']:
+            self._compact_tokens()
+        if not options['skip_notifications']:
+            self._archive_notifications(options['notification_days'], options['archive_file'])
+        if not options['skip_tombstones']:
+            started = time.perf_counter()
+            count = self._delete_in_chunks(expired_tombstones())
+            self._report(f'Sync tombstones older than {SYNC_TOMBSTONE_DAYS} days deleted', count, started)
+
+    def _report(self, label, count, started):
+        elapsed = time.perf_counter() - started
+        rate = count / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'{label}: {count} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)'
+        ))
+
+    def _delete_in_chunks(self, queryset):
+        """Delete queryset rows chunk by chunk, lowest id first; returns rows deleted"""
+        deleted = 0
+        while True:
+            ids = list(queryset.order_by('id').values_list('id', flat=True)[:self.chunk_size])
+            if not ids:
+                return deleted
+            with transaction.atomic():
+                deleted += queryset.model.objects.filter(id__in=ids).delete()[1].get(
+                    queryset.model._meta.label, 0
+                )
+            if self.pause:
+                time.sleep(self.pause)
+
+    def _compact_tokens(self):
+        now = timezone.now()
+
+        # Blacklist rows first so the outstanding deletes have nothing to cascade to
+        started = time.perf_counter()
+        count = self._delete_in_chunks(BlacklistedToken.objects.filter(token__expires_at__lt=now))
+        self._report('Expired blacklisted tokens deleted', count, started)
+
+        started = time.perf_counter()
+        count = self._delete_in_chunks(OutstandingToken.objects.filter(expires_at__lt=now))
+        self._report('Expired outstanding tokens deleted', count, started)
+
+    def _archive_notifications(self, days, archive_file):
+        cutoff = timezone.now() - timedelta(days=days)
+        # Only read rows are archived, so unread counters never change here
+        queryset = Notification.objects.filter(read=True, created_at__lt=cutoff)
+        archive = gzip.open(archive_file, 'at', encoding='utf-8') if archive_file else None
+
+        archived = 0
+        started = time.perf_counter()
+        try:
+            while True:
+                rows = list(queryset.order_by('id').values(*ARCHIVED_FIELDS)[:self.chunk_size])
+                if not rows:
+                    break
+                lines = '\n'.join(json.dumps(row, default=_json_default) for row in rows)
+
+                with transaction.atomic():
+                    if archive is None:
+                        NotificationArchive.objects.create(
+                            first_id=rows[0]['id'],
+                            last_id=rows[-1]['id'],
+                            row_count=len(rows),
+                            oldest_created_at=min(row['created_at'] for row in rows),
+                            newest_created_at=max(row['created_at'] for row in rows),
+                            payload=zlib.compress(lines.encode(), 9),
+                        )
+                    else:
+                        archive.write(lines + '\n')
+                        archive.flush()
+                    # Archived, not deleted: clients keep their copies, so no tombstones
+                    with tombstones_suppressed():
+                        Notification.objects.filter(id__in=[row['id'] for row in rows]).delete()
+
+                archived += len(rows)
+                if self.pause:
+                    time.sleep(self.pause)
+        finally:
+            if archive is not None:
+                archive.close()
+
+        destination = archive_file or 'the archive table'
+        self._report(f'Read notifications older than {days} days archived to {destination}', archived, started)
@@ -0,0 +1,91 @@
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from app.models import Signal
+from app.signal_views import expire_signals
+
+
+class Command(BaseCommand):
+    help = (
+        'Mark active signals past their expires_at as expired in a single UPDATE. '
+        'Meant to run on a schedule (e.g. every minute from cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--benchmark',
+            type=int,
+            metavar='ROWS',
+            help='Time the sweep against ROWS synthetic signals inside a rolled-back transaction instead',
+        )
+        parser.add_argument(
+            '--expired-ratio',
+            type=float,
+            default=0.1,
+            help='Share of the synthetic signals that are past expiry when benchmarking (default: 0.1)',
+        )
+
+    def handle(self, *args, **options):
+        if options['benchmark']:
+            self._benchmark(options['benchmark'], options['expired_ratio'])
+            return
+
+        started = time.perf_counter()
+        expired = expire_signals()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Expired {expired} signals in {elapsed * 1000:.1f} ms'))
+
+    def _benchmark(self, rows, expired_ratio):
+        now = timezone.now()
+        expired_every = max(int(1 / expired_ratio), 1) if expired_ratio > 0 else 0
+        with transaction.atomic():
+            started = time.perf_counter()
+            Signal.objects.bulk_create(
+                (
+                    Signal(
+                        name=f'BENCH{i}',
+                        price=Decimal('10.00'),
+                        market_analysis='Synthetic signal',
+                        entry_point='1',
+                        target_price='2',
+                        stop_loss='0.5',
+                        action='BUY',
+                        timeframe='1 day',
+                        # Spread expiries on both sides of now
+                        expires_at=now - timedelta(minutes=1 + i % 60)
+                        if expired_every and i % expired_every == 0
+                        else now + timedelta(hours=1 + i % 720),
+                    )
+                    for i in range(rows)
+                ),
+                batch_size=5000,
+            )
+            self.stdout.write(f'Inserted {rows} synthetic signals in {time.perf_counter() - started:.2f}s')
+
+            if connection.vendor in ('postgresql', 'sqlite'):
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE app_signal')
+
+            sweep = Signal.objects.filter(is_active=True, status='active', expires_at__lte=now).order_by()
+            self.stdout.write(f'Plan: {sweep.explain()}')
+
+            started = time.perf_counter()
+            expired = expire_signals(now)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(
+                f'Swept {expired} expired of {rows} signals in {elapsed * 1000:.1f} ms '
+                f'({expired / elapsed if elapsed else 0:,.0f} rows/sec)'
+            ))
+
+            started = time.perf_counter()
+            again = expire_signals(now)
+            self.stdout.write(self.style.SUCCESS(
+                f'Idle sweep (nothing to expire): {again} rows in {(time.perf_counter() - started) * 1000:.1f} ms'
+            ))
+            transaction.set_rollback(True)
+        self.stdout.write('Synthetic signals rolled back.')
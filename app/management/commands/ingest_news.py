@@ -0,0 +1,112 @@
+import gzip
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.news_ingest import InvalidArticle, article_from_row, ingest_chunk
+from app.news_views import invalidate_news_pages
+
+# Invalid records reported individually before the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = (
+        'Load news articles from JSONL feed files (one JSON object per line; .gz supported, '
+        '"-" reads stdin). Unchanged articles are skipped by content hash, changed ones are '
+        'updated and new ones created, a chunk at a time.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='JSONL files to ingest')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Articles written per transaction (default: 1000)',
+        )
+        parser.add_argument(
+            '--progress-every',
+            type=int,
+            default=50000,
+            help='Print throughput every N records (default: 50000, 0 disables)',
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        self.chunk_size = options['chunk_size']
+        self.progress_every = options['progress_every']
+        self.totals = {'read': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'invalid': 0}
+        self.started = time.perf_counter()
+        self.next_progress = self.progress_every
+
+        try:
+            for path in options['paths']:
+                self._ingest_file(path)
+        finally:
+            if self.totals['created'] or self.totals['updated']:
+                invalidate_news_pages()
+
+        elapsed = time.perf_counter() - self.started
+        t = self.totals
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {t['read']} records in {elapsed:.2f}s ({t['read'] / elapsed if elapsed else 0:,.0f} records/sec): "
+            f"{t['created']} created, {t['updated']} updated, {t['unchanged']} unchanged, {t['invalid']} invalid"
+        ))
+
+    def _open(self, path):
+        if path == '-':
+            return sys.stdin
+        if path.endswith('.gz'):
+            return gzip.open(path, 'rt', encoding='utf-8')
+        return open(path, encoding='utf-8')
+
+    def _ingest_file(self, path):
+        try:
+            handle = self._open(path)
+        except OSError as e:
+            raise CommandError(f'Cannot open {path}: {e}')
+
+        chunk = []
+        try:
+            for line_number, line in enumerate(handle, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                self.totals['read'] += 1
+                try:
+                    chunk.append(article_from_row(json.loads(line)))
+                except (ValueError, InvalidArticle) as e:
+                    self._invalid(path, line_number, e)
+                    continue
+                if len(chunk) >= self.chunk_size:
+                    self._write(chunk)
+                    chunk = []
+            if chunk:
+                self._write(chunk)
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+
+    def _invalid(self, path, line_number, error):
+        self.totals['invalid'] += 1
+        if self.totals['invalid'] <= MAX_REPORTED_ERRORS:
+            self.stderr.write(f'{path}:{line_number}: skipped, {error}')
+        elif self.totals['invalid'] == MAX_REPORTED_ERRORS + 1:
+            self.stderr.write('Further invalid records are counted but not listed')
+
+    def _write(self, chunk):
+        created, updated, unchanged = ingest_chunk(chunk)
+        self.totals['created'] += created
+        self.totals['updated'] += updated
+        self.totals['unchanged'] += unchanged
+
+        if self.progress_every and self.totals['read'] >= self.next_progress:
+            self.next_progress += self.progress_every
+            elapsed = time.perf_counter() - self.started
+            self.stdout.write(
+                f"{self.totals['read']} records, {self.totals['read'] / elapsed:,.0f} records/sec"
+            )
@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from app.realtime import PRICES_CHANNEL, Broadcaster, encode_event
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure memory and fan-out latency of idle streaming subscribers in one worker. '
+        'Subscribers are in-process queues, so this covers the Broadcaster only, not HTTP '
+        'connections held by the ASGI server.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--subscribers',
+            type=int,
+            default=5000,
+            help='Number of idle subscribers to hold open (default: 5000)',
+        )
+        parser.add_argument(
+            '--events',
+            type=int,
+            default=20,
+            help='Number of price events to fan out (default: 20)',
+        )
+
+    def handle(self, *args, **options):
+        asyncio.run(self._run(options['subscribers'], options['events']))
+
+    async def _run(self, subscriber_count, event_count):
+        broadcaster = Broadcaster()
+        received = 0
+        done = asyncio.Event()
+        expected = subscriber_count * event_count
+
+        async def consume(subscription):
+            nonlocal received
+            # Mirrors the stream view: an idle await on the subscription queue
+            while True:
+                await subscription.get()
+                received += 1
+                if received == expected:
+                    done.set()
+
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        subscriptions = [broadcaster.subscribe([PRICES_CHANNEL]) for _ in range(subscriber_count)]
+        tasks = [asyncio.create_task(consume(s)) for s in subscriptions]
+        await asyncio.sleep(0)
+        subscribe_seconds = time.perf_counter() - started
+        per_subscriber = (tracemalloc.get_traced_memory()[0] - baseline) / max(subscriber_count, 1)
+        tracemalloc.stop()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Subscribed {broadcaster.subscriber_count} idle clients in {subscribe_seconds:.3f}s '
+            f'(~{per_subscriber / 1024:.1f} KiB each)'
+        ))
+
+        # Publish from a separate thread, as signal handlers do in a real worker
+        message = encode_event('price', {'symbol': 'AAPL', 'price': '190.00'})
+
+        def produce():
+            for _ in range(event_count):
+                broadcaster.deliver(PRICES_CHANNEL, message)
+
+        started = time.perf_counter()
+        threading.Thread(target=produce).start()
+        await done.wait()
+        elapsed = time.perf_counter() - started
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Delivered {received} messages ({event_count} events x {subscriber_count} subscribers) '
+            f'in {elapsed:.3f}s — {received / elapsed:,.0f} msgs/sec, '
+            f'{elapsed / max(event_count, 1) * 1000:.2f} ms per event fan-out'
+        ))
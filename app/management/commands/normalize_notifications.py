@@ -0,0 +1,119 @@
+import re
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from app.models import Notification
+from app.notification_templates import TEMPLATES, compile_template, render
+
+# Joins title, message and full_details into one string to match against
+SEPARATOR = "\x1f"
+
+
+def _pattern(template):
+    """
+    Build a regex that reverses a template: the first use of each field
+    captures it, later plain uses must repeat the same text.
+    """
+    spec = TEMPLATES[template]
+    seen = set()
+    sections = []
+    for text in (spec["title"], spec["message"], spec["full_details"]):
+        parts = []
+        for literal, field, _, conversion in compile_template(text):
+            parts.append(re.escape(literal))
+            if field is None:
+                continue
+            if field not in seen:
+                seen.add(field)
+                parts.append(f"(?P<{field}>.*?)")
+            elif conversion:
+                # Converted repeats are checked by re-rendering below
+                parts.append(".*?")
+            else:
+                parts.append(f"(?P={field})")
+        sections.append("".join(parts))
+    return re.compile(re.escape(SEPARATOR).join(sections), re.DOTALL)
+
+
+class Command(BaseCommand):
+    help = 'Convert notifications with stored text into (template_key, params) rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows read and updated per batch (default: 1000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be converted without writing',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        candidates = defaultdict(list)
+        for template, spec in TEMPLATES.items():
+            candidates[spec["type"]].append((template, _pattern(template)))
+
+        converted = unmatched = 0
+        last_id = 0
+        started = time.perf_counter()
+        while True:
+            rows = list(
+                Notification.objects.filter(template_key='', id__gt=last_id)
+                .order_by('id')
+                .only('id', 'type', 'title', 'message', 'full_details')[:batch_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            changed = []
+            for row in rows:
+                match = self._match(row, candidates[row.type])
+                if match is None:
+                    unmatched += 1
+                    continue
+                row.template_key, row.params = match
+                row.title = row.message = row.full_details = ''
+                changed.append(row)
+
+            converted += len(changed)
+            if changed and not dry_run:
+                with transaction.atomic():
+                    Notification.objects.bulk_update(
+                        changed, ['template_key', 'params', 'title', 'message', 'full_details']
+                    )
+
+        elapsed = time.perf_counter() - started
+        verb = 'Would convert' if dry_run else 'Converted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {converted} notifications in {elapsed:.2f}s '
+            f'({converted / elapsed if elapsed else 0:,.0f} rows/sec); {unmatched} left as stored text'
+        ))
+        if converted and not dry_run and connection.vendor == 'postgresql':
+            self.stdout.write(
+                'Run VACUUM (FULL, ANALYZE) app_notification during a quiet period to return the freed space.'
+            )
+
+    @staticmethod
+    def _match(row, candidates):
+        text = SEPARATOR.join((row.title, row.message, row.full_details))
+        for template, pattern in candidates:
+            found = pattern.fullmatch(text)
+            if found is None:
+                continue
+            params = found.groupdict()
+            rendered = render(template, params)
+            if (rendered["title"], rendered["message"], rendered["full_details"]) == (
+                row.title, row.message, row.full_details
+            ):
+                return template, params
+        return None
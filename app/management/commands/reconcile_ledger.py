@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.ledger import SNAPSHOT_CHUNK, reconcile, take_snapshots, unbalanced_postings
+
+# Mismatching users reported individually before the rest are only counted
+MAX_REPORTED_MISMATCHES = 50
+
+
+class Command(BaseCommand):
+    help = (
+        'Check every user\'s stored balance and profit against the ledger (latest snapshot plus '
+        'later postings) and optionally roll balance snapshots forward. Exits with an error if '
+        'anything disagrees.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Re-sum every posting instead of starting from snapshots, and check that each posting balances',
+        )
+        parser.add_argument(
+            '--snapshot',
+            action='store_true',
+            help='Write new balance snapshots after a clean check',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=SNAPSHOT_CHUNK,
+            help=f'Users checked per query (default: {SNAPSHOT_CHUNK})',
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        started = time.perf_counter()
+        problems = 0
+
+        if options['full']:
+            for posting, total in unbalanced_postings():
+                problems += 1
+                self.stderr.write(f'Posting {posting} does not balance: legs sum to {total}')
+
+        mismatches = 0
+        for user_id, email, balance, ledger_balance, profit, ledger_profit in reconcile(
+            full=options['full'], chunk_size=options['chunk_size']
+        ):
+            mismatches += 1
+            if mismatches <= MAX_REPORTED_MISMATCHES:
+                self.stderr.write(
+                    f'{email} (#{user_id}): balance {balance} vs ledger {ledger_balance}, '
+                    f'profit {profit} vs ledger {ledger_profit}'
+                )
+            elif mismatches == MAX_REPORTED_MISMATCHES + 1:
+                self.stderr.write('Further mismatches are counted but not listed')
+        problems += mismatches
+
+        elapsed = time.perf_counter() - started
+        if problems:
+            raise CommandError(f'{mismatches} users disagree with the ledger, {problems - mismatches} unbalanced postings ({elapsed:.1f}s)')
+        self.stdout.write(self.style.SUCCESS(f'All balances match the ledger ({elapsed:.1f}s)'))
+
+        if options['snapshot']:
+            written = take_snapshots(chunk_size=options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(f'Wrote {written} balance snapshots'))
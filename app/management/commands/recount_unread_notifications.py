@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from app.notification_service import recount_unread
+
+
+class Command(BaseCommand):
+    help = 'Rebuild every user\'s unread notification counter from the notification table'
+
+    def handle(self, *args, **options):
+        updated = recount_unread()
+        self.stdout.write(self.style.SUCCESS(f'Recounted unread notifications for {updated} users'))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:18
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_unread_counts(apps, schema_editor):
+    CustomUser = apps.get_model('app', 'CustomUser')
+    Notification = apps.get_model('app', 'Notification')
+    unread = Notification.objects.filter(
+        user=OuterRef('pk'), read=False
+    ).order_by().values('user').annotate(total=Count('id')).values('total')
+    CustomUser.objects.update(unread_notification_count=Coalesce(Subquery(unread), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_trader_bio_trader_category_trader_cumulative_copiers_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='app_notific_user_id_1ee635_idx',
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='unread_notification_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of unread notifications'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='notif_user_created_id_idx'),
+        ),
+        migrations.RunPython(backfill_unread_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_notification_unread_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='broadcasts_read_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Every broadcast created up to this time counts as read', null=True),
+        ),
+        migrations.CreateModel(
+            name='BroadcastNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('system', 'System'), ('news', 'News'), ('alert', 'Alert')], default='system', help_text='Type of notification', max_length=20)),
+                ('title', models.CharField(help_text='Notification title', max_length=255)),
+                ('message', models.TextField(help_text='Short notification message')),
+                ('full_details', models.TextField(blank=True, help_text='Full notification details/description')),
+                ('metadata', models.JSONField(blank=True, default=dict, help_text='Additional metadata')),
+                ('is_active', models.BooleanField(default=True, help_text='Inactive broadcasts are hidden from everyone')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='When the broadcast was sent')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Broadcast Notification',
+                'verbose_name_plural': 'Broadcast Notifications',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['is_active', '-created_at'], name='broadcast_active_created_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BroadcastRead',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('read_at', models.DateTimeField(auto_now_add=True)),
+                ('broadcast', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reads', to='app.broadcastnotification')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='broadcast_reads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'broadcast')},
+            },
+        ),
+    ]
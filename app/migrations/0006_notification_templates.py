@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_broadcast_notifications'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='params',
+            field=models.JSONField(blank=True, default=dict, help_text='Values substituted into the template'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='template_key',
+            field=models.CharField(blank=True, default='', help_text='Key in notification_templates.TEMPLATES used to render this notification', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='full_details',
+            field=models.TextField(blank=True, default='', help_text='Full notification details/description'),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='message',
+            field=models.TextField(blank=True, default='', help_text='Short notification message'),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='title',
+            field=models.CharField(blank=True, default='', help_text='Notification title', max_length=255),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0006_notification_templates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_id', models.BigIntegerField(help_text='Lowest notification id in the chunk')),
+                ('last_id', models.BigIntegerField(help_text='Highest notification id in the chunk')),
+                ('row_count', models.PositiveIntegerField()),
+                ('oldest_created_at', models.DateTimeField()),
+                ('newest_created_at', models.DateTimeField()),
+                ('payload', models.BinaryField(help_text='zlib-compressed JSONL, one notification per line')),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Notification Archive',
+                'verbose_name_plural': 'Notification Archives',
+                'ordering': ['-archived_at'],
+            },
+        ),
+    ]
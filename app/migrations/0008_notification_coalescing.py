@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_notification_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='count',
+            field=models.PositiveIntegerField(default=1, help_text='Number of events coalesced into this notification'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='source',
+            field=models.CharField(blank=True, default='', help_text='Origin of the event (e.g. orders, copy_trader:12); unread notifications from the same source are coalesced', max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'source', '-created_at'], name='notif_user_source_idx'),
+        ),
+    ]
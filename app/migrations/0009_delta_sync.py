@@ -0,0 +1,73 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:31
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_updated_at(apps, schema_editor):
+    # Existing rows last changed when they were closed or opened, not at migrate time
+    for model in ('UserCopyTraderHistory', 'UserStockPosition'):
+        apps.get_model('app', model).objects.update(
+            updated_at=Coalesce('closed_at', 'opened_at')
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_notification_coalescing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('notification', 'Notification'), ('position', 'Stock Position'), ('transaction', 'Transaction'), ('copy_trade', 'Copy Trade')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('user_id', models.BigIntegerField(blank=True, null=True)),
+                ('trader_id', models.BigIntegerField(blank=True, null=True)),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='usercopytraderhistory',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Last change, used by delta sync'),
+        ),
+        migrations.AddField(
+            model_name='userstockposition',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'updated_at'], name='notif_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'updated_at'], name='txn_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usercopytraderhistory',
+            index=models.Index(fields=['trader', 'updated_at'], name='copytrade_trader_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userstockposition',
+            index=models.Index(fields=['user', 'updated_at'], name='position_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='synctombstone',
+            index=models.Index(fields=['user_id', 'deleted_at'], name='tombstone_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='synctombstone',
+            index=models.Index(fields=['trader_id', 'deleted_at'], name='tombstone_trader_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='synctombstone',
+            index=models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
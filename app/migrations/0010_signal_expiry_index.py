@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_delta_sync'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='signal',
+            index=models.Index(fields=['is_active', 'expires_at'], name='signal_active_expires_idx'),
+        ),
+    ]
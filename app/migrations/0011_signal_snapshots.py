@@ -0,0 +1,65 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:34
+
+import hashlib
+import json
+
+import django.db.models.deletion
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import migrations, models
+
+
+def share_snapshots(apps, schema_editor):
+    """Move each purchase's inline signal_data into one shared row per distinct content"""
+    SignalSnapshot = apps.get_model('app', 'SignalSnapshot')
+    UserSignalPurchase = apps.get_model('app', 'UserSignalPurchase')
+    purchases = UserSignalPurchase.objects.filter(snapshot__isnull=True, signal_data__isnull=False)
+    while True:
+        batch = list(purchases.only('id', 'signal_data')[:1000])
+        if not batch:
+            break
+        snapshots = {}
+        for purchase in batch:
+            canonical = json.dumps(
+                purchase.signal_data, sort_keys=True, separators=(",", ":"), cls=DjangoJSONEncoder
+            )
+            purchase.snapshot_id = hashlib.sha256(canonical.encode()).hexdigest()
+            purchase.signal_data = None
+            snapshots.setdefault(purchase.snapshot_id, json.loads(canonical))
+        SignalSnapshot.objects.bulk_create(
+            [SignalSnapshot(hash=digest, data=data) for digest, data in snapshots.items()],
+            ignore_conflicts=True,
+        )
+        UserSignalPurchase.objects.bulk_update(batch, ['snapshot', 'signal_data'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0010_signal_expiry_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SignalSnapshot',
+            fields=[
+                ('hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('data', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Signal Snapshot',
+                'verbose_name_plural': 'Signal Snapshots',
+            },
+        ),
+        migrations.AlterField(
+            model_name='usersignalpurchase',
+            name='signal_data',
+            field=models.JSONField(blank=True, help_text='Legacy inline snapshot, moved into shared snapshots by migration 0011', null=True),
+        ),
+        migrations.AddField(
+            model_name='usersignalpurchase',
+            name='snapshot',
+            field=models.ForeignKey(blank=True, help_text='Signal content at purchase time, shared with other buyers of the same version', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='purchases', to='app.signalsnapshot'),
+        ),
+        migrations.RunPython(share_snapshots, migrations.RunPython.noop),
+    ]
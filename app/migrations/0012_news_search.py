@@ -0,0 +1,62 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE app_news ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(summary, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX news_search_vector_idx ON app_news USING GIN (search_vector)",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS news_search_vector_idx",
+    "ALTER TABLE app_news DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE app_news_fts USING fts5(title, summary, content, tokenize = 'porter unicode61')",
+    "INSERT INTO app_news_fts (rowid, title, summary, content) SELECT id, title, summary, content FROM app_news",
+]
+SQLITE_REVERSE = [
+    "DROP TABLE IF EXISTS app_news_fts",
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for sql in POSTGRES_FORWARD:
+            schema_editor.execute(sql)
+    elif vendor == 'sqlite':
+        try:
+            for sql in SQLITE_FORWARD:
+                schema_editor.execute(sql)
+        except OperationalError:
+            # SQLite built without FTS5: search falls back to icontains
+            pass
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        statements = POSTGRES_REVERSE
+    elif vendor == 'sqlite':
+        statements = SQLITE_REVERSE
+    else:
+        return
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0011_signal_snapshots'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0012_news_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['is_featured', '-published_at'], name='news_featured_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['category', '-published_at'], name='news_category_published_idx'),
+        ),
+    ]
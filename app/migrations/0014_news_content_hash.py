@@ -0,0 +1,49 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:41
+
+import hashlib
+import unicodedata
+
+from django.db import migrations, models
+
+
+def _normalize(text):
+    return " ".join(unicodedata.normalize("NFKC", text or "").casefold().split())
+
+
+def backfill_content_hash(apps, schema_editor):
+    # Same hash as app.news_ingest.news_content_hash, frozen here
+    News = apps.get_model('app', 'News')
+    last_id = 0
+    while True:
+        articles = list(
+            News.objects.filter(id__gt=last_id).order_by('id')
+            .only('id', 'title', 'summary', 'content', 'category', 'tags')[:1000]
+        )
+        if not articles:
+            break
+        for article in articles:
+            parts = [_normalize(article.title), _normalize(article.summary), _normalize(article.content), article.category]
+            parts += sorted(_normalize(str(tag)) for tag in article.tags or ())
+            article.content_hash = hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+        News.objects.bulk_update(articles, ['content_hash'])
+        last_id = articles[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0013_news_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Hash of the normalized article text, used to skip unchanged articles on ingest', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['title'], name='news_title_idx'),
+        ),
+        migrations.RunPython(backfill_content_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:42
+
+from django.db import migrations, models
+
+
+class AddIndexConcurrentlyOnPostgres(migrations.AddIndex):
+    """AddIndex that builds with CREATE INDEX CONCURRENTLY on PostgreSQL so writes aren't blocked"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.add_index(model, self.index, concurrently=True)
+        else:
+            schema_editor.add_index(model, self.index)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.remove_index(model, self.index, concurrently=True)
+        else:
+            schema_editor.remove_index(model, self.index)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('app', '0014_news_content_hash'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyOnPostgres(
+            model_name='transaction',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='txn_user_created_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'transaction_type', '-created_at', '-id'], name='txn_user_type_created_idx'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:46
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def open_ledger(apps, schema_editor):
+    # Each existing balance/profit becomes an opening posting against the
+    # adjustments account, so the ledger agrees with the columns from the start.
+    # Posting ids are derived from the user, not from app code, so this stays
+    # fixed whatever later happens to app.references
+    CustomUser = apps.get_model('app', 'CustomUser')
+    LedgerEntry = apps.get_model('app', 'LedgerEntry')
+    now = django.utils.timezone.now()
+    last_id = 0
+    while True:
+        users = list(
+            CustomUser.objects.filter(id__gt=last_id).exclude(balance=0, profit=0)
+            .order_by('id').values_list('id', 'balance', 'profit')[:1000]
+        )
+        if not users:
+            break
+        entries = []
+        for user_id, balance, profit in users:
+            posting = f'OPEN-{user_id}'
+            for account, amount in (('balance', balance), ('profit', profit), ('adjustments', -(balance + profit))):
+                if amount:
+                    entries.append(LedgerEntry(
+                        posting=posting, user_id=user_id, account=account, kind='opening',
+                        amount=amount, memo='Balance before the ledger', created_at=now,
+                    ))
+        LedgerEntry.objects.bulk_create(entries)
+        last_id = users[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0015_transaction_history_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('profit', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('last_entry_id', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Balance Snapshot',
+                'verbose_name_plural': 'Balance Snapshots',
+                'indexes': [models.Index(fields=['user', '-last_entry_id'], name='snapshot_user_latest_idx'), models.Index(fields=['last_entry_id'], name='snapshot_entry_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posting', models.CharField(db_index=True, max_length=26)),
+                ('account', models.CharField(choices=[('balance', 'Balance'), ('profit', 'Profit'), ('external', 'External Funds'), ('stocks', 'Stock Trading'), ('signals', 'Signal Sales'), ('copy_trading', 'Copy Trading'), ('trading', 'Managed Trades'), ('earnings', 'Earnings'), ('adjustments', 'Adjustments')], max_length=20)),
+                ('kind', models.CharField(choices=[('opening', 'Opening Balance'), ('deposit', 'Deposit'), ('withdrawal', 'Withdrawal'), ('stock_buy', 'Stock Buy'), ('stock_sell', 'Stock Sell'), ('signal_purchase', 'Signal Purchase'), ('transfer', 'Transfer'), ('copy_trade', 'Copy Trade'), ('trade', 'Managed Trade'), ('earning', 'Earning'), ('adjustment', 'Adjustment')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('reference', models.CharField(blank=True, max_length=100)),
+                ('memo', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Ledger Entry',
+                'verbose_name_plural': 'Ledger Entries',
+                'indexes': [models.Index(fields=['user', 'id'], name='ledger_user_tail_idx')],
+            },
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+ACCOUNT_FIELDS = ('balance', 'profit', 'unread_notification_count', 'broadcasts_read_at')
+
+
+def create_accounts(apps, schema_editor):
+    CustomUser = apps.get_model('app', 'CustomUser')
+    Account = apps.get_model('app', 'Account')
+    last_id = 0
+    while True:
+        users = list(
+            CustomUser.objects.filter(id__gt=last_id).order_by('id').values_list('id', *ACCOUNT_FIELDS)[:1000]
+        )
+        if not users:
+            break
+        Account.objects.bulk_create(
+            Account(user_id=row[0], **dict(zip(ACCOUNT_FIELDS, row[1:]))) for row in users
+        )
+        last_id = users[-1][0]
+
+
+def restore_user_columns(apps, schema_editor):
+    CustomUser = apps.get_model('app', 'CustomUser')
+    Account = apps.get_model('app', 'Account')
+    for account in Account.objects.iterator(chunk_size=1000):
+        CustomUser.objects.filter(id=account.user_id).update(
+            **{field: getattr(account, field) for field in ACCOUNT_FIELDS}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0016_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Account',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='account', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('balance', models.DecimalField(decimal_places=2, default=0.0, help_text='This is a monetary value.', max_digits=20, verbose_name='Balance')),
+                ('profit', models.DecimalField(decimal_places=2, default=0.0, help_text='This is a monetary value.', max_digits=20, verbose_name='Profit')),
+                ('unread_notification_count', models.PositiveIntegerField(default=0, editable=False, help_text='Number of unread notifications')),
+                ('broadcasts_read_at', models.DateTimeField(blank=True, editable=False, help_text='Every broadcast created up to this time counts as read', null=True)),
+            ],
+            options={
+                'verbose_name': 'Account',
+                'verbose_name_plural': 'Accounts',
+            },
+        ),
+        migrations.RunPython(create_accounts, restore_user_columns),
+        migrations.RemoveField(
+            model_name='customuser',
+            name='balance',
+        ),
+        migrations.RemoveField(
+            model_name='customuser',
+            name='broadcasts_read_at',
+        ),
+        migrations.RemoveField(
+            model_name='customuser',
+            name='profit',
+        ),
+        migrations.RemoveField(
+            model_name='customuser',
+            name='unread_notification_count',
+        ),
+    ]
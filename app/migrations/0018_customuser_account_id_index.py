@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0017_account'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='account_id',
+            field=models.CharField(blank=True, db_index=True, max_length=10, null=True),
+        ),
+    ]
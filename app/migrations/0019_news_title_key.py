@@ -0,0 +1,56 @@
+# Generated by Django 5.2.6 on 2026-10-19 01:09
+
+import hashlib
+import unicodedata
+from datetime import timezone as dt_timezone
+
+from django.db import migrations, models
+
+
+def _normalize(text):
+    return " ".join(unicodedata.normalize("NFKC", text or "").casefold().split())
+
+
+def backfill_title_key_and_hash(apps, schema_editor):
+    # Same as app.news_ingest.news_title_key / news_content_hash, frozen here
+    News = apps.get_model('app', 'News')
+    last_id = 0
+    while True:
+        articles = list(News.objects.filter(id__gt=last_id).order_by('id')[:1000])
+        if not articles:
+            break
+        for article in articles:
+            published_at = article.published_at
+            if published_at is not None:
+                published_at = published_at.astimezone(dt_timezone.utc).isoformat()
+            parts = [
+                _normalize(article.title), _normalize(article.summary), _normalize(article.content),
+                article.category, _normalize(article.source), _normalize(article.author),
+                published_at or "", "1" if article.is_featured else "0",
+            ]
+            parts += sorted(_normalize(str(tag)) for tag in article.tags or ())
+            article.title_key = _normalize(article.title)[:255]
+            article.content_hash = hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+        News.objects.bulk_update(articles, ['title_key', 'content_hash'])
+        last_id = articles[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0018_customuser_account_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='title_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Normalized title that identifies the article on ingest', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='news',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Hash of the normalized article fields, used to skip unchanged articles on ingest', max_length=64),
+        ),
+        migrations.RunPython(backfill_title_key_and_hash, migrations.RunPython.noop),
+    ]
@@ -8,7 +8,7 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from decimal import Decimal
 
-from django.db.models.signals import pre_save
+from django.db.models.signals import pre_save, post_delete
 from django.dispatch import receiver
 
 from cloudinary.models import CloudinaryField
@@ -44,6 +44,10 @@ class CustomUserManager(BaseUserManager):
 
         return self.create_user(email, password, **extra_fields)
 
+    def for_auth(self):
+        """Users as loaded on every request: money joined in, profile columns deferred"""
+        return self.select_related('account').defer(*self.model.PROFILE_FIELDS)
+
 
 class CustomUser(AbstractBaseUser, PermissionsMixin):
 
@@ -98,11 +102,9 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
         help_text="Country phone code (e.g., +1, +234)"
     )
 
-    # User Balances
-    account_id = models.CharField(max_length=10, blank=True, null=True)
-    balance = models.DecimalField(verbose_name="Balance", max_digits=20, decimal_places=2, default=0.00, help_text="This is a monetary value.")
-    profit = models.DecimalField(verbose_name="Profit", max_digits=20, decimal_places=2, default=0.00, help_text="This is a monetary value.")
-    
+    # User Balances (the money itself lives on Account)
+    account_id = models.CharField(max_length=10, blank=True, null=True, db_index=True)
+
     current_loyalty_status = models.CharField(
         max_length=20,
         choices=LOYALTY_TIERS,
@@ -178,7 +180,15 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []  # Email & Password are required by default
-    
+
+    # Columns request authentication leaves deferred (see CustomUserManager.for_auth)
+    PROFILE_FIELDS = (
+        'id_type', 'id_front', 'id_back', 'dob', 'address', 'postal_code',
+        'country', 'region', 'city', 'phone', 'country_calling_code', 'pass_plain_text',
+        'current_loyalty_status', 'next_loyalty_status', 'next_amount_to_upgrade',
+        'referral_bonus_earned', 'verification_code', 'code_created_at',
+    )
+
     class Meta:
         verbose_name_plural = "Users"
         verbose_name = "User"
@@ -186,6 +196,79 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.email
 
+    def get_account(self):
+        """The user's Account row, created on first use for users that predate it"""
+        try:
+            return self.account
+        except Account.DoesNotExist:
+            if self._state.adding:
+                account = Account()
+            else:
+                account, _ = Account.objects.get_or_create(user=self)
+            self.account = account
+            return account
+
+    def _account_field(name, how):
+        def getter(self):
+            return getattr(self.get_account(), name)
+
+        def setter(self, value):
+            raise AttributeError(f"{name} is read-only on users; {how}")
+
+        return property(getter, setter)
+
+    # The old CustomUser columns, now read from the Account row. Writes go
+    # through the ledger or the notification service, never through the user
+    balance = _account_field('balance', 'post a ledger entry with app.ledger.post() or adjust_to()')
+    profit = _account_field('profit', 'post a ledger entry with app.ledger.post() or adjust_to()')
+    unread_notification_count = _account_field('unread_notification_count', 'it is kept by app.notification_service')
+    broadcasts_read_at = _account_field('broadcasts_read_at', 'it is kept by app.notification_service')
+    del _account_field
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # Touching one deferred profile column loads the rest with it, so a
+        # view that reads the profile costs one extra query, not one per column
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = list(deferred)
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
+
+class Account(models.Model):
+    """
+    A user's money and hot counters, kept off the wide CustomUser row so the
+    frequent writes (ledger postings, unread counts) lock and rewrite a
+    small row. Balances only change through app.ledger.post().
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="account"
+    )
+    balance = models.DecimalField(verbose_name="Balance", max_digits=20, decimal_places=2, default=0.00, help_text="This is a monetary value.")
+    profit = models.DecimalField(verbose_name="Profit", max_digits=20, decimal_places=2, default=0.00, help_text="This is a monetary value.")
+
+    # Denormalized counters, maintained with relative UPDATEs (see notification_service)
+    unread_notification_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of unread notifications"
+    )
+    broadcasts_read_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Every broadcast created up to this time counts as read"
+    )
+
+    class Meta:
+        verbose_name = 'Account'
+        verbose_name_plural = 'Accounts'
+
+    def __str__(self):
+        return f"Account {self.pk}"
+
 
 def generate_unique_account_id():
     while True:
@@ -232,6 +315,12 @@ def create_auth_token(sender, instance=None, created=False, **kwargs):
         if fields_to_update:
             instance.save(update_fields=fields_to_update)
 
+        # Money set before the first save sits on an unsaved Account
+        account = instance.get_account()
+        if account._state.adding:
+            account.user = instance
+            account.save(force_insert=True)
+
 
 
 
@@ -642,6 +731,10 @@ class UserCopyTraderHistory(models.Model):
         blank=True,
         help_text="When the trade was closed"
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Last change, used by delta sync"
+    )
     
     # Additional Info
     reference = models.CharField(
@@ -661,6 +754,7 @@ class UserCopyTraderHistory(models.Model):
         ordering = ["-opened_at"]
         indexes = [
             models.Index(fields=['trader', '-opened_at']),
+            models.Index(fields=['trader', 'updated_at'], name='copytrade_trader_updated_idx'),
             models.Index(fields=['status']),
         ]
     
@@ -783,8 +877,8 @@ class UserCopyTraderHistory(models.Model):
     def save(self, *args, **kwargs):
         """Auto-generate reference if not provided"""
         if not self.reference:
-            from django.utils.crypto import get_random_string
-            self.reference = f"TRD-{get_random_string(12).upper()}"
+            from .references import new_reference
+            self.reference = new_reference("TRD")
         super().save(*args, **kwargs)
 
 
@@ -993,7 +1087,8 @@ class Transaction(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.reference:
-            self.reference = f"TXN-{random.randint(100000, 999999)}-{self.user.id}"
+            from .references import new_reference
+            self.reference = new_reference("TXN")
         super().save(*args, **kwargs)
 
 
@@ -1004,6 +1099,101 @@ class Transaction(models.Model):
         ordering = ['-created_at']
         verbose_name_plural = "Transactions"
         verbose_name = "Transaction"
+        indexes = [
+            # History endpoints: newest first, optionally by type, keyset on (created_at, id)
+            models.Index(fields=['user', '-created_at', '-id'], name='txn_user_created_idx'),
+            models.Index(
+                fields=['user', 'transaction_type', '-created_at', '-id'], name='txn_user_type_created_idx'
+            ),
+            models.Index(fields=['user', 'updated_at'], name='txn_user_updated_idx'),
+        ]
+
+
+class LedgerEntry(models.Model):
+    """
+    One leg of a posting to the money ledger. Every posting's legs sum to
+    zero: the user's balance/profit legs are matched by a house account leg.
+    Rows are only ever inserted; see app/ledger.py.
+    """
+    USER_ACCOUNTS = ('balance', 'profit')
+
+    ACCOUNT_CHOICES = [
+        ('balance', 'Balance'),
+        ('profit', 'Profit'),
+        ('external', 'External Funds'),
+        ('stocks', 'Stock Trading'),
+        ('signals', 'Signal Sales'),
+        ('copy_trading', 'Copy Trading'),
+        ('trading', 'Managed Trades'),
+        ('earnings', 'Earnings'),
+        ('adjustments', 'Adjustments'),
+    ]
+
+    KIND_CHOICES = [
+        ('opening', 'Opening Balance'),
+        ('deposit', 'Deposit'),
+        ('withdrawal', 'Withdrawal'),
+        ('stock_buy', 'Stock Buy'),
+        ('stock_sell', 'Stock Sell'),
+        ('signal_purchase', 'Signal Purchase'),
+        ('transfer', 'Transfer'),
+        ('copy_trade', 'Copy Trade'),
+        ('trade', 'Managed Trade'),
+        ('earning', 'Earning'),
+        ('adjustment', 'Adjustment'),
+    ]
+
+    posting = models.CharField(max_length=26, db_index=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="ledger_entries"
+    )
+    account = models.CharField(max_length=20, choices=ACCOUNT_CHOICES)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    amount = models.DecimalField(max_digits=20, decimal_places=2)
+    reference = models.CharField(max_length=100, blank=True)
+    memo = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Ledger Entry'
+        verbose_name_plural = 'Ledger Entries'
+        indexes = [
+            # Current balance: latest snapshot, then the user's entries after it
+            models.Index(fields=['user', 'id'], name='ledger_user_tail_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.posting} {self.account} {self.amount}"
+
+
+class BalanceSnapshot(models.Model):
+    """
+    A user's balance and profit as derived from the ledger up to and
+    including entry last_entry_id.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="balance_snapshots"
+    )
+    balance = models.DecimalField(max_digits=20, decimal_places=2)
+    profit = models.DecimalField(max_digits=20, decimal_places=2)
+    last_entry_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Balance Snapshot'
+        verbose_name_plural = 'Balance Snapshots'
+        indexes = [
+            models.Index(fields=['user', '-last_entry_id'], name='snapshot_user_latest_idx'),
+            models.Index(fields=['last_entry_id'], name='snapshot_entry_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} @ {self.last_entry_id}"
+
 
 class Ticket(models.Model):
     user = models.ForeignKey(
@@ -1195,6 +1385,20 @@ class News(models.Model):
         default=False,
         help_text="Mark as featured article"
     )
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        editable=False,
+        help_text="Hash of the normalized article fields, used to skip unchanged articles on ingest"
+    )
+    title_key = models.CharField(
+        max_length=255,
+        blank=True,
+        db_index=True,
+        editable=False,
+        help_text="Normalized title that identifies the article on ingest"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -1202,9 +1406,23 @@ class News(models.Model):
         verbose_name = "News Article"
         verbose_name_plural = "News Articles"
         ordering = ["-published_at"]
+        indexes = [
+            models.Index(fields=['is_featured', '-published_at'], name='news_featured_published_idx'),
+            models.Index(fields=['category', '-published_at'], name='news_category_published_idx'),
+            models.Index(fields=['title'], name='news_title_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.category}"
+
+    def save(self, *args, **kwargs):
+        from .news_ingest import news_content_hash, news_title_key
+        self.title_key = news_title_key(self.title)
+        self.content_hash = news_content_hash(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'title_key', 'content_hash'}
+        super().save(*args, **kwargs)
     
 
 
@@ -1235,16 +1453,44 @@ class Notification(models.Model):
         choices=TYPE_CHOICES,
         help_text="Type of notification"
     )
+    # Rendered text is only stored for notifications without a template
     title = models.CharField(
         max_length=255,
+        blank=True,
+        default='',
         help_text="Notification title"
     )
     message = models.TextField(
+        blank=True,
+        default='',
         help_text="Short notification message"
     )
     full_details = models.TextField(
+        blank=True,
+        default='',
         help_text="Full notification details/description"
     )
+    template_key = models.CharField(
+        max_length=50,
+        blank=True,
+        default='',
+        help_text="Key in notification_templates.TEMPLATES used to render this notification"
+    )
+    source = models.CharField(
+        max_length=100,
+        blank=True,
+        default='',
+        help_text="Origin of the event (e.g. orders, copy_trader:12); unread notifications from the same source are coalesced"
+    )
+    count = models.PositiveIntegerField(
+        default=1,
+        help_text="Number of events coalesced into this notification"
+    )
+    params = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Values substituted into the template"
+    )
     # priority = models.CharField(
     #     max_length=10,
     #     choices=PRIORITY_CHOICES,
@@ -1273,14 +1519,154 @@ class Notification(models.Model):
         verbose_name_plural = "Notifications"
         ordering = ["-created_at"]
         indexes = [
-            models.Index(fields=['user', '-created_at']),
+            # Keyset pagination order for list_notifications
+            models.Index(fields=['user', '-created_at', '-id'], name='notif_user_created_id_idx'),
+            # Finding a recent notification to coalesce into
+            models.Index(fields=['user', 'source', '-created_at'], name='notif_user_source_idx'),
+            models.Index(fields=['user', 'updated_at'], name='notif_user_updated_idx'),
             models.Index(fields=['user', 'read']),
             models.Index(fields=['type']),
         ]
     
     def __str__(self):
-        return f"{self.user.email} - {self.type} - {self.title}"
-    
+        from .notification_templates import render_notification
+        return f"{self.user.email} - {self.type} - {render_notification(self)['title']}"
+
+
+class BroadcastNotification(models.Model):
+    """
+    Platform-wide announcement stored once and shown to every user who joined
+    before it was sent. Read state is the user's broadcasts_read_at mark plus
+    BroadcastRead rows for broadcasts read individually after that mark.
+    """
+    TYPE_CHOICES = [
+        ('system', 'System'),
+        ('news', 'News'),
+        ('alert', 'Alert'),
+    ]
+
+    type = models.CharField(
+        max_length=20,
+        choices=TYPE_CHOICES,
+        default='system',
+        help_text="Type of notification"
+    )
+    title = models.CharField(
+        max_length=255,
+        help_text="Notification title"
+    )
+    message = models.TextField(
+        help_text="Short notification message"
+    )
+    full_details = models.TextField(
+        blank=True,
+        help_text="Full notification details/description"
+    )
+    metadata = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Additional metadata"
+    )
+    is_active = models.BooleanField(
+        default=True,
+        help_text="Inactive broadcasts are hidden from everyone"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="When the broadcast was sent"
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = "Broadcast Notification"
+        verbose_name_plural = "Broadcast Notifications"
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=['is_active', '-created_at'], name='broadcast_active_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.type} - {self.title}"
+
+
+class BroadcastRead(models.Model):
+    """A broadcast one user read individually, newer than their read mark"""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='broadcast_reads'
+    )
+    broadcast = models.ForeignKey(
+        BroadcastNotification,
+        on_delete=models.CASCADE,
+        related_name='reads'
+    )
+    read_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['user', 'broadcast']
+
+    def __str__(self):
+        return f"{self.user.email} read {self.broadcast_id}"
+
+
+class SyncTombstone(models.Model):
+    """
+    Records a deleted row so delta sync clients can drop it.
+    Scoped to a user, or for copy trades to the trader whose copiers see it.
+    """
+    KIND_CHOICES = [
+        ('notification', 'Notification'),
+        ('position', 'Stock Position'),
+        ('transaction', 'Transaction'),
+        ('copy_trade', 'Copy Trade'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    user_id = models.BigIntegerField(null=True, blank=True)
+    trader_id = models.BigIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_id', 'deleted_at'], name='tombstone_user_idx'),
+            models.Index(fields=['trader_id', 'deleted_at'], name='tombstone_trader_idx'),
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} deleted"
+
+
+class NotificationArchive(models.Model):
+    """
+    A chunk of old read notifications moved out of the live table by
+    `compact_tables`, stored as zlib-compressed JSON lines.
+    """
+    first_id = models.BigIntegerField(help_text="Lowest notification id in the chunk")
+    last_id = models.BigIntegerField(help_text="Highest notification id in the chunk")
+    row_count = models.PositiveIntegerField()
+    oldest_created_at = models.DateTimeField()
+    newest_created_at = models.DateTimeField()
+    payload = models.BinaryField(help_text="zlib-compressed JSONL, one notification per line")
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Notification Archive"
+        verbose_name_plural = "Notification Archives"
+        ordering = ["-archived_at"]
+
+    def __str__(self):
+        return f"Notifications {self.first_id}-{self.last_id} ({self.row_count})"
+
+    def rows(self):
+        """Decompress the archived notifications as dicts"""
+        import json
+        import zlib
+        return [json.loads(line) for line in zlib.decompress(self.payload).decode().splitlines()]
 
 
 # ADD THIS TO YOUR EXISTING models.py FILE AT THE END
@@ -1441,6 +1827,7 @@ class UserStockPosition(models.Model):
     is_active = models.BooleanField(default=True)
     opened_at = models.DateTimeField(auto_now_add=True)
     closed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "User Stock Position"
@@ -1448,6 +1835,7 @@ class UserStockPosition(models.Model):
         ordering = ["-opened_at"]
         indexes = [
             models.Index(fields=['user', 'stock', 'is_active']),
+            models.Index(fields=['user', 'updated_at'], name='position_user_updated_idx'),
         ]
     
     def __str__(self):
@@ -1696,6 +2084,10 @@ class Signal(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Trading Signal'
         verbose_name_plural = 'Trading Signals'
+        indexes = [
+            # Expiry sweep and live-signal filtering
+            models.Index(fields=['is_active', 'expires_at'], name='signal_active_expires_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - ${self.price}"
@@ -1708,6 +2100,23 @@ class Signal(models.Model):
         return False
 
 
+class SignalSnapshot(models.Model):
+    """
+    A signal's content as sold, stored once per distinct version and shared
+    by every purchase of that version. Keyed by the SHA-256 of its JSON.
+    """
+    hash = models.CharField(max_length=64, primary_key=True)
+    data = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Signal Snapshot'
+        verbose_name_plural = 'Signal Snapshots'
+
+    def __str__(self):
+        return self.hash[:12]
+
+
 class UserSignalPurchase(models.Model):
     """
     Track user purchases of signals
@@ -1720,7 +2129,19 @@ class UserSignalPurchase(models.Model):
     purchase_reference = models.CharField(max_length=50, unique=True)
     
     # Signal Snapshot (in case signal is updated after purchase)
-    signal_data = models.JSONField(help_text="Snapshot of signal data at purchase time")
+    snapshot = models.ForeignKey(
+        SignalSnapshot,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='purchases',
+        help_text="Signal content at purchase time, shared with other buyers of the same version"
+    )
+    signal_data = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="Legacy inline snapshot, moved into shared snapshots by migration 0011"
+    )
     
     # Timestamps
     purchased_at = models.DateTimeField(auto_now_add=True)
@@ -1735,6 +2156,112 @@ class UserSignalPurchase(models.Model):
     def __str__(self):
         return f"{self.user.email} - {self.signal.name} - ${self.amount_paid}"
 
+    @property
+    def snapshot_data(self):
+        return self.snapshot.data if self.snapshot_id else self.signal_data
+
+
+
+# SYMBOL SEARCH INDEX
+
+@receiver(post_save, sender=Stock)
+def index_stock(sender, instance, **kwargs):
+    from .symbol_index import symbol_index
+    symbol_index.stock_saved(instance)
+
+
+@receiver(post_delete, sender=Stock)
+def unindex_stock(sender, instance, **kwargs):
+    from .symbol_index import symbol_index
+    symbol_index.stock_deleted(instance)
+
+
+@receiver(post_save, sender=Asset)
+def index_asset(sender, instance, **kwargs):
+    from .symbol_index import symbol_index
+    symbol_index.asset_saved(instance)
+
+
+@receiver(post_delete, sender=Asset)
+def unindex_asset(sender, instance, **kwargs):
+    from .symbol_index import symbol_index
+    symbol_index.asset_deleted(instance)
+
+
+# REAL-TIME UPDATES
+
+@receiver(post_save, sender=Stock)
+def push_stock_price(sender, instance, **kwargs):
+    """Push price changes to connected streaming clients"""
+    from .realtime import publish_price
+    publish_price(instance)
+
+
+@receiver(post_save, sender=Account)
+def push_user_balance(sender, instance, created=False, update_fields=None, **kwargs):
+    """Push balance/profit changes to the user's streaming connections"""
+    if created:
+        return
+    if update_fields is not None and not {'balance', 'profit'} & set(update_fields):
+        return
+    from .realtime import publish_balance
+    publish_balance(instance)
+
+
+@receiver(post_save, sender=Account)
+def expire_portfolio_summary(sender, instance, created=False, update_fields=None, **kwargs):
+    """Drop the cached portfolio summary once the user's money changes"""
+    if created:
+        return
+    if update_fields is not None and not {'balance', 'profit'} & set(update_fields):
+        return
+    from django.core.cache import cache
+    from .portfolio_views import portfolio_summary_cache_key
+    cache.delete(portfolio_summary_cache_key(instance.pk))
+
+
+# SIGNAL CATALOG CACHE
+
+@receiver(post_save, sender=Signal)
+@receiver(post_delete, sender=Signal)
+def expire_signal_catalog(sender, **kwargs):
+    from .signal_views import invalidate_signal_catalog
+    invalidate_signal_catalog()
+
+
+@receiver(post_save, sender=UserSignalPurchase)
+@receiver(post_delete, sender=UserSignalPurchase)
+def expire_signal_purchases(sender, instance, **kwargs):
+    from django.core.cache import cache
+    from django.db import transaction
+    from .signal_views import signal_purchases_cache_key
+    # After commit, so a concurrent read can't re-cache the pre-purchase set
+    key = signal_purchases_cache_key(instance.user_id)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
 
 
 
@@ -1916,24 +2443,71 @@ class UserSignalPurchase(models.Model):
 
 
 
+# NOTIFICATION COUNTERS
 
+@receiver(post_save, sender=Notification)
+def count_new_notification(sender, instance, created=False, **kwargs):
+    if created and not instance.read:
+        from .notification_service import adjust_unread_count
+        adjust_unread_count(instance.user_id, 1)
 
 
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_notification(sender, instance, **kwargs):
+    if not instance.read:
+        from .notification_service import adjust_unread_count
+        adjust_unread_count(instance.user_id, -1)
 
 
+@receiver(post_save, sender=BroadcastNotification)
+@receiver(post_delete, sender=BroadcastNotification)
+def expire_broadcast_cache(sender, **kwargs):
+    from .notification_service import invalidate_broadcasts
+    invalidate_broadcasts()
 
 
+# DELTA SYNC TOMBSTONES
 
+@receiver(post_delete, sender=Notification)
+def tombstone_notification(sender, instance, **kwargs):
+    from .sync import record_deletion
+    record_deletion('notification', instance.pk, user_id=instance.user_id)
 
 
+@receiver(post_delete, sender=UserStockPosition)
+def tombstone_position(sender, instance, **kwargs):
+    from .sync import record_deletion
+    record_deletion('position', instance.pk, user_id=instance.user_id)
 
 
+@receiver(post_delete, sender=Transaction)
+def tombstone_transaction(sender, instance, **kwargs):
+    from .sync import record_deletion
+    record_deletion('transaction', instance.pk, user_id=instance.user_id)
 
 
+@receiver(post_delete, sender=UserCopyTraderHistory)
+def tombstone_copy_trade(sender, instance, **kwargs):
+    from .sync import record_deletion
+    record_deletion('copy_trade', instance.pk, trader_id=instance.trader_id)
 
 
+# NEWS SEARCH INDEX
 
+@receiver(post_save, sender=News)
+def index_news(sender, instance, **kwargs):
+    from .news_search import index_articles
+    index_articles([instance])
 
 
+@receiver(post_delete, sender=News)
+def unindex_news(sender, instance, **kwargs):
+    from .news_search import remove_articles
+    remove_articles([instance.pk])
 
 
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def expire_news_pages(sender, **kwargs):
+    from .news_views import invalidate_news_pages
+    invalidate_news_pages()
@@ -0,0 +1,204 @@
+"""
+Full-text search over news articles.
+
+One interface, picked by database vendor:
+
+* SQLite (dev): an FTS5 table `app_news_fts` keyed by article id, kept in
+  step with app_news by the News post_save / post_delete hooks in models.py.
+* PostgreSQL (prod): a stored generated `search_vector` tsvector column on
+  app_news with a GIN index, so the database keeps it current on every write.
+* Anything else falls back to icontains, the old behaviour.
+
+search() returns ranked (id, snippet) hits a page at a time; the caller loads
+whichever article columns it needs for those ids.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import News
+
+FTS_TABLE = "app_news_fts"
+
+# Highlight markers placed around matched terms in snippets
+SNIPPET_START = "<mark>"
+SNIPPET_END = "</mark>"
+SNIPPET_ELLIPSIS = "…"
+SNIPPET_WORDS = 24
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _terms(query):
+    return _TERM_RE.findall(query.lower())
+
+
+class SqliteFTSBackend:
+    # bm25 column weights: title, summary, content
+    WEIGHTS = (10.0, 4.0, 1.0)
+
+    def available(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE]
+            )
+            return cursor.fetchone() is not None
+
+    @staticmethod
+    def _match(terms):
+        # Quote every term so user input can't inject FTS syntax; the last
+        # term is a prefix so results follow the user as they type
+        quoted = ['"%s"' % term for term in terms]
+        quoted[-1] += "*"
+        return " ".join(quoted)
+
+    def search(self, query, category="", limit=20, offset=0):
+        terms = _terms(query)
+        if not terms:
+            return []
+        sql = (
+            f"SELECT {FTS_TABLE}.rowid, "
+            f"snippet({FTS_TABLE}, -1, %s, %s, %s, %s) "
+            f"FROM {FTS_TABLE} "
+        )
+        params = [SNIPPET_START, SNIPPET_END, SNIPPET_ELLIPSIS, SNIPPET_WORDS]
+        where = f"WHERE {FTS_TABLE} MATCH %s "
+        params.append(self._match(terms))
+        if category:
+            sql += f"JOIN app_news ON app_news.id = {FTS_TABLE}.rowid "
+            where += "AND app_news.category = %s "
+            params.append(category)
+        sql += where + f"ORDER BY bm25({FTS_TABLE}, %s, %s, %s) LIMIT %s OFFSET %s"
+        params += [*self.WEIGHTS, limit, offset]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def index(self, articles):
+        """Add or replace the given articles in the FTS table"""
+        rows = [(a.id, a.title, a.summary, a.content) for a in articles]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, summary, content) VALUES (%s, %s, %s, %s)",
+                rows,
+            )
+
+    def remove(self, article_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(i,) for i in article_ids])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, summary, content) "
+                f"SELECT id, title, summary, content FROM app_news"
+            )
+
+
+class PostgresFTSBackend:
+    CONFIG = "english"
+
+    def available(self):
+        return True
+
+    def search(self, query, category="", limit=20, offset=0):
+        if not _terms(query):
+            return []
+        options = (
+            f"StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, "
+            f"FragmentDelimiter={SNIPPET_ELLIPSIS}, MaxFragments=2, MaxWords={SNIPPET_WORDS}, MinWords=8"
+        )
+        # Rank and page in the inner query so ts_headline only runs on the page returned
+        sql = (
+            "SELECT id, ts_headline(%s, content, q, %s) FROM ("
+            "SELECT id, content, q, ts_rank_cd(search_vector, q) AS rank, published_at "
+            "FROM app_news, websearch_to_tsquery(%s, %s) q "
+            "WHERE search_vector @@ q "
+            + ("AND category = %s " if category else "")
+            + "ORDER BY rank DESC, published_at DESC LIMIT %s OFFSET %s"
+            ") hits ORDER BY rank DESC, published_at DESC"
+        )
+        params = [self.CONFIG, options, self.CONFIG, query]
+        if category:
+            params.append(category)
+        params += [limit, offset]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    # The generated column is maintained by PostgreSQL itself
+    def index(self, articles):
+        pass
+
+    def remove(self, article_ids):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class FallbackBackend:
+    """icontains search for databases without a full-text backend"""
+
+    def available(self):
+        return True
+
+    def search(self, query, category="", limit=20, offset=0):
+        queryset = News.objects.all()
+        for term in _terms(query):
+            queryset = queryset.filter(
+                Q(title__icontains=term) | Q(summary__icontains=term) | Q(content__icontains=term)
+            )
+        if category:
+            queryset = queryset.filter(category=category)
+        rows = queryset.order_by("-published_at").values_list("id", "summary")[offset:offset + limit]
+        return list(rows)
+
+    def index(self, articles):
+        pass
+
+    def remove(self, article_ids):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+_backend = None
+
+
+def get_backend():
+    """The search backend for the default database, falling back when the FTS table is missing"""
+    global _backend
+    if _backend is None:
+        if connection.vendor == "postgresql":
+            backend = PostgresFTSBackend()
+        elif connection.vendor == "sqlite":
+            backend = SqliteFTSBackend()
+        else:
+            backend = FallbackBackend()
+        _backend = backend if backend.available() else FallbackBackend()
+    return _backend
+
+
+def search_news(query, category="", limit=20, offset=0):
+    """Return [(article_id, snippet)] for one page of ranked matches"""
+    return get_backend().search(query, category, limit, offset)
+
+
+def index_articles(articles):
+    get_backend().index(articles)
+
+
+def remove_articles(article_ids):
+    get_backend().remove(article_ids)
+
+
+def rebuild_index():
+    get_backend().rebuild()
@@ -1,61 +1,153 @@
+import hashlib
+
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from rest_framework import status
 from .models import News
+from .news_search import search_news
+from .pagination import InvalidCursor, keyset_page
+
+
+NEWS_PAGE_SIZE = 20
+MAX_NEWS_PAGE_SIZE = 50
+
+# Featured first on the main feed; a category page is newest first
+NEWS_ORDERING = ('-is_featured', '-published_at', '-id')
+CATEGORY_NEWS_ORDERING = ('-published_at', '-id')
+
+# List columns; full content is only loaded by news_detail
+NEWS_LIST_FIELDS = (
+    'id', 'title', 'summary', 'category', 'source', 'author', 'published_at',
+    'image', 'tags', 'is_featured',
+)
+
+# Seconds a rendered list page is reused, server side and by HTTP caches
+NEWS_PAGE_TTL = 60
+NEWS_VERSION_CACHE_KEY = "news_list:version"
+
+
+def news_list_version():
+    return cache.get_or_set(NEWS_VERSION_CACHE_KEY, 1, None)
+
+
+def invalidate_news_pages():
+    """Retire every cached list page by moving to a new version"""
+    try:
+        cache.incr(NEWS_VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(NEWS_VERSION_CACHE_KEY, 1, None)
+
+
+def _article_summary(article):
+    image_url = None
+    if article.image:
+        image_url = article.image.url
+
+    return {
+        "id": article.id,
+        "title": article.title,
+        "summary": article.summary,
+        "category": article.category,
+        "source": article.source,
+        "author": article.author,
+        "published_at": article.published_at.isoformat(),
+        "image_url": image_url,
+        "tags": article.tags,
+        "is_featured": article.is_featured,
+    }
+
+
+def _page_size(request):
+    try:
+        return min(max(int(request.GET.get('limit', NEWS_PAGE_SIZE)), 1), MAX_NEWS_PAGE_SIZE)
+    except ValueError:
+        return NEWS_PAGE_SIZE
+
+
+def _search_page(search_query, category, page, limit):
+    """
+    One page of ranked search hits. Each result carries a highlighted
+    snippet alongside the summary.
+    """
+    hits = search_news(search_query, category, limit + 1, (page - 1) * limit)
+    has_more = len(hits) > limit
+    hits = hits[:limit]
+    articles = News.objects.only(*NEWS_LIST_FIELDS).in_bulk([article_id for article_id, _ in hits])
+
+    results = [
+        {**_article_summary(articles[article_id]), "snippet": snippet}
+        for article_id, snippet in hits
+        if article_id in articles
+    ]
+    return {
+        "success": True,
+        "news": results,
+        "page": page,
+        "has_more": has_more,
+    }
+
+
+def _feed_page(category, cursor, limit):
+    queryset = News.objects.only(*NEWS_LIST_FIELDS)
+    ordering = NEWS_ORDERING
+    if category:
+        queryset = queryset.filter(category=category)
+        ordering = CATEGORY_NEWS_ORDERING
+
+    articles, next_cursor = keyset_page(queryset, ordering, cursor, limit)
+    return {
+        "success": True,
+        "news": [_article_summary(article) for article in articles],
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
+    }
 
 
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def list_news(request):
     """
-    Get list of news articles with optional filtering by category and search
+    Get a page of news summaries with optional filtering by category and search.
+    Pages by cursor: pass the returned next_cursor as ?cursor= for the next page.
+    With ?search= results are ranked by relevance and paged with ?page= instead.
+    Full article content comes from news_detail.
     """
     # Get query parameters
     category = request.GET.get('category', '').strip()
     search_query = request.GET.get('search', '').strip()
+    cursor = request.GET.get('cursor', '').strip()
+    limit = _page_size(request)
 
-    # Start with all news
-    news_query = News.objects.filter().order_by('-is_featured', '-published_at')
-
-    # Apply category filter
-    if category:
-        news_query = news_query.filter(category=category)
-
-    # Apply search filter
     if search_query:
-        news_query = news_query.filter(
-            title__icontains=search_query
-        ) | news_query.filter(
-            summary__icontains=search_query
-        ) | news_query.filter(
-            content__icontains=search_query
-        )
-
-    # Serialize news articles
-    news_list = []
-    for article in news_query:
-        # Get image URL from Cloudinary field
-        image_url = None
-        if article.image:
-            image_url = article.image.url
-
-        news_list.append({
-            "id": article.id,
-            "title": article.title,
-            "summary": article.summary,
-            "content": article.content,
-            "category": article.category,
-            "source": article.source,
-            "author": article.author,
-            "published_at": article.published_at.isoformat(),
-            "image_url": image_url,
-            "tags": article.tags,
-            "is_featured": article.is_featured,
-            "created_at": article.created_at.isoformat(),
-            "updated_at": article.updated_at.isoformat(),
-        })
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            page = 1
+        query_hash = hashlib.sha1(search_query.lower().encode()).hexdigest()
+        key = f"news_search:{news_list_version()}:{category}:{page}:{limit}:{query_hash}"
+    else:
+        key = f"news_list:{news_list_version()}:{category}:{cursor}:{limit}"
+
+    data = cache.get(key)
+    if data is None:
+        try:
+            if search_query:
+                data = _search_page(search_query, category, page, limit)
+            else:
+                data = _feed_page(category, cursor, limit)
+        except InvalidCursor as e:
+            return Response({
+                "success": False,
+                "error": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        cache.set(key, data, NEWS_PAGE_TTL)
 
-    return Response(news_list)
+    response = Response(data)
+    patch_cache_control(response, public=True, max_age=NEWS_PAGE_TTL)
+    return response
 
 
 @api_view(["GET"])
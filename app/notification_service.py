@@ -0,0 +1,392 @@
+"""
+Notification service.
+
+notify() / notify_many() render a template from notification_templates and
+queue the rows. Inside a transaction the queue is flushed with one bulk INSERT
+when the transaction commits (and dropped if it rolls back); in autocommit
+code the rows are written straight away. Jobs that fan out to many users
+should run inside transaction.atomic() or use notify_many().
+
+Each user also carries a denormalized unread counter so the header dropdown
+never has to COUNT(*) the notification table. The counter is only ever
+changed with relative UPDATEs here; `recount_unread_notifications` rebuilds
+it from the notification rows if it ever drifts.
+
+Notifications given a `source` are coalesced: another unread notification
+with the same (user, type, source) inside NOTIFICATION_COALESCE_WINDOW
+seconds is folded into the existing row, which keeps a running count.
+
+Platform-wide announcements are single BroadcastNotification rows merged into
+each user's feed at read time, so sending one costs one INSERT.
+"""
+
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .batching import buffer_until_commit
+from .models import Account, BroadcastNotification, BroadcastRead, Notification
+from .notification_templates import TEMPLATES, render_notification
+from .pagination import InvalidCursor, decode_raw_cursor, encode_cursor
+
+# Rows per INSERT statement when flushing
+NOTIFICATION_BATCH_SIZE = 500
+
+NOTIFICATION_ORDERING = ('-created_at', '-id')
+
+# Per-event metadata kept on a coalesced notification
+COALESCE_MAX_EVENTS = 20
+
+BROADCASTS_CACHE_KEY = "broadcasts:active"
+# Local saves invalidate immediately; other processes pick changes up within this
+BROADCASTS_CACHE_TTL = 60
+
+# Feed entries sort newest first on (created_at, source, id)
+SOURCE_PERSONAL = 0
+SOURCE_BROADCAST = 1
+
+
+def _plain(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _build(user, template, params, metadata, source=''):
+    # Only the template key and params are stored; text is rendered on read
+    return Notification(
+        user_id=getattr(user, 'pk', user),
+        type=TEMPLATES[template]["type"],
+        source=source,
+        template_key=template,
+        params={key: _plain(value) for key, value in (params or {}).items()},
+        metadata=metadata or {},
+    )
+
+
+def coalesce_window():
+    """Seconds within which same-source notifications merge; 0 disables coalescing"""
+    return getattr(settings, 'NOTIFICATION_COALESCE_WINDOW', 300)
+
+
+def _coalesce_key(notification):
+    return (notification.user_id, notification.type, notification.source)
+
+
+def _merge(target, incoming):
+    """Fold incoming into target: latest text and metadata, summed count, event history"""
+    events = target.metadata.get('events') if target.count > 1 else None
+    events = (events or [target.metadata]) + [incoming.metadata]
+    target.count += incoming.count
+    target.template_key = incoming.template_key
+    target.params = incoming.params
+    target.metadata = {
+        **incoming.metadata,
+        'count': target.count,
+        'events': events[-COALESCE_MAX_EVENTS:],
+    }
+
+
+def _coalesce(notifications):
+    """
+    Merge same-source notifications with each other and with recent unread
+    rows. Returns (new rows to insert, existing rows to update). Must run in
+    a transaction: the rows merged into stay locked until it commits.
+    """
+    window = coalesce_window()
+    if window <= 0 or not any(n.source for n in notifications):
+        return notifications, []
+
+    fresh = []
+    pending = {}
+    for notification in notifications:
+        if not notification.source:
+            fresh.append(notification)
+        elif _coalesce_key(notification) in pending:
+            _merge(pending[_coalesce_key(notification)], notification)
+        else:
+            pending[_coalesce_key(notification)] = notification
+
+    now = timezone.now()
+    existing = {}
+    # Locked so a concurrent flush can't merge into the same row from a stale
+    # count, and a row marked read meanwhile drops out of the match
+    recent = Notification.objects.select_for_update().filter(
+        user_id__in={key[0] for key in pending},
+        source__in={key[2] for key in pending},
+        read=False,
+        created_at__gte=now - timedelta(seconds=window),
+    ).order_by('created_at', 'id').only('id', 'user_id', 'type', 'source', 'count', 'metadata')
+    for row in recent:
+        # Later rows overwrite earlier ones, so the newest match wins
+        existing[_coalesce_key(row)] = row
+
+    updated = []
+    for key, notification in pending.items():
+        row = existing.get(key)
+        if row is None:
+            fresh.append(notification)
+            continue
+        _merge(row, notification)
+        # Move the summary back to the top of the feed
+        row.created_at = row.updated_at = now
+        updated.append(row)
+    return fresh, updated
+
+
+def _write(notifications):
+    if not notifications:
+        return
+    with transaction.atomic():
+        notifications, coalesced = _coalesce(notifications)
+        if coalesced:
+            Notification.objects.bulk_update(
+                coalesced,
+                ['template_key', 'params', 'metadata', 'count', 'created_at', 'updated_at'],
+                batch_size=NOTIFICATION_BATCH_SIZE,
+            )
+        if not notifications:
+            return
+        Notification.objects.bulk_create(notifications, batch_size=NOTIFICATION_BATCH_SIZE)
+        # bulk_create skips post_save, so count the new unread rows here:
+        # one UPDATE per distinct per-user count rather than one per user
+        users_by_count = defaultdict(list)
+        for user_id, count in Counter(n.user_id for n in notifications if not n.read).items():
+            users_by_count[count].append(user_id)
+        for count, user_ids in users_by_count.items():
+            Account.objects.filter(pk__in=user_ids).update(
+                unread_notification_count=F('unread_notification_count') + count
+            )
+
+
+def _enqueue(notifications):
+    buffer_until_commit(_write, notifications)
+
+
+def notify(user, template, params=None, metadata=None, source=''):
+    """
+    Queue one notification for a user (or user id) from a named template.
+    Give a source (e.g. "orders") to coalesce bursts from the same origin.
+    """
+    _enqueue([_build(user, template, params, metadata, source)])
+
+
+def notify_many(users, template, params=None, metadata=None, per_user=None, source=''):
+    """
+    Queue the same template for many users, written in one bulk INSERT.
+    per_user maps user id -> params merged over the shared params.
+    """
+    per_user = per_user or {}
+    notifications = []
+    for user in users:
+        user_id = getattr(user, 'pk', user)
+        notifications.append(_build(
+            user_id, template, {**(params or {}), **per_user.get(user_id, {})}, metadata, source
+        ))
+    _enqueue(notifications)
+
+
+def adjust_unread_count(user_id, delta):
+    """Add delta (may be negative) to a user's unread counter, never below zero"""
+    if not delta:
+        return
+    Account.objects.filter(pk=user_id).update(
+        unread_notification_count=Greatest(F('unread_notification_count') + delta, Value(0))
+    )
+
+
+def mark_read(user, notification_id):
+    """
+    Mark one notification read. Returns False if it doesn't belong to the user.
+    Only an actual unread -> read transition touches the counter.
+    """
+    changed = Notification.objects.filter(
+        id=notification_id, user=user, read=False
+    ).update(read=True, updated_at=timezone.now())
+    if changed:
+        adjust_unread_count(user.pk, -changed)
+        return True
+    return Notification.objects.filter(id=notification_id, user=user).exists()
+
+
+def mark_all_read(user):
+    """Mark every unread notification and broadcast read and return how many changed"""
+    changed = Notification.objects.filter(user=user, read=False).update(
+        read=True, updated_at=timezone.now()
+    )
+    # Subtract rather than zero out so a notification created concurrently still counts
+    adjust_unread_count(user.pk, -changed)
+
+    broadcasts = visible_broadcasts(user)
+    unread_broadcasts = len(broadcasts) - len(broadcast_read_ids(user, broadcasts))
+    if broadcasts:
+        # Move the mark past everything and drop the now redundant sparse reads
+        now = timezone.now()
+        Account.objects.filter(pk=user.pk).update(broadcasts_read_at=now)
+        BroadcastRead.objects.filter(user=user).delete()
+        user.get_account().broadcasts_read_at = now
+    return changed + unread_broadcasts
+
+
+def recount_unread(users=None):
+    """Rebuild unread counters from the notification table; returns rows updated"""
+    unread = Notification.objects.filter(
+        user=OuterRef('pk'), read=False
+    ).order_by().values('user').annotate(total=Count('id')).values('total')
+    queryset = Account.objects.all() if users is None else Account.objects.filter(user__in=users)
+    return queryset.update(
+        unread_notification_count=Coalesce(Subquery(unread), Value(0))
+    )
+
+
+# -- broadcasts -------------------------------------------------------------
+
+def active_broadcasts():
+    """Active broadcasts, newest first, as plain dicts"""
+    broadcasts = cache.get(BROADCASTS_CACHE_KEY)
+    if broadcasts is None:
+        broadcasts = list(
+            BroadcastNotification.objects.filter(is_active=True)
+            .order_by(*NOTIFICATION_ORDERING)
+            .values('id', 'type', 'title', 'message', 'full_details', 'metadata', 'created_at')
+        )
+        cache.set(BROADCASTS_CACHE_KEY, broadcasts, BROADCASTS_CACHE_TTL)
+    return broadcasts
+
+
+def invalidate_broadcasts():
+    cache.delete(BROADCASTS_CACHE_KEY)
+
+
+def visible_broadcasts(user):
+    """Broadcasts sent since the user joined"""
+    return [b for b in active_broadcasts() if b['created_at'] >= user.date_joined]
+
+
+def broadcast_read_ids(user, broadcasts):
+    """
+    Ids of the given broadcasts the user has read: everything up to their
+    read mark, plus sparse reads after it. Only queries when some broadcast
+    is newer than the mark.
+    """
+    mark = user.broadcasts_read_at or user.date_joined
+    read = {b['id'] for b in broadcasts if b['created_at'] <= mark}
+    newer = [b['id'] for b in broadcasts if b['created_at'] > mark]
+    if newer:
+        read.update(BroadcastRead.objects.filter(
+            user=user, broadcast_id__in=newer
+        ).values_list('broadcast_id', flat=True))
+    return read
+
+
+def mark_broadcast_read(user, broadcast_id):
+    """Mark one broadcast read. Returns False if the user can't see it."""
+    broadcast = next((b for b in visible_broadcasts(user) if b['id'] == broadcast_id), None)
+    if broadcast is None:
+        return False
+    mark = user.broadcasts_read_at or user.date_joined
+    if broadcast['created_at'] > mark:
+        BroadcastRead.objects.bulk_create(
+            [BroadcastRead(user=user, broadcast_id=broadcast_id)], ignore_conflicts=True
+        )
+    return True
+
+
+def _feed_key(entry):
+    return (entry['created_at'], entry['source'], entry['id'])
+
+
+def _decode_feed_cursor(cursor):
+    created_at, source, entry_id = decode_raw_cursor(cursor, 3)
+    try:
+        created_at = parse_datetime(created_at) if isinstance(created_at, str) else None
+    except ValueError:
+        # Well-formed but impossible, e.g. month 13
+        raise InvalidCursor("Invalid cursor")
+    if created_at is None or source not in (SOURCE_PERSONAL, SOURCE_BROADCAST) or not isinstance(entry_id, int):
+        raise InvalidCursor("Invalid cursor")
+    if timezone.is_naive(created_at):
+        created_at = timezone.make_aware(created_at)
+    return created_at, source, entry_id
+
+
+def notification_total(user, notification_type=""):
+    """Personal notifications plus visible broadcasts, optionally of one type"""
+    personal = Notification.objects.filter(user=user)
+    broadcasts = visible_broadcasts(user)
+    if notification_type:
+        personal = personal.filter(type=notification_type)
+        broadcasts = [b for b in broadcasts if b['type'] == notification_type]
+    return personal.count() + len(broadcasts)
+
+
+def notification_feed(user, notification_type="", cursor=None, limit=20, offset=0):
+    """
+    One page of the user's personal notifications merged with broadcasts.
+    Returns (entries, next_cursor, unread_count); each entry is a dict with
+    the notification fields plus "source" and "read". offset skips entries
+    for clients still paging by offset (capped by the caller); it is ignored
+    with a cursor.
+    Raises InvalidCursor when the cursor can't be decoded.
+    """
+    broadcasts = visible_broadcasts(user)
+    read_ids = broadcast_read_ids(user, broadcasts)
+    unread_count = user.unread_notification_count + len(broadcasts) - len(read_ids)
+
+    personal = Notification.objects.filter(user=user)
+    if notification_type:
+        personal = personal.filter(type=notification_type)
+        broadcasts = [b for b in broadcasts if b['type'] == notification_type]
+
+    if cursor:
+        after = _decode_feed_cursor(cursor)
+        created_at, source, entry_id = after
+        if source == SOURCE_BROADCAST:
+            # Personal rows sort after broadcasts with the same timestamp
+            personal = personal.filter(created_at__lte=created_at)
+        else:
+            personal = personal.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=entry_id)
+            )
+        broadcasts = [b for b in broadcasts if (b['created_at'], SOURCE_BROADCAST, b['id']) < after]
+        offset = 0
+
+    # Only the sort keys of the candidate rows are loaded; the rows on the
+    # returned page are fetched and rendered afterwards
+    entries = [
+        {'id': entry_id, 'created_at': created_at, 'source': SOURCE_PERSONAL}
+        for created_at, entry_id in personal.order_by(*NOTIFICATION_ORDERING)
+        .values_list('created_at', 'id')[:offset + limit + 1]
+    ]
+    entries += [
+        {**b, 'count': 1, 'read': b['id'] in read_ids, 'source': SOURCE_BROADCAST}
+        for b in broadcasts[:offset + limit + 1]
+    ]
+    entries.sort(key=_feed_key, reverse=True)
+    entries = entries[offset:]
+
+    next_cursor = None
+    if len(entries) > limit:
+        entries = entries[:limit]
+        next_cursor = encode_cursor(_feed_key(entries[-1]))
+
+    page_ids = [e['id'] for e in entries if e['source'] == SOURCE_PERSONAL]
+    rows = Notification.objects.in_bulk(page_ids) if page_ids else {}
+    for entry in entries:
+        if entry['source'] == SOURCE_PERSONAL:
+            n = rows[entry['id']]
+            entry.update(
+                type=n.type, **render_notification(n), metadata=n.metadata,
+                count=n.count, read=n.read, created_at=n.created_at,
+            )
+    return entries, next_cursor, unread_count
@@ -0,0 +1,206 @@
+"""
+Notification templates, keyed by name.
+Each template is rendered with str.format-style fields; `{field!c}` capitalizes
+the first letter of a value and `{field!u}` upper-cases it. Templates used with
+a coalescing source can set `summary_title`, rendered with an extra {count}
+field once events have merged. A template with `lines` = (param, line) renders
+each dict in the list param with `line` and provides them, one per line, as
+the {lines} field.
+
+Notifications store only (template_key, params) and are rendered when read,
+so template strings are parsed once and cached.
+"""
+
+import string
+from functools import lru_cache
+
+TEMPLATES = {
+    # Trading
+    "stock_purchase": {
+        "type": "trade",
+        "title": "Stock Purchase Successful",
+        "summary_title": "{count} Trade Confirmations",
+        "message": "You bought {shares} shares of {symbol} for ${total_cost}",
+        "full_details": "Your purchase of {shares} shares of {name} ({symbol}) at ${price} per share has been completed. Total cost: ${total_cost}. Reference: {reference}",
+    },
+    "stock_sale": {
+        "type": "trade",
+        "title": "Stock Sale Successful",
+        "summary_title": "{count} Trade Confirmations",
+        "message": "You sold {shares} shares of {symbol} for ${proceeds} ({result})",
+        "full_details": "Your sale of {shares} shares of {name} ({symbol}) at ${price} per share has been completed. Sale proceeds: ${proceeds}. {result!c}. Reference: {reference}",
+    },
+    "batch_order": {
+        "type": "trade",
+        "title": "Batch Order Executed",
+        "summary_title": "{count} Trade Confirmations",
+        "message": "{orders} orders executed ({buys} buys, {sells} sells)",
+        "full_details": "{lines}",
+        "lines": ("legs", "{side!u} {shares} {symbol} at ${price} = ${total} (Reference: {reference})"),
+    },
+    "signal_purchase": {
+        "type": "trade",
+        "title": "Signal Purchased Successfully",
+        "message": "You have successfully purchased {signal} signal for ${price}",
+        "full_details": "Your purchase of {signal} trading signal has been completed. You can now access the full signal details including entry points, target prices, and stop loss recommendations. Reference: {reference}",
+    },
+    "copy_trade_gain": {
+        "type": "trade",
+        "title": "Trade Profit from {trader}!",
+        "summary_title": "{count} Trade Updates from {trader}",
+        "message": "Copy trade on {market} gained ${amount}",
+        "full_details": "Trader: {trader}\nMarket: {market}\nDirection: {direction}\nYour Investment: ${investment}\nP/L: ${profit_loss} ({percent}%)\nStatus: {status!c}",
+    },
+    "copy_trade_loss": {
+        "type": "trade",
+        "title": "Trade Update from {trader}",
+        "summary_title": "{count} Trade Updates from {trader}",
+        "message": "Copy trade on {market} lost ${amount}",
+        "full_details": "Trader: {trader}\nMarket: {market}\nDirection: {direction}\nYour Investment: ${investment}\nP/L: ${profit_loss} ({percent}%)\nStatus: {status!c}",
+    },
+
+    # Deposits & withdrawals
+    "deposit_submitted": {
+        "type": "deposit",
+        "title": "Deposit Request Submitted",
+        "message": "Your deposit of ${amount} via {currency} is pending approval.",
+        "full_details": "Deposit reference: {reference}. Amount: ${amount}. Currency: {currency}. Unit: {unit}. This deposit is pending admin approval.",
+    },
+    "deposit_approved": {
+        "type": "deposit",
+        "title": "Deposit Approved",
+        "message": "Your deposit of ${amount} has been approved.",
+        "full_details": "Amount: ${amount}\nReference: {reference}",
+    },
+    "deposit_rejected": {
+        "type": "alert",
+        "title": "Deposit Rejected",
+        "message": "Your deposit of ${amount} was not approved.",
+        "full_details": "{details}",
+    },
+    "deposit_updated": {
+        "type": "deposit",
+        "title": "Deposit Updated",
+        "message": "Your deposit has been updated by admin.",
+        "full_details": "Amount: ${amount}\nCurrency: {currency}\nStatus: {status}\nRef: {reference}",
+    },
+    "withdrawal_submitted": {
+        "type": "withdrawal",
+        "title": "Withdrawal Request Submitted",
+        "message": "Your withdrawal of ${amount} via {method} is pending approval.",
+        "full_details": "Withdrawal reference: {reference}. Amount: ${amount}. Method: {method}. Address: {address}. This withdrawal is pending admin approval.",
+    },
+    "withdrawal_approved": {
+        "type": "withdrawal",
+        "title": "Withdrawal Approved",
+        "message": "Your withdrawal of ${amount} has been processed.",
+        "full_details": "Amount: ${amount}\nReference: {reference}",
+    },
+    "withdrawal_rejected": {
+        "type": "alert",
+        "title": "Withdrawal Rejected",
+        "message": "Your withdrawal of ${amount} was not processed.",
+        "full_details": "{details}",
+    },
+    "earnings_added": {
+        "type": "system",
+        "title": "Earnings Added",
+        "message": "${amount} has been added to your account.",
+        "full_details": "{description}",
+    },
+
+    # Account
+    "kyc_approved": {
+        "type": "system",
+        "title": "KYC Approved",
+        "message": "Your KYC verification has been approved!",
+        "full_details": "Your account is now fully verified. You can access all features.",
+    },
+    "kyc_rejected": {
+        "type": "alert",
+        "title": "KYC Rejected",
+        "message": "Your KYC verification was not approved.",
+        "full_details": "{details}",
+    },
+    "wallet_connected": {
+        "type": "system",
+        "title": "Wallet Connected Successfully",
+        "message": "{wallet} has been connected to your account",
+        "full_details": "You have successfully connected your {wallet} to your ScopTrade account. You can now use this wallet for transactions and trading activities.",
+    },
+    "wallet_disconnected": {
+        "type": "system",
+        "title": "Wallet Disconnected",
+        "message": "{wallet} has been disconnected from your account",
+        "full_details": "You have successfully disconnected your {wallet} from your ScopTrade account. You can reconnect it anytime from the wallet connection page.",
+    },
+}
+
+
+class _Formatter(string.Formatter):
+    def convert_field(self, value, conversion):
+        if conversion == "c":
+            return str(value).capitalize()
+        if conversion == "u":
+            return str(value).upper()
+        return super().convert_field(value, conversion)
+
+
+_formatter = _Formatter()
+
+
+@lru_cache(maxsize=None)
+def compile_template(text):
+    """Parse a template string into (literal, field, format_spec, conversion) parts"""
+    return tuple(_formatter.parse(text))
+
+
+def _format(text, params):
+    parts = []
+    for literal, field, format_spec, conversion in compile_template(text):
+        parts.append(literal)
+        if field is not None:
+            # A param missing from an old row renders empty rather than failing the feed
+            value = params.get(field, "")
+            if conversion:
+                value = _formatter.convert_field(value, conversion)
+            parts.append(format(value, format_spec or ""))
+    return "".join(parts)
+
+
+def render(template, params):
+    """Return {"type", "title", "message", "full_details"} for a template key"""
+    spec = TEMPLATES[template]
+    if "lines" in spec:
+        field, line = spec["lines"]
+        # Rows written before the structured param kept the rendered text
+        if field in params:
+            params = {**params, "lines": "\n".join(_format(line, item) for item in params[field])}
+    return {
+        "type": spec["type"],
+        "title": _format(spec["title"], params),
+        "message": _format(spec["message"], params),
+        "full_details": _format(spec["full_details"], params),
+    }
+
+
+def render_notification(notification):
+    """
+    Return {"title", "message", "full_details"} for a Notification, rendered
+    from its template, or its stored text for rows that predate templates.
+    """
+    if notification.template_key in TEMPLATES:
+        text = render(notification.template_key, notification.params)
+        del text["type"]
+        if notification.count > 1:
+            # Coalesced: summary title, latest event's message
+            summary = TEMPLATES[notification.template_key].get("summary_title")
+            if summary:
+                text["title"] = _format(summary, {**notification.params, "count": notification.count})
+            text["message"] += f" (+{notification.count - 1} more)"
+        return text
+    return {
+        "title": notification.title,
+        "message": notification.message,
+        "full_details": notification.full_details,
+    }
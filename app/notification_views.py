@@ -2,65 +2,85 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Notification
+from .notification_service import (
+    SOURCE_BROADCAST,
+    mark_all_read,
+    mark_broadcast_read,
+    mark_read,
+    notification_feed,
+    notification_total,
+)
+from .pagination import InvalidCursor
+
+MAX_NOTIFICATIONS_LIMIT = 100
+# Deeper pages have to follow next_cursor
+MAX_NOTIFICATIONS_OFFSET = 1000
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def list_notifications(request):
     """
-    Get user's notifications with optional type filtering
+    Get user's notifications, including platform broadcasts, with optional type filtering.
+    Paginated by cursor: pass the returned next_cursor as ?cursor= for the next page.
+    ?offset= is still accepted (without a cursor, up to MAX_NOTIFICATIONS_OFFSET)
+    for older clients; total_count is only returned on requests without a cursor.
+    Broadcast entries have "broadcast": true and are marked read via their own endpoint.
     """
     user = request.user
 
     # Get filter parameters
     notification_type = request.GET.get('type', '').strip()
+    cursor = request.GET.get('cursor', '').strip()
     limit = request.GET.get('limit', '50')
     offset = request.GET.get('offset', '0')
 
     try:
-        limit = int(limit)
-        offset = int(offset)
+        limit = min(max(int(limit), 1), MAX_NOTIFICATIONS_LIMIT)
+        offset = 0 if cursor else min(max(int(offset), 0), MAX_NOTIFICATIONS_OFFSET)
     except ValueError:
         limit = 50
         offset = 0
 
-    # Build query
-    notifications_query = Notification.objects.filter(user=user)
-
-    # Apply type filter if provided
-    if notification_type:
-        notifications_query = notifications_query.filter(type=notification_type)
-
-    # Order by most recent first
-    notifications_query = notifications_query.order_by('-created_at')
-
-    # Get total count
-    total_count = notifications_query.count()
-
-    # Apply pagination
-    notifications = notifications_query[offset:offset + limit]
+    # Most recent first
+    try:
+        notifications, next_cursor, unread_count = notification_feed(
+            user, notification_type, cursor, limit, offset
+        )
+    except InvalidCursor as e:
+        return Response({
+            "success": False,
+            "error": str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
 
     # Build response
     notifications_list = []
     for notification in notifications:
         notifications_list.append({
-            "id": notification.id,
-            "type": notification.type,
-            "title": notification.title,
-            "message": notification.message,
-            "full_details": notification.full_details,
-            "metadata": notification.metadata,
-            "read": notification.read,
-            "created_at": notification.created_at.isoformat(),
+            "id": notification["id"],
+            "type": notification["type"],
+            "title": notification["title"],
+            "message": notification["message"],
+            "full_details": notification["full_details"],
+            "metadata": notification["metadata"],
+            "count": notification["count"],
+            "read": notification["read"],
+            "broadcast": notification["source"] == SOURCE_BROADCAST,
+            "created_at": notification["created_at"].isoformat(),
         })
 
-    return Response({
+    response = {
         "success": True,
         "notifications": notifications_list,
-        "total_count": total_count,
-        "unread_count": Notification.objects.filter(user=user, read=False).count(),
-    })
+        "offset": offset,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
+        "unread_count": unread_count,
+    }
+    # Counting is skipped while paging through by cursor
+    if not cursor:
+        response["total_count"] = notification_total(user, notification_type)
+    return Response(response)
 
 
 @api_view(["PATCH"])
@@ -69,24 +89,35 @@ def mark_notification_read(request, notification_id):
     """
     Mark a specific notification as read
     """
-    try:
-        notification = Notification.objects.get(
-            id=notification_id,
-            user=request.user
-        )
-        notification.read = True
-        notification.save(update_fields=['read'])
-
+    if not mark_read(request.user, notification_id):
         return Response({
-            "success": True,
-            "message": "Notification marked as read"
-        })
-    except Notification.DoesNotExist:
+            "success": False,
+            "error": "Notification not found"
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    return Response({
+        "success": True,
+        "message": "Notification marked as read"
+    })
+
+
+@api_view(["PATCH"])
+@permission_classes([IsAuthenticated])
+def mark_broadcast_notification_read(request, broadcast_id):
+    """
+    Mark a platform broadcast as read for the current user
+    """
+    if not mark_broadcast_read(request.user, broadcast_id):
         return Response({
             "success": False,
             "error": "Notification not found"
         }, status=status.HTTP_404_NOT_FOUND)
 
+    return Response({
+        "success": True,
+        "message": "Notification marked as read"
+    })
+
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
@@ -94,10 +125,7 @@ def mark_all_notifications_read(request):
     """
     Mark all user's notifications as read
     """
-    updated_count = Notification.objects.filter(
-        user=request.user,
-        read=False
-    ).update(read=True)
+    updated_count = mark_all_read(request.user)
 
     return Response({
         "success": True,
@@ -112,23 +140,20 @@ def get_recent_notifications(request):
     """
     Get 3 most recent notifications for dropdown
     """
-    user = request.user
-
-    notifications = Notification.objects.filter(user=user).order_by('-created_at')[:3]
+    notifications, _, unread_count = notification_feed(request.user, limit=3)
 
     notifications_list = []
     for notification in notifications:
         notifications_list.append({
-            "id": notification.id,
-            "type": notification.type,
-            "title": notification.title,
-            "message": notification.message,
-            "read": notification.read,
-            "created_at": notification.created_at.isoformat(),
+            "id": notification["id"],
+            "type": notification["type"],
+            "title": notification["title"],
+            "message": notification["message"],
+            "read": notification["read"],
+            "broadcast": notification["source"] == SOURCE_BROADCAST,
+            "created_at": notification["created_at"].isoformat(),
         })
 
-    unread_count = Notification.objects.filter(user=user, read=False).count()
-
     return Response({
         "success": True,
         "notifications": notifications_list,
@@ -0,0 +1,97 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Pages are fetched with a WHERE on the ordering columns of the last row seen
+instead of OFFSET, so every page costs one indexed range scan no matter how
+deep the client has scrolled. The ordering must end in a unique column
+(usually id) so the cursor position is unambiguous.
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values):
+    raw = json.dumps([_plain(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_raw_cursor(cursor, length):
+    """Decode a cursor into its list of JSON values, checking the length"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursor("Invalid cursor")
+    return values
+
+
+def decode_cursor(cursor, model, ordering):
+    """Decode a cursor back into typed values for the ordering fields"""
+    values = decode_raw_cursor(cursor, len(ordering))
+    typed = []
+    for name, value in zip(ordering, values):
+        field = model._meta.get_field(name.lstrip("-"))
+        try:
+            typed.append(field.to_python(value))
+        except Exception:
+            raise InvalidCursor("Invalid cursor")
+    return typed
+
+
+def _after(ordering, values):
+    """
+    Build the "comes after this row" filter for a multi-column ordering:
+    (a < x) OR (a = x AND b < y) OR ...
+    """
+    condition = Q()
+    equal = {}
+    for name, value in zip(ordering, values):
+        field = name.lstrip("-")
+        lookup = "lt" if name.startswith("-") else "gt"
+        condition |= Q(**equal, **{f"{field}__{lookup}": value})
+        equal[field] = value
+    return condition
+
+
+def _row_values(row, ordering):
+    if isinstance(row, dict):
+        return [row[name.lstrip("-")] for name in ordering]
+    return [getattr(row, name.lstrip("-")) for name in ordering]
+
+
+def keyset_page(queryset, ordering, cursor=None, limit=20):
+    """
+    Return (rows, next_cursor) for one page of queryset.
+    next_cursor is None on the last page.
+    Raises InvalidCursor when the cursor can't be decoded.
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = decode_cursor(cursor, queryset.model, ordering)
+        queryset = queryset.filter(_after(ordering, values))
+
+    rows = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(_row_values(rows[-1], ordering))
+    return rows, next_cursor
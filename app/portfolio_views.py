@@ -0,0 +1,99 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Case, Count, DecimalField, ExpressionWrapper, F, Sum, When
+from django.utils import timezone
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .models import Portfolio, UserStockPosition, UserTraderCopy
+
+# Seconds a computed summary is reused for the same user
+PORTFOLIO_SUMMARY_TTL = 15
+
+ZERO = Decimal('0.00')
+MONEY = DecimalField(max_digits=30, decimal_places=8)
+
+
+def portfolio_summary_cache_key(user_id):
+    return f"portfolio_summary:{user_id}"
+
+
+def _money(value):
+    return str((value or ZERO).quantize(Decimal('0.01')))
+
+
+def build_portfolio_summary(user):
+    """Compute the dashboard summary for a user with one aggregate query per table"""
+    market_value = ExpressionWrapper(F('shares') * F('stock__price'), output_field=MONEY)
+    stocks = UserStockPosition.objects.filter(user=user, is_active=True).aggregate(
+        positions=Count('id'),
+        market_value=Sum(market_value),
+        invested=Sum('total_invested'),
+        # Same rule as UserStockPosition.profit_loss: admin override or value - invested
+        unrealized=Sum(Case(
+            When(use_admin_profit=True, then=F('admin_profit_loss')),
+            default=ExpressionWrapper(market_value - F('total_invested'), output_field=MONEY),
+            output_field=MONEY,
+        )),
+    )
+    copies = UserTraderCopy.objects.filter(user=user, is_actively_copying=True).aggregate(
+        traders=Count('id'),
+        allocation=Sum('initial_investment_amount'),
+    )
+    positions = Portfolio.objects.filter(user=user, is_active=True).aggregate(
+        positions=Count('id'),
+        invested=Sum('invested'),
+        value=Sum('value'),
+    )
+
+    balance = user.balance or ZERO
+    stock_value = stocks['market_value'] or ZERO
+    stock_invested = stocks['invested'] or ZERO
+    unrealized = stocks['unrealized'] or ZERO
+
+    return {
+        "total_equity": _money(balance + stock_value),
+        "balance": _money(balance),
+        "profit": _money(user.profit),
+        "currency": user.currency or "USD",
+        "stocks": {
+            "positions": stocks['positions'],
+            "market_value": _money(stock_value),
+            "total_invested": _money(stock_invested),
+            "unrealized_profit_loss": _money(unrealized),
+            "unrealized_profit_loss_percent": _money(
+                unrealized / stock_invested * 100 if stock_invested else ZERO
+            ),
+        },
+        "copy_trading": {
+            "active_traders": copies['traders'],
+            "allocation": _money(copies['allocation']),
+            "open_positions": positions['positions'],
+            "positions_invested": _money(positions['invested']),
+            "positions_value": _money(positions['value']),
+        },
+        "as_of": timezone.now().isoformat(),
+    }
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def portfolio_summary(request):
+    """
+    Dashboard home summary in one call.
+    total_equity is cash balance plus the market value of open stock positions;
+    copy-trade allocation is reported separately because it is not deducted
+    from the balance.
+    """
+    key = portfolio_summary_cache_key(request.user.id)
+    summary = cache.get(key)
+    if summary is None:
+        summary = build_portfolio_summary(request.user)
+        cache.set(key, summary, PORTFOLIO_SUMMARY_TTL)
+
+    return Response({
+        "success": True,
+        "summary": summary,
+    })
@@ -0,0 +1,222 @@
+"""
+Real-time event fan-out for the streaming endpoint.
+
+Events are published to named channels ("prices" for stock quotes and
+"user:<id>" for a user's balances). A single in-process Broadcaster hands each
+event to every subscribed connection, and a pluggable backend carries events
+between worker processes:
+
+- LocalBackend: delivers straight to this process (dev / single worker)
+- PostgresBackend: uses LISTEN/NOTIFY so every worker sees every event
+
+The backend is chosen with the REALTIME_BACKEND setting (a dotted path); by
+default Postgres is used when the default database is Postgres.
+"""
+
+import asyncio
+import json
+import logging
+import select
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+PRICES_CHANNEL = "prices"
+
+# Events buffered per connection before the oldest ones are dropped
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+def user_channel(user_id):
+    """Channel carrying balance updates for a single user"""
+    return f"user:{user_id}"
+
+
+class Subscription:
+    """A single connection's queue of pending events"""
+
+    def __init__(self, channels, loop):
+        self.channels = frozenset(channels)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def offer(self, message):
+        """Queue a message, dropping the oldest one if the client is slow"""
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class Broadcaster:
+    """In-process fan-out from channels to subscribed connections"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = {}
+
+    def subscribe(self, channels):
+        subscription = Subscription(channels, asyncio.get_running_loop())
+        with self._lock:
+            for channel in subscription.channels:
+                self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._channels.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[channel]
+
+    def deliver(self, channel, message):
+        """Hand a message to every local subscriber; safe to call from any thread"""
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, message)
+            except RuntimeError:
+                # Event loop already closed; the connection is going away
+                self.unsubscribe(subscription)
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len({s for subscribers in self._channels.values() for s in subscribers})
+
+
+class LocalBackend:
+    """Delivers events to subscribers in this process only"""
+
+    def __init__(self, broadcaster):
+        self.broadcaster = broadcaster
+
+    def start(self):
+        pass
+
+    def publish(self, channel, event, data):
+        self.broadcaster.deliver(channel, encode_event(event, data))
+
+
+class PostgresBackend:
+    """
+    Cross-process delivery through Postgres LISTEN/NOTIFY.
+    Every worker runs one listener thread on a dedicated connection and feeds
+    received events into its local Broadcaster.
+    """
+
+    NOTIFY_CHANNEL = "scoptrade_events"
+
+    def __init__(self, broadcaster):
+        self.broadcaster = broadcaster
+        self._started = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        thread = threading.Thread(target=self._listen, name="realtime-listener", daemon=True)
+        thread.start()
+
+    def publish(self, channel, event, data):
+        payload = json.dumps({"channel": channel, "message": encode_event(event, data)})
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.NOTIFY_CHANNEL, payload])
+
+    def _listen(self):
+        import psycopg2
+
+        params = connection.get_connection_params()
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(**params)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.NOTIFY_CHANNEL}")
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        payload = json.loads(notify.payload)
+                        self.broadcaster.deliver(payload["channel"], payload["message"])
+            except Exception as e:
+                logger.error(f"Realtime listener error, reconnecting: {e}")
+                threading.Event().wait(5)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+def encode_event(event, data):
+    """Format a Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+broadcaster = Broadcaster()
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                default = (
+                    "app.realtime.PostgresBackend"
+                    if connection.vendor == "postgresql"
+                    else "app.realtime.LocalBackend"
+                )
+                backend_class = import_string(getattr(settings, "REALTIME_BACKEND", default))
+                _backend = backend_class(broadcaster)
+    return _backend
+
+
+def publish(channel, event, data):
+    """Publish an event once the current transaction (if any) commits"""
+    if not settings.REALTIME_STREAM_ENABLED:
+        return
+
+    def _send():
+        try:
+            get_backend().publish(channel, event, data)
+        except Exception as e:
+            logger.error(f"Failed to publish {event} on {channel}: {e}")
+
+    transaction.on_commit(_send)
+
+
+def publish_price(stock):
+    publish(PRICES_CHANNEL, "price", {
+        "symbol": stock.symbol,
+        "price": str(stock.price),
+        "change": str(stock.change),
+        "change_percent": str(stock.change_percent),
+        "is_positive_change": stock.is_positive_change,
+        "is_active": stock.is_active,
+    })
+
+
+def publish_balance(user):
+    publish(user_channel(user.pk), "balance", {
+        "balance": str(user.balance),
+        "profit": str(user.profit),
+    })
@@ -0,0 +1,69 @@
+"""
+Reference IDs for transactions, trades and purchases.
+
+new_reference("DEP") returns e.g. "DEP-01JAB3K9Q7X4M2N8P5R6S7T8V9": the prefix
+plus a 26-character ULID (48-bit millisecond timestamp, 80 random bits,
+Crockford base32). References with the same prefix sort by creation time, so
+inserts land at the right-hand edge of the unique index instead of at random
+pages, and 80 random bits make collisions between processes negligible, so
+callers never need a retry loop. Within one process IDs are strictly
+increasing even inside the same millisecond.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_DECODE = {char: value for value, char in enumerate(_ALPHABET)}
+
+_RANDOM_BITS = 80
+_RANDOM_MAX = (1 << _RANDOM_BITS) - 1
+
+_lock = threading.Lock()
+_last_ms = -1
+_last_random = 0
+
+
+def _encode(value, length):
+    chars = []
+    for _ in range(length):
+        value, remainder = divmod(value, 32)
+        chars.append(_ALPHABET[remainder])
+    return "".join(reversed(chars))
+
+
+def new_ulid():
+    """A 26-character, time-ordered, monotonic ULID string"""
+    global _last_ms, _last_random
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms <= _last_ms:
+            # Same millisecond (or the clock stepped back): keep counting up
+            now_ms = _last_ms
+            random_part = _last_random + 1
+            if random_part > _RANDOM_MAX:
+                now_ms += 1
+                random_part = int.from_bytes(os.urandom(10), "big") >> 1
+        else:
+            # Leave headroom so increments within a millisecond don't overflow
+            random_part = int.from_bytes(os.urandom(10), "big") >> 1
+        _last_ms, _last_random = now_ms, random_part
+    return _encode(now_ms, 10) + _encode(random_part, 16)
+
+
+def new_reference(prefix):
+    """A unique reference such as "TXN-01JAB3K9Q7X4M2N8P5R6S7T8V9" """
+    return f"{prefix}-{new_ulid()}"
+
+
+def reference_time(reference):
+    """When a ULID-based reference was generated, or None for legacy references"""
+    ulid = reference.rsplit("-", 1)[-1]
+    if len(ulid) != 26 or any(char not in _DECODE for char in ulid):
+        return None
+    ms = 0
+    for char in ulid[:10]:
+        ms = ms * 32 + _DECODE[char]
+    return datetime.fromtimestamp(ms / 1000, tz=dt_timezone.utc)
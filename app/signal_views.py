@@ -1,51 +1,132 @@
+import hashlib
+import json
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from django.utils.crypto import get_random_string
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
 from decimal import Decimal
-from .models import Signal, UserSignalPurchase, Notification
+from .ledger import InsufficientFunds, debit
+from .models import Signal, SignalSnapshot, UserSignalPurchase
+from .notification_service import notify
+from .references import new_reference
+
+
+# The catalog is the same for every user, so it is serialized once and shared
+SIGNAL_CATALOG_CACHE_KEY = "signals:catalog"
+SIGNAL_CATALOG_TTL = 300
+
+# Seconds a user's purchased signal ids are reused
+SIGNAL_PURCHASES_TTL = 300
+
+# Columns for the list view; the analysis text is only sent by signal_detail
+SIGNAL_LIST_FIELDS = (
+    "id", "name", "signal_type", "price", "signal_strength", "entry_point",
+    "target_price", "stop_loss", "action", "timeframe", "risk_level", "status",
+    "is_featured", "created_at", "expires_at",
+)
+
+
+def live_signals(now=None):
+    """Active signals that haven't expired, whether or not the sweeper has run yet"""
+    now = now or timezone.now()
+    return Signal.objects.filter(
+        Q(expires_at__isnull=True) | Q(expires_at__gt=now),
+        is_active=True,
+    ).exclude(status='expired')
+
+
+def expire_signals(now=None):
+    """Flip every active signal past its expiry to status=expired in one UPDATE"""
+    now = now or timezone.now()
+    expired = Signal.objects.filter(
+        is_active=True, status='active', expires_at__lte=now
+    ).update(status='expired', updated_at=now)
+    if expired:
+        invalidate_signal_catalog()
+    return expired
+
+
+def signal_purchases_cache_key(user_id):
+    return f"signal_purchases:{user_id}"
+
+
+def signal_catalog():
+    """Active signals in list order, serialized without the heavy text fields"""
+    catalog = cache.get(SIGNAL_CATALOG_CACHE_KEY)
+    if catalog is None:
+        now = timezone.now()
+        signals = list(
+            live_signals(now)
+            .order_by('-is_featured', '-created_at')
+            .only(*SIGNAL_LIST_FIELDS)
+        )
+        catalog = [
+            {
+                "id": signal.id,
+                "name": signal.name,
+                "signal_type": signal.signal_type,
+                "price": str(signal.price),
+                "signal_strength": str(signal.signal_strength),
+                "entry_point": signal.entry_point,
+                "target_price": signal.target_price,
+                "stop_loss": signal.stop_loss,
+                "action": signal.action,
+                "timeframe": signal.timeframe,
+                "risk_level": signal.risk_level,
+                "status": signal.status,
+                "is_featured": signal.is_featured,
+                "created_at": signal.created_at.isoformat(),
+                "expires_at": signal.expires_at.isoformat() if signal.expires_at else None,
+            }
+            for signal in signals
+        ]
+        # Drop the cached copy by the time its first signal expires
+        timeout = SIGNAL_CATALOG_TTL
+        expiries = [signal.expires_at for signal in signals if signal.expires_at]
+        if expiries:
+            timeout = max(min(timeout, int((min(expiries) - now).total_seconds())), 1)
+        cache.set(SIGNAL_CATALOG_CACHE_KEY, catalog, timeout)
+    return catalog
+
+
+def invalidate_signal_catalog():
+    cache.delete(SIGNAL_CATALOG_CACHE_KEY)
+
+
+def purchased_signal_ids(user_id):
+    """
+    Ids of the signals a user has bought, for the list view's is_purchased
+    badge. The cache is per process, so access checks query the table.
+    """
+    key = signal_purchases_cache_key(user_id)
+    purchased = cache.get(key)
+    if purchased is None:
+        purchased = set(
+            UserSignalPurchase.objects.filter(user_id=user_id).values_list('signal_id', flat=True)
+        )
+        cache.set(key, purchased, SIGNAL_PURCHASES_TTL)
+    return purchased
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def list_signals(request):
     """
-    Get list of all available signals with purchase status
+    Get list of all available signals with purchase status.
+    Full analysis text is returned by signal_detail once purchased.
     """
     user = request.user
+    purchased = purchased_signal_ids(user.id)
 
-    # Get all active signals
-    signals = Signal.objects.filter(is_active=True).order_by('-is_featured', '-created_at')
-
-    # Get user's purchased signal IDs
-    purchased_signal_ids = set(
-        UserSignalPurchase.objects.filter(user=user).values_list('signal_id', flat=True)
-    )
-
-    signals_list = []
-    for signal in signals:
-        signals_list.append({
-            "id": signal.id,
-            "name": signal.name,
-            "signal_type": signal.signal_type,
-            "price": str(signal.price),
-            "signal_strength": str(signal.signal_strength),
-            "market_analysis": signal.market_analysis,
-            "entry_point": signal.entry_point,
-            "target_price": signal.target_price,
-            "stop_loss": signal.stop_loss,
-            "action": signal.action,
-            "timeframe": signal.timeframe,
-            "risk_level": signal.risk_level,
-            "technical_indicators": signal.technical_indicators,
-            "fundamental_analysis": signal.fundamental_analysis,
-            "status": signal.status,
-            "is_featured": signal.is_featured,
-            "created_at": signal.created_at.isoformat(),
-            "expires_at": signal.expires_at.isoformat() if signal.expires_at else None,
-            "is_purchased": signal.id in purchased_signal_ids,
-        })
+    signals_list = [
+        {**signal, "is_purchased": signal["id"] in purchased}
+        for signal in signal_catalog()
+    ]
 
     return Response({
         "success": True,
@@ -54,31 +135,94 @@ def list_signals(request):
     })
 
 
+def snapshot_hash(data):
+    """SHA-256 of a snapshot's canonical JSON"""
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), cls=DjangoJSONEncoder)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def signal_snapshot(signal):
+    """The shared SignalSnapshot for the signal's current content, created on first sale"""
+    data = {
+        "name": signal.name,
+        "signal_type": signal.signal_type,
+        "signal_strength": str(signal.signal_strength),
+        "market_analysis": signal.market_analysis,
+        "entry_point": signal.entry_point,
+        "target_price": signal.target_price,
+        "stop_loss": signal.stop_loss,
+        "action": signal.action,
+        "timeframe": signal.timeframe,
+        "risk_level": signal.risk_level,
+        "technical_indicators": signal.technical_indicators,
+        "fundamental_analysis": signal.fundamental_analysis,
+    }
+    snapshot, _ = SignalSnapshot.objects.get_or_create(hash=snapshot_hash(data), defaults={"data": data})
+    return snapshot
+
+
+class _AlreadyPurchased(Exception):
+    pass
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def purchase_signal(request, signal_id):
     """
-    Purchase a signal
+    Purchase a signal.
+    The debit is a conditional UPDATE and the (user, signal) unique constraint
+    rejects a second purchase, so concurrent clicks can't double-charge.
     """
     user = request.user
 
     try:
-        signal = Signal.objects.get(id=signal_id, is_active=True)
+        signal = live_signals().get(id=signal_id)
     except Signal.DoesNotExist:
         return Response({
             "success": False,
             "error": "Signal not found or no longer available"
         }, status=status.HTTP_404_NOT_FOUND)
 
-    # Check if user already purchased this signal
-    if UserSignalPurchase.objects.filter(user=user, signal=signal).exists():
+    purchase_reference = new_reference("SIG")
+
+    try:
+        with transaction.atomic():
+            if not debit(user, signal.price, 'signal_purchase', reference=purchase_reference, memo=f"Signal {signal.name}"):
+                raise InsufficientFunds
+
+            try:
+                with transaction.atomic():
+                    UserSignalPurchase.objects.create(
+                        user=user,
+                        signal=signal,
+                        amount_paid=signal.price,
+                        purchase_reference=purchase_reference,
+                        snapshot=signal_snapshot(signal),
+                    )
+            except IntegrityError:
+                raise _AlreadyPurchased
+
+            # Create notification
+            notify(
+                user,
+                "signal_purchase",
+                {
+                    "signal": signal.name,
+                    "price": signal.price,
+                    "reference": purchase_reference,
+                },
+                metadata={
+                    "signal_name": signal.name,
+                    "amount": f"${signal.price}",
+                    "reference": purchase_reference,
+                }
+            )
+    except _AlreadyPurchased:
         return Response({
             "success": False,
             "error": "You have already purchased this signal"
         }, status=status.HTTP_400_BAD_REQUEST)
-
-    # Check if user has sufficient balance
-    if user.balance < signal.price:
+    except InsufficientFunds:
         return Response({
             "success": False,
             "error": f"Insufficient balance. You need ${signal.price} but only have ${user.balance}",
@@ -86,51 +230,6 @@ def purchase_signal(request, signal_id):
             "current_balance": str(user.balance),
         }, status=status.HTTP_400_BAD_REQUEST)
 
-    # Deduct amount from user balance
-    user.balance -= signal.price
-    user.save(update_fields=['balance'])
-
-    # Create purchase record
-    purchase_reference = f"SIG-{get_random_string(12).upper()}"
-
-    # Create signal snapshot
-    signal_snapshot = {
-        "name": signal.name,
-        "signal_type": signal.signal_type,
-        "signal_strength": str(signal.signal_strength),
-        "market_analysis": signal.market_analysis,
-        "entry_point": signal.entry_point,
-        "target_price": signal.target_price,
-        "stop_loss": signal.stop_loss,
-        "action": signal.action,
-        "timeframe": signal.timeframe,
-        "risk_level": signal.risk_level,
-        "technical_indicators": signal.technical_indicators,
-        "fundamental_analysis": signal.fundamental_analysis,
-    }
-
-    purchase = UserSignalPurchase.objects.create(
-        user=user,
-        signal=signal,
-        amount_paid=signal.price,
-        purchase_reference=purchase_reference,
-        signal_data=signal_snapshot,
-    )
-
-    # Create notification
-    Notification.objects.create(
-        user=user,
-        type="trade",
-        title="Signal Purchased Successfully",
-        message=f"You have successfully purchased {signal.name} signal for ${signal.price}",
-        full_details=f"Your purchase of {signal.name} trading signal has been completed. You can now access the full signal details including entry points, target prices, and stop loss recommendations. Reference: {purchase_reference}",
-        metadata={
-            "signal_name": signal.name,
-            "amount": f"${signal.price}",
-            "reference": purchase_reference,
-        }
-    )
-
     return Response({
         "success": True,
         "message": "Signal purchased successfully",
@@ -147,7 +246,11 @@ def user_purchased_signals(request):
     """
     user = request.user
 
-    purchases = UserSignalPurchase.objects.filter(user=user).select_related('signal').order_by('-purchased_at')
+    purchases = (
+        UserSignalPurchase.objects.filter(user=user)
+        .select_related('signal', 'snapshot')
+        .order_by('-purchased_at')
+    )
 
     purchases_list = []
     for purchase in purchases:
@@ -160,7 +263,7 @@ def user_purchased_signals(request):
             "amount_paid": str(purchase.amount_paid),
             "purchase_reference": purchase.purchase_reference,
             "purchased_at": purchase.purchased_at.isoformat(),
-            "signal_data": purchase.signal_data,
+            "signal_data": purchase.snapshot_data,
             # Include current signal data if still active
             "current_signal": {
                 "name": signal.name,
@@ -192,7 +295,7 @@ def signal_detail(request, signal_id):
     user = request.user
 
     try:
-        signal = Signal.objects.get(id=signal_id, is_active=True)
+        signal = live_signals().get(id=signal_id)
     except Signal.DoesNotExist:
         return Response({
             "success": False,
@@ -2,9 +2,22 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework import status
-from decimal import Decimal
-from django.utils.crypto import get_random_string
-from .models import Stock, UserStockPosition, TradeHistory, Notification
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.utils import timezone
+from .ledger import credit, debit, post
+from .models import Account, Stock, UserStockPosition, TradeHistory
+from .notification_service import notify
+from .references import new_reference
+from .symbol_index import symbol_index
+
+
+# Upper bound on legs accepted by batch_order in a single request
+MAX_BATCH_ORDERS = 50
+
+# Default and maximum number of matches returned by search_markets
+SEARCH_DEFAULT_LIMIT = 10
+SEARCH_MAX_LIMIT = 50
 
 
 @api_view(["GET"])
@@ -40,6 +53,27 @@ def list_stocks(request):
     })
 
 
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def search_markets(request):
+    """
+    Symbol autocomplete across stocks, assets and copy-trading markets.
+    Served from the in-memory symbol index, so no database query per keystroke.
+    """
+    query = request.GET.get('q', '').strip()
+
+    try:
+        limit = min(max(int(request.GET.get('limit', SEARCH_DEFAULT_LIMIT)), 1), SEARCH_MAX_LIMIT)
+    except ValueError:
+        limit = SEARCH_DEFAULT_LIMIT
+
+    return Response({
+        "success": True,
+        "query": query,
+        "results": symbol_index.search(query, limit=limit),
+    })
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def stock_detail(request, symbol):
@@ -128,65 +162,69 @@ def buy_stock(request):
     # Calculate total cost
     total_cost = shares * stock.price
 
-    # Check user balance
-    if user.balance < total_cost:
-        return Response({
-            "success": False,
-            "error": f"Insufficient balance. You need ${total_cost} but only have ${user.balance}",
-            "required": str(total_cost),
-            "current_balance": str(user.balance),
-        }, status=status.HTTP_400_BAD_REQUEST)
-
-    # Deduct from balance
-    user.balance -= total_cost
-    user.save(update_fields=['balance'])
-
-    # Get or create position
-    position, created = UserStockPosition.objects.get_or_create(
-        user=user,
-        stock=stock,
-        is_active=True,
-        defaults={
-            'shares': shares,
-            'average_buy_price': stock.price,
-            'total_invested': total_cost,
-        }
-    )
+    reference = new_reference("BUY")
+    with transaction.atomic():
+        # Deduct from balance; the balance check is part of the UPDATE, so
+        # concurrent orders can't spend the same money
+        if not debit(user, total_cost, 'stock_buy', reference=reference, memo=f"Bought {shares} {stock.symbol}"):
+            return Response({
+                "success": False,
+                "error": f"Insufficient balance. You need ${total_cost} but only have ${user.balance}",
+                "required": str(total_cost),
+                "current_balance": str(user.balance),
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-    if not created:
-        # Update existing position
-        total_shares = position.shares + shares
-        total_invested = position.total_invested + total_cost
-        position.average_buy_price = total_invested / total_shares
-        position.shares = total_shares
-        position.total_invested = total_invested
-        position.save(update_fields=['shares', 'average_buy_price', 'total_invested'])
-
-    # Create trade history
-    reference = f"BUY-{get_random_string(12).upper()}"
-    TradeHistory.objects.create(
-        user=user,
-        stock=stock,
-        trade_type='buy',
-        shares=shares,
-        price_per_share=stock.price,
-        total_amount=total_cost,
-        reference=reference,
-    )
+        # Get or create position, locked so concurrent buys add up
+        position = UserStockPosition.objects.select_for_update().filter(
+            user=user, stock=stock, is_active=True
+        ).first()
+        if position is None:
+            UserStockPosition.objects.create(
+                user=user,
+                stock=stock,
+                shares=shares,
+                average_buy_price=stock.price,
+                total_invested=total_cost,
+            )
+        else:
+            # Update existing position
+            total_shares = position.shares + shares
+            total_invested = position.total_invested + total_cost
+            position.average_buy_price = total_invested / total_shares
+            position.shares = total_shares
+            position.total_invested = total_invested
+            position.save(update_fields=['shares', 'average_buy_price', 'total_invested', 'updated_at'])
+
+        # Create trade history
+        TradeHistory.objects.create(
+            user=user,
+            stock=stock,
+            trade_type='buy',
+            shares=shares,
+            price_per_share=stock.price,
+            total_amount=total_cost,
+            reference=reference,
+        )
 
     # Create notification
-    Notification.objects.create(
-        user=user,
-        type="trade",
-        title="Stock Purchase Successful",
-        message=f"You bought {shares} shares of {stock.symbol} for ${total_cost}",
-        full_details=f"Your purchase of {shares} shares of {stock.name} ({stock.symbol}) at ${stock.price} per share has been completed. Total cost: ${total_cost}. Reference: {reference}",
+    notify(
+        user,
+        "stock_purchase",
+        {
+            "shares": shares,
+            "symbol": stock.symbol,
+            "name": stock.name,
+            "price": stock.price,
+            "total_cost": total_cost,
+            "reference": reference,
+        },
         metadata={
             "stock": stock.symbol,
             "amount": f"${total_cost}",
             "shares": str(shares),
             "reference": reference,
-        }
+        },
+        source="orders",
     )
 
     return Response({
@@ -230,75 +268,82 @@ def sell_stock(request):
             "error": "Stock not found"
         }, status=status.HTTP_404_NOT_FOUND)
 
-    # Get user position
-    try:
-        position = UserStockPosition.objects.get(user=user, stock=stock, is_active=True)
-    except UserStockPosition.DoesNotExist:
-        return Response({
-            "success": False,
-            "error": "You don't own any shares of this stock"
-        }, status=status.HTTP_400_BAD_REQUEST)
+    with transaction.atomic():
+        # Get user position, locked so concurrent sells can't both pass the check
+        try:
+            position = UserStockPosition.objects.select_for_update().get(user=user, stock=stock, is_active=True)
+        except UserStockPosition.DoesNotExist:
+            return Response({
+                "success": False,
+                "error": "You don't own any shares of this stock"
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-    # Check if user has enough shares
-    if position.shares < shares:
-        return Response({
-            "success": False,
-            "error": f"You only have {position.shares} shares available",
-            "available_shares": str(position.shares),
-        }, status=status.HTTP_400_BAD_REQUEST)
+        # Check if user has enough shares
+        if position.shares < shares:
+            return Response({
+                "success": False,
+                "error": f"You only have {position.shares} shares available",
+                "available_shares": str(position.shares),
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-    # Calculate sale proceeds
-    sale_proceeds = shares * stock.price
+        # Calculate sale proceeds
+        sale_proceeds = shares * stock.price
 
-    # Calculate profit/loss for this sale
-    cost_basis = (position.total_invested / position.shares) * shares
-    profit_loss = sale_proceeds - cost_basis
+        # Calculate profit/loss for this sale
+        cost_basis = (position.total_invested / position.shares) * shares
+        profit_loss = sale_proceeds - cost_basis
 
-    # Add proceeds to balance
-    user.balance += sale_proceeds
-    user.save(update_fields=['balance'])
+        # Add proceeds to balance
+        reference = new_reference("SELL")
+        credit(user, sale_proceeds, 'stock_sell', reference=reference, memo=f"Sold {shares} {stock.symbol}")
 
-    # Update position
-    remaining_shares = position.shares - shares
-    if remaining_shares == 0:
-        # Close position
-        position.is_active = False
-        position.save(update_fields=['is_active'])
-    else:
         # Update position
-        remaining_investment = position.total_invested - cost_basis
-        position.shares = remaining_shares
-        position.total_invested = remaining_investment
-        position.save(update_fields=['shares', 'total_invested'])
-
-    # Create trade history
-    reference = f"SELL-{get_random_string(12).upper()}"
-    TradeHistory.objects.create(
-        user=user,
-        stock=stock,
-        trade_type='sell',
-        shares=shares,
-        price_per_share=stock.price,
-        total_amount=sale_proceeds,
-        profit_loss=profit_loss,
-        reference=reference,
-    )
+        remaining_shares = position.shares - shares
+        if remaining_shares == 0:
+            # Close position
+            position.is_active = False
+            position.save(update_fields=['is_active', 'updated_at'])
+        else:
+            # Update position
+            remaining_investment = position.total_invested - cost_basis
+            position.shares = remaining_shares
+            position.total_invested = remaining_investment
+            position.save(update_fields=['shares', 'total_invested', 'updated_at'])
+
+        # Create trade history
+        TradeHistory.objects.create(
+            user=user,
+            stock=stock,
+            trade_type='sell',
+            shares=shares,
+            price_per_share=stock.price,
+            total_amount=sale_proceeds,
+            profit_loss=profit_loss,
+            reference=reference,
+        )
 
     # Create notification
     profit_loss_text = f"profit of ${profit_loss}" if profit_loss >= 0 else f"loss of ${abs(profit_loss)}"
-    Notification.objects.create(
-        user=user,
-        type="trade",
-        title="Stock Sale Successful",
-        message=f"You sold {shares} shares of {stock.symbol} for ${sale_proceeds} ({profit_loss_text})",
-        full_details=f"Your sale of {shares} shares of {stock.name} ({stock.symbol}) at ${stock.price} per share has been completed. Sale proceeds: ${sale_proceeds}. {profit_loss_text.capitalize()}. Reference: {reference}",
+    notify(
+        user,
+        "stock_sale",
+        {
+            "shares": shares,
+            "symbol": stock.symbol,
+            "name": stock.name,
+            "price": stock.price,
+            "proceeds": sale_proceeds,
+            "result": profit_loss_text,
+            "reference": reference,
+        },
         metadata={
             "stock": stock.symbol,
             "amount": f"${sale_proceeds}",
             "shares": str(shares),
             "profit_loss": str(profit_loss),
             "reference": reference,
-        }
+        },
+        source="orders",
     )
 
     return Response({
@@ -311,6 +356,27 @@ def sell_stock(request):
     })
 
 
+def position_data(position):
+    """API representation of a UserStockPosition (stock must be loaded)"""
+    stock = position.stock
+    return {
+        "id": position.id,
+        "stock": {
+            "symbol": stock.symbol,
+            "name": stock.name,
+            "logo_url": stock.logo_url,
+            "current_price": str(stock.price),
+        },
+        "shares": str(position.shares),
+        "average_buy_price": str(position.average_buy_price),
+        "total_invested": str(position.total_invested),
+        "current_value": str(position.current_value),
+        "profit_loss": str(position.profit_loss),
+        "profit_loss_percent": str(position.profit_loss_percent),
+        "is_positive": position.profit_loss >= 0,
+    }
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def user_positions(request):
@@ -321,27 +387,253 @@ def user_positions(request):
 
     positions = UserStockPosition.objects.filter(user=user, is_active=True).select_related('stock')
 
-    positions_list = []
-    for position in positions:
-        stock = position.stock
-        positions_list.append({
-            "id": position.id,
-            "stock": {
+    positions_list = [position_data(position) for position in positions]
+
+    return Response({
+        "success": True,
+        "positions": positions_list,
+    })
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def batch_order(request):
+    """
+    Execute several buy/sell orders in one request.
+
+    Expects {"orders": [{"symbol": "AAPL", "side": "buy", "shares": "2"}, ...]}.
+    Every leg is validated up front and the legs are applied in order inside a
+    single transaction, so the batch either fully executes or leaves nothing behind.
+    """
+    orders = request.data.get('orders')
+
+    if not isinstance(orders, list) or not orders:
+        return Response({
+            "success": False,
+            "error": "orders must be a non-empty list"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if len(orders) > MAX_BATCH_ORDERS:
+        return Response({
+            "success": False,
+            "error": f"A batch can contain at most {MAX_BATCH_ORDERS} orders"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    # Validate every leg before touching the database
+    legs = []
+    for index, order in enumerate(orders):
+        if not isinstance(order, dict):
+            return Response({
+                "success": False,
+                "error": "Each order must be an object",
+                "leg": index,
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        side = str(order.get('side', '')).strip().lower()
+        symbol = str(order.get('symbol', '')).strip().upper()
+
+        if side not in ('buy', 'sell'):
+            return Response({
+                "success": False,
+                "error": "side must be 'buy' or 'sell'",
+                "leg": index,
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if not symbol:
+            return Response({
+                "success": False,
+                "error": "symbol is required",
+                "leg": index,
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            shares = Decimal(str(order.get('shares', '0')))
+        except (InvalidOperation, ValueError, TypeError):
+            return Response({
+                "success": False,
+                "error": "Invalid shares amount",
+                "leg": index,
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if not shares.is_finite() or shares <= 0:
+            return Response({
+                "success": False,
+                "error": "Shares must be greater than 0",
+                "leg": index,
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        legs.append({"side": side, "symbol": symbol, "shares": shares})
+
+    # Fetch every stock in the batch with one query
+    symbols = {leg["symbol"] for leg in legs}
+    stocks = {
+        stock.symbol: stock
+        for stock in Stock.objects.filter(symbol__in=symbols, is_active=True)
+    }
+    missing = sorted(symbols - set(stocks))
+    if missing:
+        return Response({
+            "success": False,
+            "error": f"Stock not found: {', '.join(missing)}",
+            "symbols": missing,
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    with transaction.atomic():
+        # Lock the account row so concurrent orders can't spend the same balance
+        user = request.user
+        user.account = Account.objects.select_for_update().get(pk=user.pk)
+        positions = {
+            position.stock_id: position
+            for position in UserStockPosition.objects.select_for_update().filter(
+                user=user, stock__in=stocks.values(), is_active=True
+            )
+        }
+        new_positions = []
+        closed_positions = []
+        balance = user.balance
+        trades = []
+        executed = []
+
+        # Apply legs in order against in-memory state; nothing is written until all pass
+        for index, leg in enumerate(legs):
+            stock = stocks[leg["symbol"]]
+            shares = leg["shares"]
+            amount = shares * stock.price
+            position = positions.get(stock.id)
+
+            if leg["side"] == 'buy':
+                if balance < amount:
+                    return Response({
+                        "success": False,
+                        "error": f"Insufficient balance for {stock.symbol}. You need ${amount} but only have ${balance}",
+                        "leg": index,
+                        "required": str(amount),
+                        "current_balance": str(balance),
+                    }, status=status.HTTP_400_BAD_REQUEST)
+
+                balance -= amount
+                if position is None:
+                    position = UserStockPosition(
+                        user=user,
+                        stock=stock,
+                        shares=shares,
+                        average_buy_price=stock.price,
+                        total_invested=amount,
+                    )
+                    positions[stock.id] = position
+                    new_positions.append(position)
+                else:
+                    total_shares = position.shares + shares
+                    total_invested = position.total_invested + amount
+                    position.average_buy_price = total_invested / total_shares
+                    position.shares = total_shares
+                    position.total_invested = total_invested
+                profit_loss = None
+                reference = new_reference("BUY")
+            else:
+                if position is None:
+                    return Response({
+                        "success": False,
+                        "error": f"You don't own any shares of {stock.symbol}",
+                        "leg": index,
+                    }, status=status.HTTP_400_BAD_REQUEST)
+
+                if position.shares < shares:
+                    return Response({
+                        "success": False,
+                        "error": f"You only have {position.shares} shares of {stock.symbol} available",
+                        "leg": index,
+                        "available_shares": str(position.shares),
+                    }, status=status.HTTP_400_BAD_REQUEST)
+
+                cost_basis = (position.total_invested / position.shares) * shares
+                profit_loss = amount - cost_basis
+                balance += amount
+
+                remaining_shares = position.shares - shares
+                if remaining_shares == 0:
+                    position.is_active = False
+                    del positions[stock.id]
+                    closed_positions.append(position)
+                else:
+                    position.shares = remaining_shares
+                    position.total_invested = position.total_invested - cost_basis
+                reference = new_reference("SELL")
+
+            trades.append(TradeHistory(
+                user=user,
+                stock=stock,
+                trade_type=leg["side"],
+                shares=shares,
+                price_per_share=stock.price,
+                total_amount=amount,
+                profit_loss=profit_loss,
+                reference=reference,
+            ))
+            executed.append({
                 "symbol": stock.symbol,
-                "name": stock.name,
-                "logo_url": stock.logo_url,
-                "current_price": str(stock.price),
+                "side": leg["side"],
+                "shares": str(shares),
+                "price_per_share": str(stock.price),
+                "total_amount": str(amount),
+                "profit_loss": str(profit_loss) if profit_loss is not None else None,
+                "reference": reference,
+            })
+
+        # One posting per leg, in leg order, so every trade's reference is in the ledger
+        for index, trade in enumerate(trades, 1):
+            sign, kind = (-1, 'stock_buy') if trade.trade_type == 'buy' else (1, 'stock_sell')
+            post(
+                user, kind,
+                balance=sign * trade.total_amount,
+                reference=trade.reference,
+                memo=f"Batch order leg {index}/{len(trades)}: {trade.trade_type} {trade.shares} {trade.stock.symbol}",
+            )
+
+        UserStockPosition.objects.bulk_create(new_positions)
+        existing_positions = [
+            position
+            for position in list(positions.values()) + closed_positions
+            if position.pk is not None
+        ]
+        if existing_positions:
+            # bulk_update skips auto_now, and delta sync relies on updated_at
+            now = timezone.now()
+            for position in existing_positions:
+                position.updated_at = now
+            UserStockPosition.objects.bulk_update(
+                existing_positions,
+                ['shares', 'average_buy_price', 'total_invested', 'is_active', 'updated_at'],
+            )
+        TradeHistory.objects.bulk_create(trades)
+
+        buys = sum(1 for leg in legs if leg["side"] == 'buy')
+        sells = len(legs) - buys
+        notify(
+            user,
+            "batch_order",
+            {
+                "orders": len(legs),
+                "buys": buys,
+                "sells": sells,
+                "legs": [
+                    {
+                        "symbol": item["symbol"],
+                        "side": item["side"],
+                        "shares": item["shares"],
+                        "price": item["price_per_share"],
+                        "total": item["total_amount"],
+                        "reference": item["reference"],
+                    }
+                    for item in executed
+                ],
             },
-            "shares": str(position.shares),
-            "average_buy_price": str(position.average_buy_price),
-            "total_invested": str(position.total_invested),
-            "current_value": str(position.current_value),
-            "profit_loss": str(position.profit_loss),
-            "profit_loss_percent": str(position.profit_loss_percent),
-            "is_positive": position.profit_loss >= 0,
-        })
+            source="orders",
+        )
 
     return Response({
         "success": True,
-        "positions": positions_list,
+        "message": f"Successfully executed {len(legs)} orders",
+        "orders": executed,
+        "new_balance": str(user.balance),
     })
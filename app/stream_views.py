@@ -0,0 +1,103 @@
+"""
+Server-Sent Events stream for live prices and balances.
+Runs as a native async view and must be served through ASGI
+(uvicorn scoptrade.asgi:application), where idle connections cost no thread.
+The route only exists with REALTIME_STREAM_ENABLED; under WSGI each stream
+would hold a worker, so those requests are refused.
+"""
+
+import asyncio
+import logging
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from .authentication import CookieJWTAuthentication
+from .models import Stock
+from .realtime import PRICES_CHANNEL, broadcaster, encode_event, get_backend, user_channel
+
+logger = logging.getLogger(__name__)
+
+# Seconds between keep-alive comments so proxies don't close idle streams
+HEARTBEAT_INTERVAL = 15
+
+
+def _authenticate(request):
+    try:
+        result = CookieJWTAuthentication().authenticate(request)
+    except Exception:
+        return None
+    return result[0] if result else None
+
+
+def _initial_state(user, symbols):
+    stocks = Stock.objects.filter(is_active=True)
+    if symbols:
+        stocks = stocks.filter(symbol__in=symbols)
+    return {
+        "balance": {
+            "balance": str(user.balance),
+            "profit": str(user.profit),
+        },
+        "prices": [
+            {
+                "symbol": stock.symbol,
+                "price": str(stock.price),
+                "change": str(stock.change),
+                "change_percent": str(stock.change_percent),
+                "is_positive_change": stock.is_positive_change,
+                "is_active": stock.is_active,
+            }
+            for stock in stocks
+        ],
+    }
+
+
+@require_GET
+async def stream_events(request):
+    """
+    Stream price and balance updates.
+    Optional ?symbols=AAPL,MSFT limits the initial price snapshot to those symbols.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({
+            "success": False,
+            "error": "Streaming is only available from the ASGI server."
+        }, status=503)
+
+    user = await sync_to_async(_authenticate)(request)
+    if user is None:
+        return JsonResponse({
+            "success": False,
+            "error": "Authentication credentials were not provided."
+        }, status=401)
+
+    symbols = [
+        s.strip().upper()
+        for s in request.GET.get("symbols", "").split(",")
+        if s.strip()
+    ]
+    await sync_to_async(get_backend().start)()
+
+    async def event_stream():
+        # Subscribe before reading the snapshot so no update falls in between
+        subscription = broadcaster.subscribe([PRICES_CHANNEL, user_channel(user.pk)])
+        try:
+            state = await sync_to_async(_initial_state)(user, symbols)
+            yield "retry: 3000\n\n"
+            yield encode_event("snapshot", state)
+            while True:
+                try:
+                    yield await subscription.get(timeout=HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(event_stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
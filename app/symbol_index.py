@@ -0,0 +1,207 @@
+"""
+Process-local prefix index for symbol search / autocomplete.
+
+Indexes stock, asset and copy-trading market symbols by symbol and by name so
+lookups never touch the database or the cache. The index is built lazily on
+first use and kept current in this process by the Stock/Asset post_save and
+post_delete hooks in models.py; saves that don't change a searchable field
+(price ticks) are ignored. Changes made by other processes are picked up when
+the index is rebuilt, at most INDEX_MAX_AGE seconds later.
+"""
+
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+# Seconds before the index is rebuilt to pick up other processes' changes
+INDEX_MAX_AGE = 300
+
+# When the same symbol comes from several sources the first one wins
+SOURCE_PRIORITY = ("stock", "asset", "stock_choice", "market_choice")
+
+# Lower is better
+RANK_EXACT_SYMBOL = 0
+RANK_SYMBOL_PREFIX = 1
+RANK_NAME_PREFIX = 2
+RANK_WORD_PREFIX = 3
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_CHOICE_SUFFIX_RE = re.compile(r"\s*\([^)]*\)$")
+
+
+def _normalize(text):
+    return " ".join((text or "").lower().split())
+
+
+def _terms(entry):
+    """Return {term: rank} for everything an entry should be found by"""
+    symbol = _normalize(entry["symbol"])
+    name = _normalize(entry["name"])
+    terms = {symbol: RANK_SYMBOL_PREFIX}
+    compact = "".join(_WORD_RE.findall(symbol))
+    if compact and compact != symbol:
+        terms.setdefault(compact, RANK_SYMBOL_PREFIX)
+    if name:
+        terms.setdefault(name, RANK_NAME_PREFIX)
+        for word in _WORD_RE.findall(name):
+            terms.setdefault(word, RANK_WORD_PREFIX)
+    return terms
+
+
+class SymbolIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built_at = None
+        self._sources = {source: {} for source in SOURCE_PRIORITY}
+        self._entries = {}
+        self._terms = {}
+        self._keys = []
+
+    # -- building ---------------------------------------------------------
+
+    def build(self):
+        from .models import Asset, Stock, UserCopyTraderHistory
+
+        sources = {source: {} for source in SOURCE_PRIORITY}
+        for symbol, label in Stock.SYMBOL_CHOICES:
+            sources["stock_choice"][symbol] = {
+                "symbol": symbol,
+                "name": _CHOICE_SUFFIX_RE.sub("", label),
+                "type": "stock",
+                "category": "Stocks",
+            }
+        for symbol, name in UserCopyTraderHistory.MARKET_CHOICES:
+            sources["market_choice"][symbol] = {
+                "symbol": symbol,
+                "name": name,
+                "type": "market",
+                "category": None,
+            }
+        for stock in Stock.objects.filter(is_active=True).only("symbol", "name", "sector"):
+            sources["stock"][stock.symbol] = self._stock_entry(stock)
+        for asset in Asset.objects.only("symbol", "category"):
+            sources["asset"][asset.symbol] = self._asset_entry(asset)
+
+        with self._lock:
+            self._sources = sources
+            self._entries = {}
+            self._terms = {}
+            self._keys = []
+            for symbol in {s for entries in sources.values() for s in entries}:
+                self._reindex(symbol)
+            self._built_at = time.monotonic()
+
+    def _ensure_current(self):
+        if self._built_at is None or time.monotonic() - self._built_at > INDEX_MAX_AGE:
+            self.build()
+
+    def _reindex(self, symbol):
+        """Recompute the resolved entry and search terms for one symbol"""
+        for term in self._terms.pop(symbol, {}):
+            position = bisect_left(self._keys, (term, symbol))
+            if position < len(self._keys) and self._keys[position] == (term, symbol):
+                del self._keys[position]
+        self._entries.pop(symbol, None)
+
+        for source in SOURCE_PRIORITY:
+            entry = self._sources[source].get(symbol)
+            if entry is not None:
+                break
+        else:
+            return
+
+        terms = _terms(entry)
+        self._entries[symbol] = entry
+        self._terms[symbol] = terms
+        for term in terms:
+            insort(self._keys, (term, symbol))
+
+    # -- incremental updates ----------------------------------------------
+
+    @staticmethod
+    def _stock_entry(stock):
+        return {
+            "pk": stock.pk,
+            "symbol": stock.symbol,
+            "name": stock.name,
+            "type": "stock",
+            "category": stock.sector or "Stocks",
+        }
+
+    @staticmethod
+    def _asset_entry(asset):
+        return {
+            "pk": asset.pk,
+            "symbol": asset.symbol,
+            "name": asset.symbol,
+            "type": "asset",
+            "category": asset.category,
+        }
+
+    def _update(self, source, key, entry):
+        with self._lock:
+            if self._built_at is None:
+                return
+            if entry is not None and self._sources[source].get(entry["symbol"]) == entry:
+                # Nothing searchable changed, e.g. a price update
+                return
+            previous = next(
+                (s for s, e in self._sources[source].items() if e.get("pk") == key),
+                None,
+            )
+            if previous is not None:
+                del self._sources[source][previous]
+                self._reindex(previous)
+            if entry is not None:
+                self._sources[source][entry["symbol"]] = entry
+                self._reindex(entry["symbol"])
+
+    def stock_saved(self, stock):
+        self._update("stock", stock.pk, self._stock_entry(stock) if stock.is_active else None)
+
+    def stock_deleted(self, stock):
+        self._update("stock", stock.pk, None)
+
+    def asset_saved(self, asset):
+        self._update("asset", asset.pk, self._asset_entry(asset))
+
+    def asset_deleted(self, asset):
+        self._update("asset", asset.pk, None)
+
+    # -- querying ---------------------------------------------------------
+
+    def search(self, query, limit=10):
+        query = _normalize(query)
+        if not query:
+            return []
+
+        with self._lock:
+            self._ensure_current()
+            best = {}
+            position = bisect_left(self._keys, (query,))
+            while position < len(self._keys):
+                term, symbol = self._keys[position]
+                if not term.startswith(query):
+                    break
+                rank = self._terms[symbol][term]
+                if rank == RANK_SYMBOL_PREFIX and term == query:
+                    rank = RANK_EXACT_SYMBOL
+                if rank < best.get(symbol, rank + 1):
+                    best[symbol] = rank
+                position += 1
+
+            ranked = sorted(best.items(), key=lambda item: (item[1], len(item[0]), item[0]))
+            results = []
+            for symbol, rank in ranked[:limit]:
+                entry = self._entries[symbol]
+                results.append({
+                    "symbol": entry["symbol"],
+                    "name": entry["name"],
+                    "type": entry["type"],
+                    "category": entry["category"],
+                })
+            return results
+
+
+symbol_index = SymbolIndex()
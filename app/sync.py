@@ -0,0 +1,236 @@
+"""
+Delta sync.
+
+A client keeps a local copy of its notifications, positions, transactions and
+copied trades and asks only for what changed since its last sync. Every synced
+model carries an indexed updated_at; each kind is paged by (updated_at, id)
+so rows changed in the same instant are never skipped, and deletions are
+recorded as SyncTombstone rows that are kept for SYNC_TOMBSTONE_DAYS.
+
+The `since` token handed back to the client holds the server time of the
+sync plus a keyset position per kind. Positions restart SYNC_OVERLAP before
+that time so rows written by transactions still in flight are picked up on
+the next sync (clients upsert by id, so repeats are harmless). It also carries
+the backfill still owed for newly copied traders: their ids and a keyset
+position over their trades.
+"""
+
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .batching import buffer_until_commit
+from .models import (
+    Notification,
+    SyncTombstone,
+    Transaction,
+    UserCopyTraderHistory,
+    UserStockPosition,
+    UserTraderCopy,
+)
+from .pagination import InvalidCursor, decode_raw_cursor, encode_cursor, keyset_page
+
+# Rows returned per kind in one sync; clients call again while has_more is set
+SYNC_PAGE_SIZE = 500
+
+# Tombstones older than this are pruned; clients further behind get a full resync
+SYNC_TOMBSTONE_DAYS = 30
+
+SYNC_OVERLAP = timedelta(seconds=5)
+
+SYNC_KINDS = ('notifications', 'positions', 'transactions', 'copies', 'copy_trades', 'deleted')
+
+
+# -- tombstones ---------------------------------------------------------------
+
+_state = threading.local()
+
+
+@contextmanager
+def tombstones_suppressed():
+    """
+    Delete rows inside the block without recording tombstones: for retention
+    jobs that archive history rather than delete it from the user's view.
+    """
+    previous = getattr(_state, 'suppressed', False)
+    _state.suppressed = True
+    try:
+        yield
+    finally:
+        _state.suppressed = previous
+
+
+def _write_tombstones(tombstones):
+    SyncTombstone.objects.bulk_create(tombstones)
+
+
+def record_deletion(kind, object_id, user_id=None, trader_id=None):
+    """Queue a tombstone for a deleted row, written when the transaction commits"""
+    if getattr(_state, 'suppressed', False):
+        return
+    buffer_until_commit(_write_tombstones, [
+        SyncTombstone(kind=kind, object_id=object_id, user_id=user_id, trader_id=trader_id)
+    ])
+
+
+def expired_tombstones():
+    """Tombstones old enough that no client can still need them"""
+    cutoff = timezone.now() - timedelta(days=SYNC_TOMBSTONE_DAYS)
+    return SyncTombstone.objects.filter(deleted_at__lt=cutoff)
+
+
+# -- since tokens -------------------------------------------------------------
+
+def _start_position(at):
+    return encode_cursor([at, 0])
+
+
+def _parse_time(value):
+    try:
+        return parse_datetime(value)
+    except ValueError:
+        # Well-formed but impossible, e.g. month 13
+        raise InvalidCursor("Invalid since token")
+
+
+def _decode_backfill(value):
+    """(trader ids, keyset cursor or None) from a token's backfill part"""
+    if not value:
+        return [], None
+    trader_ids, cursor = decode_raw_cursor(value, 2)
+    if (
+        not isinstance(trader_ids, list)
+        or not all(isinstance(trader_id, int) for trader_id in trader_ids)
+        or not (cursor is None or isinstance(cursor, str))
+    ):
+        raise InvalidCursor("Invalid since token")
+    return trader_ids, cursor
+
+
+def decode_since(since):
+    """
+    Return (synced_at, {kind: cursor}, backfill) for a since value: either a
+    token from a previous sync or a plain ISO datetime. backfill is
+    (trader ids, cursor) for trades still owed. Raises InvalidCursor otherwise.
+    """
+    at = _parse_time(since)
+    if at is not None:
+        if timezone.is_naive(at):
+            at = timezone.make_aware(at)
+        return at, {kind: _start_position(at) for kind in SYNC_KINDS}, ([], None)
+
+    try:
+        values = decode_raw_cursor(since, len(SYNC_KINDS) + 2)
+    except InvalidCursor:
+        # Tokens issued before backfill was paged have no backfill part
+        values = decode_raw_cursor(since, len(SYNC_KINDS) + 1) + [""]
+    at = _parse_time(values[0]) if isinstance(values[0], str) else None
+    if at is None or not all(isinstance(value, str) for value in values[1:]):
+        raise InvalidCursor("Invalid since token")
+    positions = dict(zip(SYNC_KINDS, values[1:-1]))
+    return at, positions, _decode_backfill(values[-1])
+
+
+def encode_since(synced_at, positions, backfill=([], None)):
+    trader_ids, cursor = backfill
+    pending = encode_cursor([trader_ids, cursor]) if trader_ids else ""
+    return encode_cursor([synced_at, *(positions[kind] for kind in SYNC_KINDS), pending])
+
+
+# -- changes ------------------------------------------------------------------
+
+def _sources(user, trader_ids):
+    """(queryset, time field) per kind, scoped to what the user can see"""
+    return {
+        'notifications': (Notification.objects.filter(user=user), 'updated_at'),
+        'positions': (
+            UserStockPosition.objects.filter(user=user).select_related('stock'), 'updated_at'
+        ),
+        'transactions': (Transaction.objects.filter(user=user), 'updated_at'),
+        'copies': (
+            UserTraderCopy.objects.filter(user=user).select_related('trader'), 'last_updated'
+        ),
+        'copy_trades': (
+            UserCopyTraderHistory.objects.filter(trader_id__in=trader_ids), 'updated_at'
+        ),
+        'deleted': (
+            SyncTombstone.objects.filter(
+                Q(user_id=user.pk) | Q(kind='copy_trade', trader_id__in=trader_ids)
+            ),
+            'deleted_at',
+        ),
+    }
+
+
+def changes_since(user, since=None, limit=SYNC_PAGE_SIZE):
+    """
+    Collect the user's rows changed since a previous sync.
+
+    Returns a dict with one list of model instances per kind in SYNC_KINDS,
+    plus "backfill" (trades of copies that changed, since a new copy needs
+    the trader's full history; paged like the other kinds), "since" (the
+    token for the next call), "has_more" and "reset". With no since, or one
+    older than the tombstone retention, everything is returned from the start
+    and reset is True. Raises InvalidCursor for a malformed since.
+    """
+    started = timezone.now()
+    positions = {}
+    pending, backfill_cursor = [], None
+    reset = True
+    if since:
+        synced_at, positions, (pending, backfill_cursor) = decode_since(since)
+        reset = synced_at < started - timedelta(days=SYNC_TOMBSTONE_DAYS)
+        if reset:
+            positions, pending, backfill_cursor = {}, [], None
+
+    trader_ids = list(
+        UserTraderCopy.objects.filter(user=user, is_actively_copying=True)
+        .values_list('trader_id', flat=True)
+    )
+
+    changes = {}
+    next_positions = {}
+    has_more = False
+    restart = _start_position(started - SYNC_OVERLAP)
+    for kind, (queryset, field) in _sources(user, trader_ids).items():
+        rows, next_cursor = keyset_page(queryset, (field, 'id'), positions.get(kind), limit)
+        changes[kind] = rows
+        if next_cursor is None:
+            next_positions[kind] = restart
+        else:
+            next_positions[kind] = next_cursor
+            has_more = True
+
+    # A full sync already walks every trade through copy_trades
+    backfill = []
+    next_backfill = ([], None)
+    if not reset:
+        changed_traders = {
+            copy.trader_id for copy in changes['copies'] if copy.is_actively_copying
+        }
+        if not changed_traders <= set(pending):
+            # New traders may sort before the current position, so start over;
+            # trades already sent are upserted again, which is harmless
+            pending, backfill_cursor = sorted(changed_traders | set(pending)), None
+        # Traders the user stopped copying meanwhile are dropped
+        pending = [trader_id for trader_id in pending if trader_id in trader_ids]
+        if pending:
+            backfill, next_cursor = keyset_page(
+                UserCopyTraderHistory.objects.filter(trader_id__in=pending),
+                ('trader_id', 'id'), backfill_cursor, limit,
+            )
+            if next_cursor is not None:
+                next_backfill = (pending, next_cursor)
+                has_more = True
+
+    return {
+        **changes,
+        'backfill': backfill,
+        'since': encode_since(started, next_positions, next_backfill),
+        'has_more': has_more,
+        'reset': reset,
+    }
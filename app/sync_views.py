@@ -0,0 +1,120 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+
+from .copy_trading_views import copy_trade_data
+from .notification_service import broadcast_read_ids, visible_broadcasts
+from .notification_templates import render_notification
+from .pagination import InvalidCursor
+from .stock_views import position_data
+from .sync import changes_since
+from .views import transaction_data
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def sync(request):
+    """
+    Delta sync for offline-first clients.
+
+    Call without ?since= for a full sync, then pass back the returned "since"
+    token to receive only rows created, updated or deleted after it. Keep
+    calling while has_more is true. When reset is true the client should drop
+    its local copy before applying the rows (its token was too old to replay).
+    Rows are upserts by id; "deleted" lists {kind, id} pairs to remove, and
+    trades of copies with is_actively_copying false should be dropped.
+    """
+    user = request.user
+    since = request.GET.get("since", "").strip()
+
+    try:
+        changes = changes_since(user, since or None)
+    except InvalidCursor as e:
+        return Response({
+            "success": False,
+            "error": str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    copies = {copy.trader_id: copy for copy in changes["copies"] if copy.is_actively_copying}
+    missing = {
+        trade.trader_id for trade in [*changes["copy_trades"], *changes["backfill"]]
+    } - copies.keys()
+    if missing:
+        copies.update(
+            (copy.trader_id, copy)
+            for copy in user.copied_traders.filter(trader_id__in=missing).select_related("trader")
+        )
+    copy_trades = {trade.id: trade for trade in changes["backfill"]}
+    copy_trades.update((trade.id, trade) for trade in changes["copy_trades"])
+
+    # Broadcasts are few and cached, so the whole visible set is sent each time
+    broadcasts = visible_broadcasts(user)
+    read_ids = broadcast_read_ids(user, broadcasts)
+
+    return Response({
+        "success": True,
+        "since": changes["since"],
+        "has_more": changes["has_more"],
+        "reset": changes["reset"],
+        "unread_count": user.unread_notification_count + len(broadcasts) - len(read_ids),
+        "notifications": [
+            {
+                "id": n.id,
+                "type": n.type,
+                **render_notification(n),
+                "metadata": n.metadata,
+                "count": n.count,
+                "read": n.read,
+                "created_at": n.created_at.isoformat(),
+                "updated_at": n.updated_at.isoformat(),
+            }
+            for n in changes["notifications"]
+        ],
+        "broadcasts": [
+            {
+                "id": b["id"],
+                "type": b["type"],
+                "title": b["title"],
+                "message": b["message"],
+                "full_details": b["full_details"],
+                "metadata": b["metadata"],
+                "read": b["id"] in read_ids,
+                "created_at": b["created_at"].isoformat(),
+            }
+            for b in broadcasts
+        ],
+        "positions": [
+            {
+                **position_data(position),
+                "is_active": position.is_active,
+                "updated_at": position.updated_at.isoformat(),
+            }
+            for position in changes["positions"]
+        ],
+        "transactions": [
+            {**transaction_data(t), "updated_at": t.updated_at.isoformat()}
+            for t in changes["transactions"]
+        ],
+        "copies": [
+            {
+                "id": copy.id,
+                "trader_id": copy.trader_id,
+                "trader_name": copy.trader.name,
+                "is_actively_copying": copy.is_actively_copying,
+                "initial_investment_amount": str(copy.initial_investment_amount),
+                "started_copying_at": copy.started_copying_at.isoformat(),
+                "stopped_copying_at": copy.stopped_copying_at.isoformat() if copy.stopped_copying_at else None,
+                "updated_at": copy.last_updated.isoformat(),
+            }
+            for copy in changes["copies"]
+        ],
+        "copy_trades": [
+            {**copy_trade_data(trade, copies[trade.trader_id]), "updated_at": trade.updated_at.isoformat()}
+            for trade in copy_trades.values()
+        ],
+        "deleted": [
+            {"kind": t.kind, "id": t.object_id, "deleted_at": t.deleted_at.isoformat()}
+            for t in changes["deleted"]
+        ],
+    })
@@ -1,3 +1,332 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .ledger import (
+    InsufficientFunds,
+    adjust_to,
+    credit,
+    current_balances,
+    debit,
+    post,
+    reconcile,
+    take_snapshots,
+    unbalanced_postings,
+)
+from .models import Account, BalanceSnapshot, CustomUser, LedgerEntry, News, Notification, Stock, TradeHistory
+from .news_ingest import InvalidArticle, article_from_row, ingest_chunk
+from .notification_service import NOTIFICATION_ORDERING, mark_all_read, notify, notify_many
+from .notification_templates import render_notification
+from .pagination import InvalidCursor, encode_cursor, keyset_page
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='ledger@example.com', password='password')
+        adjust_to(self.user, 'balance', Decimal('100.00'))
+
+    def stored(self):
+        return Account.objects.values_list('balance', 'profit').get(pk=self.user.pk)
+
+    def test_postings_balance_and_update_the_columns(self):
+        post(self.user, 'deposit', balance=Decimal('50.00'), reference='DEP-1')
+        post(self.user, 'transfer', balance=Decimal('-30.00'), profit=Decimal('30.00'))
+
+        self.assertEqual(self.stored(), (Decimal('120.00'), Decimal('30.00')))
+        self.assertEqual(self.user.balance, Decimal('120.00'))
+        for posting in LedgerEntry.objects.values_list('posting', flat=True).distinct():
+            total = LedgerEntry.objects.filter(posting=posting).aggregate(total=Sum('amount'))['total']
+            self.assertEqual(total, 0)
+        self.assertEqual(unbalanced_postings(), [])
+        # The transfer's legs cancel out, so it has no house-account leg
+        self.assertEqual(
+            set(LedgerEntry.objects.filter(kind='transfer').values_list('account', flat=True)),
+            {'balance', 'profit'},
+        )
+
+    def test_guarded_post_refuses_to_go_negative(self):
+        entries = LedgerEntry.objects.count()
+        with self.assertRaises(InsufficientFunds):
+            post(self.user, 'transfer', balance=Decimal('10.00'), profit=Decimal('-10.00'), guard=True)
+        self.assertEqual(self.stored(), (Decimal('100.00'), Decimal('0.00')))
+        self.assertEqual(LedgerEntry.objects.count(), entries)
+
+    def test_money_cannot_be_set_on_the_user(self):
+        for field in ('balance', 'profit'):
+            with self.subTest(field=field), self.assertRaisesMessage(AttributeError, 'app.ledger.post()'):
+                setattr(self.user, field, Decimal('1.00'))
+        self.user.save()
+        self.assertEqual(self.stored(), (Decimal('100.00'), Decimal('0.00')))
+
+    def test_debit_only_spends_what_is_there(self):
+        entries = LedgerEntry.objects.count()
+        self.assertFalse(debit(self.user, Decimal('100.01'), 'stock_buy'))
+        self.assertEqual(LedgerEntry.objects.count(), entries)
+        self.assertEqual(self.user.balance, Decimal('100.00'))
+
+        self.assertTrue(debit(self.user, Decimal('100.00'), 'stock_buy', reference='BUY-1'))
+        self.assertEqual(self.stored()[0], Decimal('0.00'))
+        self.assertFalse(debit(self.user, Decimal('0.01'), 'stock_buy'))
+
+        credit(self.user, Decimal('5.00'), 'stock_sell')
+        self.assertEqual(self.user.balance, Decimal('5.00'))
+        self.assertEqual(unbalanced_postings(), [])
+
+    def test_snapshots_and_ledger_balances_agree_with_the_columns(self):
+        post(self.user, 'deposit', balance=Decimal('25.00'))
+        post(self.user, 'earning', profit=Decimal('7.50'))
+        later = timezone.now() + timedelta(minutes=10)
+
+        self.assertEqual(take_snapshots(now=later), 1)
+        snapshot = BalanceSnapshot.objects.get(user=self.user)
+        self.assertEqual((snapshot.balance, snapshot.profit), self.stored())
+        # Nothing new since the last snapshot
+        self.assertEqual(take_snapshots(now=later), 0)
+
+        debit(self.user, Decimal('40.00'), 'stock_buy')
+        self.assertEqual(current_balances(self.user.pk), self.stored())
+        self.assertEqual(list(reconcile()), [])
+        self.assertEqual(list(reconcile(full=True)), [])
+
+    def test_reconcile_reports_a_column_changed_behind_the_ledger(self):
+        Account.objects.filter(pk=self.user.pk).update(balance=Decimal('1.00'))
+        mismatches = list(reconcile())
+        self.assertEqual(len(mismatches), 1)
+        user_id, email, balance, ledger_balance, profit, ledger_profit = mismatches[0]
+        self.assertEqual((user_id, balance, ledger_balance), (self.user.pk, Decimal('1.00'), Decimal('100.00')))
+
+
+class BatchOrderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(email='batch@example.com', password='password')
+        adjust_to(cls.user, 'balance', Decimal('1000.00'))
+        for symbol, price in (('AAPL', '10.00'), ('MSFT', '20.00')):
+            Stock.objects.create(symbol=symbol, name=symbol, price=Decimal(price), change=0, change_percent=0)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_every_leg_is_posted_with_its_reference(self):
+        orders = [
+            {'symbol': 'AAPL', 'side': 'buy', 'shares': '2'},
+            {'symbol': 'MSFT', 'side': 'buy', 'shares': '1'},
+            {'symbol': 'AAPL', 'side': 'sell', 'shares': '1'},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/auth/stocks/orders/batch/', {'orders': orders}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['new_balance'], '970.00')
+
+        references = list(TradeHistory.objects.filter(user=self.user).order_by('id').values_list('reference', flat=True))
+        posted = LedgerEntry.objects.filter(user=self.user, account='balance', kind__in=('stock_buy', 'stock_sell'))
+        self.assertEqual(sorted(posted.values_list('reference', flat=True)), sorted(references))
+        self.assertEqual(unbalanced_postings(), [])
+        self.assertEqual(list(reconcile(full=True)), [])
+
+        notification = Notification.objects.get(user=self.user)
+        self.assertEqual(
+            notification.params['legs'][0],
+            {'symbol': 'AAPL', 'side': 'buy', 'shares': '2', 'price': '10.00', 'total': '20.00', 'reference': references[0]},
+        )
+        self.assertEqual(notification.metadata, {})
+        self.assertEqual(
+            render_notification(notification)['full_details'].splitlines()[0],
+            f'BUY 2 AAPL at $10.00 = $20.00 (Reference: {references[0]})',
+        )
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(email='pages@example.com', password='password')
+        Notification.objects.bulk_create(
+            Notification(user=cls.user, type='system', title=f'n{i}') for i in range(7)
+        )
+        # Same timestamp for most rows, so the id tiebreaker decides the order
+        now = timezone.now()
+        ids = list(Notification.objects.filter(user=cls.user).order_by('id').values_list('id', flat=True))
+        Notification.objects.filter(id__in=ids[:5]).update(created_at=now)
+        Notification.objects.filter(id__in=ids[5:]).update(created_at=now - timedelta(minutes=1))
+        cls.expected = ids[:5][::-1] + ids[5:][::-1]
+
+    def test_pages_cover_every_row_once_in_order(self):
+        queryset = Notification.objects.filter(user=self.user)
+        seen, cursor, pages = [], None, 0
+        while True:
+            rows, cursor = keyset_page(queryset, NOTIFICATION_ORDERING, cursor, limit=3)
+            seen += [row.id for row in rows]
+            pages += 1
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(pages, 3)
+
+    def test_rows_added_ahead_of_the_cursor_do_not_shift_later_pages(self):
+        queryset = Notification.objects.filter(user=self.user)
+        first, cursor = keyset_page(queryset, NOTIFICATION_ORDERING, None, limit=3)
+        Notification.objects.create(user=self.user, type='system', title='newest')
+        second, _ = keyset_page(queryset, NOTIFICATION_ORDERING, cursor, limit=3)
+        self.assertEqual([row.id for row in first + second], self.expected[:6])
+
+    def test_bad_cursors_raise_invalid_cursor(self):
+        queryset = Notification.objects.filter(user=self.user)
+        for cursor in ('junk', encode_cursor(['2024-01-01T00:00:00']), encode_cursor(['not a date', 1])):
+            with self.subTest(cursor=cursor), self.assertRaises(InvalidCursor):
+                keyset_page(queryset, NOTIFICATION_ORDERING, cursor, limit=3)
+
+
+class NotificationListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(email='feed@example.com', password='password')
+        for i in range(5):
+            Notification.objects.create(user=cls.user, type='system', title=f'n{i}')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_cursor_and_offset_pages(self):
+        first = self.client.get('/api/auth/notifications/', {'limit': 2}).json()
+        self.assertEqual(first['total_count'], 5)
+        self.assertTrue(first['has_more'])
+
+        by_cursor = self.client.get('/api/auth/notifications/', {'limit': 2, 'cursor': first['next_cursor']}).json()
+        by_offset = self.client.get('/api/auth/notifications/', {'limit': 2, 'offset': 2}).json()
+        self.assertEqual(by_offset['offset'], 2)
+        self.assertNotIn('total_count', by_cursor)
+        self.assertEqual(
+            [n['id'] for n in by_cursor['notifications']],
+            [n['id'] for n in by_offset['notifications']],
+        )
+
+    def test_offset_is_capped(self):
+        response = self.client.get('/api/auth/notifications/', {'offset': 10 ** 6}).json()
+        self.assertEqual(response['offset'], 1000)
+        self.assertEqual(response['notifications'], [])
+
+    def test_bad_cursor_is_a_bad_request(self):
+        for cursor in ('junk', encode_cursor(['2020-13-45T00:00:00', 'personal', 1])):
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/auth/notifications/', {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+
+
+class NotificationCoalescingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(email='burst@example.com', password='password')
+        cls.other = CustomUser.objects.create_user(email='other@example.com', password='password')
+
+    def order(self, i):
+        notify(self.user, 'stock_purchase', {'shares': 1, 'symbol': 'AAPL', 'reference': f'BUY-{i}'},
+               metadata={'reference': f'BUY-{i}'}, source='orders')
+
+    def unread_counter(self, user):
+        return Account.objects.get(pk=user.pk).unread_notification_count
+
+    def test_burst_in_one_transaction_becomes_one_row(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(5):
+                self.order(i)
+        row = Notification.objects.get(user=self.user)
+        self.assertEqual(row.count, 5)
+        self.assertEqual(row.params['reference'], 'BUY-4')
+        self.assertEqual([event['reference'] for event in row.metadata['events']], [f'BUY-{i}' for i in range(5)])
+        self.assertEqual(self.unread_counter(self.user), 1)
+
+    def test_later_events_merge_into_the_unread_row(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order(0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order(1)
+            self.order(2)
+        self.assertEqual(list(Notification.objects.filter(user=self.user).values_list('count', flat=True)), [3])
+        self.assertEqual(self.unread_counter(self.user), 1)
+
+    def test_read_rows_and_other_sources_are_left_alone(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order(0)
+        mark_all_read(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order(1)
+            notify(self.user, 'kyc_approved')
+            notify_many([self.user, self.other], 'kyc_approved', source='kyc')
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(Notification.objects.filter(user=self.other).count(), 1)
+        self.assertEqual(self.unread_counter(self.user), 3)
+
+    def test_rolled_back_savepoint_drops_its_events(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order(0)
+            try:
+                with transaction.atomic():
+                    self.order(1)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            self.order(2)
+        row = Notification.objects.get(user=self.user)
+        self.assertEqual(row.count, 2)
+        self.assertEqual([event['reference'] for event in row.metadata['events']], ['BUY-0', 'BUY-2'])
+
+
+class NewsIngestTests(TestCase):
+    ROW = {
+        'title': 'Apple Beats Estimates',
+        'summary': 'Quarterly results.',
+        'content': 'Revenue rose.',
+        'category': 'Stocks',
+        'source': 'Financial Times',
+        'author': 'Sarah Johnson',
+        'published_at': '2024-01-02T10:00:00Z',
+        'tags': ['Apple'],
+    }
+
+    def ingest(self, *rows):
+        return ingest_chunk([article_from_row({**self.ROW, **row}) for row in rows])
+
+    def test_create_update_and_unchanged_counts(self):
+        self.assertEqual(self.ingest({}, {'title': 'Oil Slips'}), (2, 0, 0))
+        self.assertEqual(self.ingest({}, {'title': 'Oil Slips'}), (0, 0, 2))
+        self.assertEqual(self.ingest({'content': 'Revenue rose 8%.'}, {'title': 'Oil Slips'}), (0, 1, 1))
+        self.assertEqual(News.objects.get(title='Apple Beats Estimates').content, 'Revenue rose 8%.')
+        self.assertEqual(News.objects.count(), 2)
+
+    def test_titles_match_after_normalization(self):
+        self.ingest({})
+        self.assertEqual(self.ingest({'title': 'apple  beats estimates'}), (0, 0, 1))
+        self.assertEqual(self.ingest({'title': 'APPLE BEATS ESTIMATES', 'summary': 'Revised.'}), (0, 1, 0))
+        self.assertEqual(News.objects.count(), 1)
+
+    def test_every_ingested_field_counts_as_a_change(self):
+        self.ingest({})
+        changes = [
+            {'is_featured': True},
+            {'is_featured': True, 'author': 'Someone Else'},
+            {'is_featured': True, 'author': 'Someone Else', 'source': 'Bloomberg'},
+            {'is_featured': True, 'author': 'Someone Else', 'source': 'Bloomberg',
+             'published_at': '2024-01-03T10:00:00Z'},
+        ]
+        for change in changes:
+            with self.subTest(change=change):
+                self.assertEqual(self.ingest(change), (0, 1, 0))
+        article = News.objects.get()
+        self.assertTrue(article.is_featured)
+        self.assertEqual(article.source, 'Bloomberg')
+
+    def test_later_duplicates_in_a_chunk_win(self):
+        self.assertEqual(self.ingest({}, {'title': 'apple beats estimates', 'summary': 'Later.'}), (1, 0, 1))
+        self.assertEqual(News.objects.get().summary, 'Later.')
 
-# Create your tests here.
+    def test_invalid_rows_are_rejected(self):
+        for row in ({'title': ''}, {'category': 'Gossip'}, {'published_at': '2020-13-45T00:00:00'}):
+            with self.subTest(row=row), self.assertRaises(InvalidArticle):
+                article_from_row({**self.ROW, **row})
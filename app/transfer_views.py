@@ -3,6 +3,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from decimal import Decimal, InvalidOperation
+from .ledger import InsufficientFunds, post
 
 
 @api_view(["GET"])
@@ -63,24 +64,15 @@ def make_transfer(request):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    if direction == "balance_to_profit":
-        if amount > user.balance:
-            return Response(
-                {"error": "Insufficient balance."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        user.balance -= amount
-        user.profit += amount
-    else:
-        if amount > user.profit:
-            return Response(
-                {"error": "Insufficient profit."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        user.profit -= amount
-        user.balance += amount
-
-    user.save(update_fields=["balance", "profit"])
+    # The source is checked inside the UPDATE, so concurrent transfers can't overdraw it
+    moved = -amount if direction == "balance_to_profit" else amount
+    try:
+        post(user, "transfer", balance=moved, profit=-moved, memo=direction.replace("_", " "), guard=True)
+    except InsufficientFunds:
+        return Response(
+            {"error": "Insufficient balance." if moved < 0 else "Insufficient profit."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
 
     return Response({
         "message": "Transfer successful.",
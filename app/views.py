@@ -3,7 +3,6 @@ Deposit & Withdrawal Views
 HTTPOnly Cookie-based Token Authentication
 """
 
-import random
 from django.utils import timezone
 from rest_framework.decorators import api_view, permission_classes, parser_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
@@ -11,8 +10,17 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 from rest_framework import status
 
-from .models import AdminWallet, Transaction, PaymentMethod, Notification
+from .models import AdminWallet, Transaction, PaymentMethod
+from .notification_service import notify
+from .references import new_reference
 from .email_service import send_admin_payment_intent_notification
+from .pagination import InvalidCursor, keyset_page
+
+# Largest page the history endpoints will return
+MAX_HISTORY_LIMIT = 100
+
+# Matches the (user, [transaction_type,] -created_at, -id) indexes on Transaction
+HISTORY_ORDERING = ("-created_at", "-id")
 
 
 # ============================================================
@@ -84,7 +92,7 @@ def create_deposit(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
     # Create transaction (status=pending, balance NOT touched)
-    reference = f"DEP-{random.randint(100000, 999999)}-{user.id}"
+    reference = new_reference("DEP")
 
     transaction = Transaction.objects.create(
         user=user,
@@ -99,12 +107,15 @@ def create_deposit(request):
     )
 
     # Create notification
-    Notification.objects.create(
-        user=user,
-        type="deposit",
-        title="Deposit Request Submitted",
-        message=f"Your deposit of ${amount:.2f} via {currency} is pending approval.",
-        full_details=f"Deposit reference: {reference}. Amount: ${amount:.2f}. Currency: {currency}. Unit: {currency_unit}. This deposit is pending admin approval.",
+    notify(
+        user,
+        "deposit_submitted",
+        {
+            "amount": f"{amount:.2f}",
+            "currency": currency,
+            "unit": currency_unit,
+            "reference": reference,
+        },
         metadata={
             "amount": str(amount),
             "currency": currency,
@@ -152,47 +163,69 @@ def deposit_payment_intent(request):
     })
 
 
-@api_view(["GET"])
-@permission_classes([IsAuthenticated])
-def get_deposit_history(request):
-    """Get user's deposit transaction history."""
-    user = request.user
-    limit = int(request.GET.get("limit", 10))
-
-    transactions = Transaction.objects.filter(
-        user=user,
-        transaction_type="deposit",
-    ).order_by("-created_at")[:limit]
+def transaction_data(t):
+    """API representation of a deposit or withdrawal Transaction"""
+    receipt_url = None
+    if t.receipt:
+        try:
+            receipt_url = t.receipt.url
+        except Exception:
+            receipt_url = None
+
+    return {
+        "id": t.id,
+        "reference": t.reference,
+        "transaction_type": t.transaction_type,
+        "transaction_type_display": t.get_transaction_type_display(),
+        "amount": str(t.amount),
+        "currency": t.currency,
+        "unit": str(t.unit),
+        "status": t.status,
+        "status_display": t.get_status_display(),
+        "created_at": t.created_at.isoformat(),
+        "receipt_url": receipt_url,
+    }
+
+
+def _history_page(request, transactions, serialize, default_limit):
+    """
+    One page of transaction history, newest first. Pages by cursor on
+    (created_at, id): pass the returned next_cursor as ?cursor= for the next page.
+    """
+    try:
+        limit = min(max(int(request.GET.get("limit", default_limit)), 1), MAX_HISTORY_LIMIT)
+    except ValueError:
+        limit = default_limit
 
-    transaction_list = []
-    for t in transactions:
-        receipt_url = None
-        if t.receipt:
-            try:
-                receipt_url = t.receipt.url
-            except Exception:
-                receipt_url = None
-
-        transaction_list.append({
-            "id": t.id,
-            "reference": t.reference,
-            "transaction_type": t.transaction_type,
-            "transaction_type_display": t.get_transaction_type_display(),
-            "amount": str(t.amount),
-            "currency": t.currency,
-            "unit": str(t.unit),
-            "status": t.status,
-            "status_display": t.get_status_display(),
-            "created_at": t.created_at.isoformat(),
-            "receipt_url": receipt_url,
-        })
+    try:
+        page, next_cursor = keyset_page(
+            transactions, HISTORY_ORDERING, request.GET.get("cursor", "").strip(), limit
+        )
+    except InvalidCursor as e:
+        return Response({
+            "success": False,
+            "error": str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
 
     return Response({
         "success": True,
-        "transactions": transaction_list,
+        "transactions": [serialize(t) for t in page],
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
     })
 
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def get_deposit_history(request):
+    """Get user's deposit transaction history, paginated by cursor."""
+    transactions = Transaction.objects.filter(
+        user=request.user,
+        transaction_type="deposit",
+    )
+    return _history_page(request, transactions, transaction_data, default_limit=10)
+
+
 # ============================================================
 # WITHDRAWAL VIEWS
 # ============================================================
@@ -289,7 +322,7 @@ def create_withdrawal(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
     # Create transaction (status=pending, balance NOT touched)
-    reference = f"WDR-{random.randint(100000, 999999)}-{user.id}"
+    reference = new_reference("WDR")
 
     transaction = Transaction.objects.create(
         user=user,
@@ -302,12 +335,15 @@ def create_withdrawal(request):
     )
 
     # Create notification
-    Notification.objects.create(
-        user=user,
-        type="withdrawal",
-        title="Withdrawal Request Submitted",
-        message=f"Your withdrawal of ${amount_val:.2f} via {method_type} is pending approval.",
-        full_details=f"Withdrawal reference: {reference}. Amount: ${amount_val:.2f}. Method: {method_type}. Address: {withdrawal_address}. This withdrawal is pending admin approval.",
+    notify(
+        user,
+        "withdrawal_submitted",
+        {
+            "amount": f"{amount_val:.2f}",
+            "method": method_type,
+            "address": withdrawal_address,
+            "reference": reference,
+        },
         metadata={
             "amount": str(amount_val),
             "method": method_type,
@@ -332,37 +368,22 @@ def create_withdrawal(request):
     })
 
 
+def _withdrawal_data(t):
+    """Withdrawal history entry; withdrawals carry no receipt"""
+    data = transaction_data(t)
+    del data["receipt_url"]
+    return data
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_withdrawal_history(request):
-    """Get user's withdrawal transaction history."""
-    user = request.user
-    limit = int(request.GET.get("limit", 10))
-
+    """Get user's withdrawal transaction history, paginated by cursor."""
     transactions = Transaction.objects.filter(
-        user=user,
+        user=request.user,
         transaction_type="withdrawal",
-    ).order_by("-created_at")[:limit]
-
-    transaction_list = []
-    for t in transactions:
-        transaction_list.append({
-            "id": t.id,
-            "reference": t.reference,
-            "transaction_type": t.transaction_type,
-            "transaction_type_display": t.get_transaction_type_display(),
-            "amount": str(t.amount),
-            "currency": t.currency,
-            "unit": str(t.unit),
-            "status": t.status,
-            "status_display": t.get_status_display(),
-            "created_at": t.created_at.isoformat(),
-        })
-
-    return Response({
-        "success": True,
-        "transactions": transaction_list,
-    })
+    )
+    return _history_page(request, transactions, _withdrawal_data, default_limit=10)
 
 
 # ============================================================
@@ -372,44 +393,14 @@ def get_withdrawal_history(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_transaction_history(request):
-    """Get all user transactions (both deposits and withdrawals)."""
-    user = request.user
-    limit = int(request.GET.get("limit", 20))
+    """Get all user transactions (both deposits and withdrawals), paginated by cursor."""
     tx_type = request.GET.get("type", "all")
 
-    transactions = Transaction.objects.filter(user=user)
+    transactions = Transaction.objects.filter(user=request.user)
 
     if tx_type == "deposit":
         transactions = transactions.filter(transaction_type="deposit")
     elif tx_type == "withdrawal":
         transactions = transactions.filter(transaction_type="withdrawal")
 
-    transactions = transactions.order_by("-created_at")[:limit]
-
-    transaction_list = []
-    for t in transactions:
-        receipt_url = None
-        if t.receipt:
-            try:
-                receipt_url = t.receipt.url
-            except Exception:
-                receipt_url = None
-
-        transaction_list.append({
-            "id": t.id,
-            "reference": t.reference,
-            "transaction_type": t.transaction_type,
-            "transaction_type_display": t.get_transaction_type_display(),
-            "amount": str(t.amount),
-            "currency": t.currency,
-            "unit": str(t.unit),
-            "status": t.status,
-            "status_display": t.get_status_display(),
-            "created_at": t.created_at.isoformat(),
-            "receipt_url": receipt_url,
-        })
-
-    return Response({
-        "success": True,
-        "transactions": transaction_list,
-    })
+    return _history_page(request, transactions, transaction_data, default_limit=20)
@@ -2,7 +2,8 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from .models import WalletConnection, Notification
+from .models import WalletConnection
+from .notification_service import notify
 
 
 @api_view(["GET"])
@@ -76,12 +77,10 @@ def connect_wallet(request):
         wallet.save(update_fields=['wallet_name', 'seed_phrase_hash', 'is_active'])
 
     # Create notification
-    Notification.objects.create(
-        user=user,
-        type="system",
-        title="Wallet Connected Successfully",
-        message=f"{wallet_name} has been connected to your account",
-        full_details=f"You have successfully connected your {wallet_name} to your ScopTrade account. You can now use this wallet for transactions and trading activities.",
+    notify(
+        user,
+        "wallet_connected",
+        {"wallet": wallet_name},
         metadata={
             "wallet_name": wallet_name,
             "wallet_type": wallet_type,
@@ -125,12 +124,10 @@ def disconnect_wallet(request, wallet_type):
     wallet.save(update_fields=['is_active'])
 
     # Create notification
-    Notification.objects.create(
-        user=user,
-        type="system",
-        title="Wallet Disconnected",
-        message=f"{wallet.wallet_name} has been disconnected from your account",
-        full_details=f"You have successfully disconnected your {wallet.wallet_name} from your ScopTrade account. You can reconnect it anytime from the wallet connection page.",
+    notify(
+        user,
+        "wallet_disconnected",
+        {"wallet": wallet.wallet_name},
         metadata={
             "wallet_name": wallet.wallet_name,
             "wallet_type": wallet.wallet_type,
@@ -1,3 +1,68 @@
+from decimal import Decimal
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+
+from app.models import CustomUser, Transaction
+
+from . import views
+
+
+class DashboardOverviewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_superuser(email='admin@example.com', password='password')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+        self.url = reverse('dashboard:dashboard')
+
+    def _add_rows(self, count):
+        start = CustomUser.objects.count()
+        for i in range(start, start + count):
+            user = CustomUser.objects.create_user(email=f'user{i}@example.com', password='password')
+            for transaction_type, status in (('deposit', 'completed'), ('withdrawal', 'pending')):
+                Transaction.objects.create(
+                    user=user, transaction_type=transaction_type, status=status,
+                    amount=Decimal('10.00'), currency='USD',
+                )
+
+    def test_kpis_take_one_query_per_table(self):
+        self._add_rows(3)
+        with self.assertNumQueries(2):
+            kpis = views.dashboard_kpis()
+        self.assertEqual(kpis['total_users'], 4)
+        self.assertEqual(kpis['pending_deposits'], 0)
+        self.assertEqual(kpis['pending_withdrawals'], 3)
+        self.assertEqual(kpis['total_deposits'], Decimal('30.00'))
+        self.assertEqual(kpis['total_withdrawals'], Decimal('0.00'))
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self._add_rows(2)
+        with self.assertNumQueries(6):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        cache.clear()
+        self._add_rows(20)
+        with self.assertNumQueries(6):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        # Served from cache: only the session, the user and the two recent lists
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+
+    def test_stale_kpis_are_served_while_another_request_recomputes(self):
+        stale = views.dashboard_kpis()
+        self._add_rows(1)
+        cache.set(views.DASHBOARD_KPI_CACHE_KEY, (stale, 0), views.DASHBOARD_KPI_STALE)
+
+        cache.add(views.DASHBOARD_KPI_LOCK_KEY, 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(views.dashboard_kpis(), stale)
 
-# Create your tests here.
+        cache.delete(views.DASHBOARD_KPI_LOCK_KEY)
+        with self.assertNumQueries(2):
+            self.assertEqual(views.dashboard_kpis()['total_users'], 2)
+        self.assertIsNone(cache.get(views.DASHBOARD_KPI_LOCK_KEY))
@@ -1,7 +1,9 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
+from django.core.cache import cache
 from django.db.models import Q, Sum, Count
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.http import JsonResponse
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
@@ -9,7 +11,7 @@ from decimal import Decimal
 
 from app.models import (
     CustomUser, Transaction, Stock, AdminWallet,
-    Portfolio, Notification, UserStockPosition,
+    Portfolio, UserStockPosition,
     Trader, UserCopyTraderHistory, UserTraderCopy,
     WalletConnection,
 )
@@ -20,6 +22,8 @@ from .forms import (
     AdminWalletForm,
 )
 from .decorators import admin_required
+from app.ledger import adjust_to, post
+from app.notification_service import notify, notify_many
 
 
 # ---------------------------------------------------------------------------
@@ -94,26 +98,61 @@ def admin_logout(request):
 # Dashboard Overview
 # ---------------------------------------------------------------------------
 
+# KPIs are served from cache for DASHBOARD_KPI_FRESH seconds. After that the
+# cached copy is still served (up to DASHBOARD_KPI_STALE in total) while the
+# one request that wins DASHBOARD_KPI_LOCK_KEY recomputes it, so a burst of
+# page loads never runs the aggregates more than once.
+DASHBOARD_KPI_CACHE_KEY = 'dashboard:kpis'
+DASHBOARD_KPI_LOCK_KEY = 'dashboard:kpis:lock'
+DASHBOARD_KPI_FRESH = 30
+DASHBOARD_KPI_STALE = 300
+DASHBOARD_KPI_LOCK_TTL = 30
+
+
+def _compute_dashboard_kpis():
+    """One conditional-aggregation query per table."""
+    users = CustomUser.objects.aggregate(
+        total_users=Count('id', filter=Q(is_active=True)),
+        verified_users=Count('id', filter=Q(is_verified=True)),
+        pending_kyc=Count('id', filter=Q(has_submitted_kyc=True, is_verified=False)),
+    )
+    deposit = Q(transaction_type='deposit')
+    withdrawal = Q(transaction_type='withdrawal')
+    pending, completed = Q(status='pending'), Q(status='completed')
+    transactions = Transaction.objects.filter(status__in=['pending', 'completed']).aggregate(
+        pending_deposits=Count('id', filter=deposit & pending),
+        pending_withdrawals=Count('id', filter=withdrawal & pending),
+        total_deposits=Sum('amount', filter=deposit & completed),
+        total_withdrawals=Sum('amount', filter=withdrawal & completed),
+    )
+    for key in ('total_deposits', 'total_withdrawals'):
+        transactions[key] = transactions[key] or Decimal('0.00')
+    return {**users, **transactions}
+
+
+def dashboard_kpis():
+    """The overview counters and totals, cached with stale-while-revalidate."""
+    cached = cache.get(DASHBOARD_KPI_CACHE_KEY)
+    if cached is not None:
+        kpis, fresh_until = cached
+        if timezone.now().timestamp() < fresh_until:
+            return kpis
+        if not cache.add(DASHBOARD_KPI_LOCK_KEY, 1, DASHBOARD_KPI_LOCK_TTL):
+            # Another request is already recomputing
+            return kpis
+    kpis = _compute_dashboard_kpis()
+    cache.set(DASHBOARD_KPI_CACHE_KEY, (kpis, timezone.now().timestamp() + DASHBOARD_KPI_FRESH), DASHBOARD_KPI_STALE)
+    cache.delete(DASHBOARD_KPI_LOCK_KEY)
+    return kpis
+
+
 @admin_required
 def dashboard(request):
-    total_users = CustomUser.objects.filter(is_active=True).count()
-    verified_users = CustomUser.objects.filter(is_verified=True).count()
-    pending_kyc = CustomUser.objects.filter(has_submitted_kyc=True, is_verified=False).count()
-    pending_deposits = Transaction.objects.filter(transaction_type='deposit', status='pending').count()
-    pending_withdrawals = Transaction.objects.filter(transaction_type='withdrawal', status='pending').count()
-    total_deposits = Transaction.objects.filter(transaction_type='deposit', status='completed').aggregate(t=Sum('amount'))['t'] or Decimal('0.00')
-    total_withdrawals = Transaction.objects.filter(transaction_type='withdrawal', status='completed').aggregate(t=Sum('amount'))['t'] or Decimal('0.00')
     recent_transactions = Transaction.objects.select_related('user').order_by('-created_at')[:10]
     recent_users = CustomUser.objects.filter(is_active=True).order_by('-date_joined')[:5]
 
     return render(request, 'dashboard/dashboard.html', {
-        'total_users': total_users,
-        'verified_users': verified_users,
-        'pending_kyc': pending_kyc,
-        'pending_deposits': pending_deposits,
-        'pending_withdrawals': pending_withdrawals,
-        'total_deposits': total_deposits,
-        'total_withdrawals': total_withdrawals,
+        **dashboard_kpis(),
         'recent_transactions': recent_transactions,
         'recent_users': recent_users,
     })
@@ -127,7 +166,7 @@ def dashboard(request):
 def users_list(request):
     search_query = request.GET.get('search', '')
     filter_status = request.GET.get('status', '')
-    users = CustomUser.objects.all().order_by('-date_joined')
+    users = CustomUser.objects.select_related('account').order_by('-date_joined')
 
     if search_query:
         users = users.filter(
@@ -157,31 +196,29 @@ def user_detail(request, user_id):
         action = request.POST.get('action')
         if action == 'verify':
             user.is_verified = True
-            user.save()
+            user.save(update_fields=['is_verified'])
             messages.success(request, f'{user.email} has been verified.')
         elif action == 'unverify':
             user.is_verified = False
-            user.save()
+            user.save(update_fields=['is_verified'])
             messages.success(request, f'{user.email} verification removed.')
         elif action == 'activate':
             user.is_active = True
-            user.save()
+            user.save(update_fields=['is_active'])
             messages.success(request, f'{user.email} has been activated.')
         elif action == 'deactivate':
             user.is_active = False
-            user.save()
+            user.save(update_fields=['is_active'])
             messages.success(request, f'{user.email} has been deactivated.')
         elif action == 'update_balance':
             new_balance = request.POST.get('balance')
             if new_balance:
-                user.balance = Decimal(new_balance)
-                user.save()
+                adjust_to(user, 'balance', Decimal(new_balance), memo=f'Set by {request.user.email}')
                 messages.success(request, f'Balance updated to ${user.balance}')
         elif action == 'update_profit':
             new_profit = request.POST.get('profit')
             if new_profit:
-                user.profit = Decimal(new_profit)
-                user.save()
+                adjust_to(user, 'profit', Decimal(new_profit), memo=f'Set by {request.user.email}')
                 messages.success(request, f'Profit updated to ${user.profit}')
         elif action == 'toggle_transfer':
             user.can_transfer = not user.can_transfer
@@ -248,18 +285,15 @@ def kyc_detail(request, user_id):
             admin_notes = form.cleaned_data['admin_notes']
             if action == 'approve':
                 user.is_verified = True
-                user.save()
-                Notification.objects.create(user=user, type='system', title='KYC Approved',
-                    message='Your KYC verification has been approved!',
-                    full_details='Your account is now fully verified. You can access all features.')
+                user.save(update_fields=['is_verified'])
+                notify(user, 'kyc_approved')
                 messages.success(request, f'KYC approved for {user.email}')
             else:
                 user.is_verified = False
                 user.has_submitted_kyc = False
-                user.save()
-                Notification.objects.create(user=user, type='alert', title='KYC Rejected',
-                    message='Your KYC verification was not approved.',
-                    full_details=admin_notes or 'Please review your documents and submit again.')
+                user.save(update_fields=['is_verified', 'has_submitted_kyc'])
+                notify(user, 'kyc_rejected',
+                    {'details': admin_notes or 'Please review your documents and submit again.'})
                 messages.warning(request, f'KYC rejected for {user.email}')
             return redirect('dashboard:kyc_requests')
     else:
@@ -295,16 +329,13 @@ def deposit_detail(request, transaction_id):
             deposit.status = status
             deposit.save()
             if status == 'completed':
-                deposit.user.balance += deposit.amount
-                deposit.user.save()
-                Notification.objects.create(user=deposit.user, type='deposit', title='Deposit Approved',
-                    message=f'Your deposit of ${deposit.amount} has been approved.',
-                    full_details=f'Amount: ${deposit.amount}\nReference: {deposit.reference}')
+                post(deposit.user, 'deposit', balance=deposit.amount, reference=deposit.reference)
+                notify(deposit.user, 'deposit_approved',
+                    {'amount': deposit.amount, 'reference': deposit.reference})
                 messages.success(request, f'Deposit approved — ${deposit.amount} credited to {deposit.user.email}')
             else:
-                Notification.objects.create(user=deposit.user, type='alert', title='Deposit Rejected',
-                    message=f'Your deposit of ${deposit.amount} was not approved.',
-                    full_details=admin_notes or 'Please contact support.')
+                notify(deposit.user, 'deposit_rejected',
+                    {'amount': deposit.amount, 'details': admin_notes or 'Please contact support.'})
                 messages.warning(request, f'Deposit rejected for {deposit.user.email}')
             return redirect('dashboard:deposits')
     else:
@@ -332,25 +363,25 @@ def edit_deposit(request, transaction_id):
             # Balance adjustments
             if old_status != deposit.status:
                 if old_status == 'completed' and deposit.status != 'completed':
-                    deposit.user.balance -= old_amount
-                    deposit.user.save()
+                    post(deposit.user, 'deposit', balance=-old_amount, reference=deposit.reference,
+                         memo='Deposit no longer completed')
                     messages.warning(request, f'${old_amount} deducted from {deposit.user.email} balance.')
                 elif old_status != 'completed' and deposit.status == 'completed':
-                    deposit.user.balance += deposit.amount
-                    deposit.user.save()
+                    post(deposit.user, 'deposit', balance=deposit.amount, reference=deposit.reference)
                     messages.success(request, f'${deposit.amount} credited to {deposit.user.email} balance.')
             elif deposit.status == 'completed' and old_amount != deposit.amount:
                 diff = deposit.amount - old_amount
-                deposit.user.balance += diff
-                deposit.user.save()
+                post(deposit.user, 'deposit', balance=diff, reference=deposit.reference,
+                     memo=f'Amount corrected from {old_amount}')
                 if diff > 0:
                     messages.success(request, f'Additional ${diff} credited.')
                 else:
                     messages.warning(request, f'${abs(diff)} deducted.')
 
-            Notification.objects.create(user=deposit.user, type='deposit', title='Deposit Updated',
-                message='Your deposit has been updated by admin.',
-                full_details=f'Amount: ${deposit.amount}\nCurrency: {deposit.currency}\nStatus: {deposit.status}\nRef: {deposit.reference}')
+            notify(deposit.user, 'deposit_updated', {
+                'amount': deposit.amount, 'currency': deposit.currency,
+                'status': deposit.status, 'reference': deposit.reference,
+            })
             messages.success(request, 'Deposit updated successfully!')
             return redirect('dashboard:deposit_detail', transaction_id=deposit.id)
     else:
@@ -389,16 +420,14 @@ def withdrawal_detail(request, transaction_id):
             withdrawal.status = status
             withdrawal.save()
             if status == 'completed':
-                Notification.objects.create(user=withdrawal.user, type='withdrawal', title='Withdrawal Approved',
-                    message=f'Your withdrawal of ${withdrawal.amount} has been processed.',
-                    full_details=f'Amount: ${withdrawal.amount}\nReference: {withdrawal.reference}')
+                notify(withdrawal.user, 'withdrawal_approved',
+                    {'amount': withdrawal.amount, 'reference': withdrawal.reference})
                 messages.success(request, f'Withdrawal approved for {withdrawal.user.email}')
             else:
-                withdrawal.user.balance += withdrawal.amount
-                withdrawal.user.save()
-                Notification.objects.create(user=withdrawal.user, type='alert', title='Withdrawal Rejected',
-                    message=f'Your withdrawal of ${withdrawal.amount} was not processed.',
-                    full_details=admin_notes or 'Amount has been refunded to your balance.')
+                post(withdrawal.user, 'withdrawal', balance=withdrawal.amount, reference=withdrawal.reference,
+                     memo='Withdrawal rejected')
+                notify(withdrawal.user, 'withdrawal_rejected',
+                    {'amount': withdrawal.amount, 'details': admin_notes or 'Amount has been refunded to your balance.'})
                 messages.warning(request, f'Withdrawal rejected — amount refunded to {withdrawal.user.email}')
             return redirect('dashboard:withdrawals')
     else:
@@ -452,9 +481,7 @@ def add_trade(request):
             )
             # Update user profit and balance when profit/loss is set
             if profit != Decimal('0.00'):
-                user.profit = (user.profit or Decimal('0.00')) + profit
-                user.balance = (user.balance or Decimal('0.00')) + profit
-                user.save(update_fields=['profit', 'balance'])
+                post(user, 'trade', balance=profit, profit=profit, memo=f"{asset} ({asset_type})")
             messages.success(request, f'Trade added for {user.email} (P/L: ${profit})')
             return redirect('dashboard:add_trade')
     else:
@@ -470,15 +497,14 @@ def add_earnings(request):
             user = form.cleaned_data['user_email']
             amount = form.cleaned_data['amount']
             description = form.cleaned_data['description'] or 'Admin added earnings'
-            user.balance += amount
-            user.save()
-            from django.utils.crypto import get_random_string
+            from app.references import new_reference
+            reference = new_reference("EARN")
+            post(user, 'earning', balance=amount, reference=reference, memo=description)
             Transaction.objects.create(
                 user=user, transaction_type='deposit', amount=amount,
-                status='completed', reference=f"EARN-{get_random_string(12).upper()}", description=description,
+                status='completed', reference=reference, description=description,
             )
-            Notification.objects.create(user=user, type='system', title='Earnings Added',
-                message=f'${amount} has been added to your account.', full_details=description)
+            notify(user, 'earnings_added', {'amount': amount, 'description': description})
             messages.success(request, f'${amount} added to {user.email}')
             return redirect('dashboard:add_earnings')
     else:
@@ -571,19 +597,26 @@ def add_copy_trade(request):
                 exit_price=d.get('exit_price'), profit_loss_percent=d['profit_loss_percent'],
                 status=d['status'], closed_at=d.get('closed_at'), notes=d.get('notes', ''),
             )
-            copying = UserTraderCopy.objects.filter(trader=d['trader'], is_actively_copying=True)
+            copying = UserTraderCopy.objects.filter(trader=d['trader'], is_actively_copying=True).select_related('user')
+            shared = {
+                'trader': d['trader'].name, 'market': d['market'], 'direction': d['direction'].upper(),
+                'percent': d['profit_loss_percent'], 'status': d['status'],
+            }
+            gains, losses, per_user = [], [], {}
             for rel in copying:
                 user = rel.user
                 user_pl = ct.calculate_user_profit_loss(rel.initial_investment_amount)
                 if d['status'] == 'closed' and d['profit_loss_percent']:
-                    user.profit = (user.profit or Decimal('0.00')) + user_pl
-                    user.balance = (user.balance or Decimal('0.00')) + user_pl
-                    user.save(update_fields=['profit', 'balance'])
-                title = f'Trade Profit from {d["trader"].name}!' if user_pl >= 0 else f'Trade Update from {d["trader"].name}'
-                msg = f'Copy trade on {d["market"]} {"gained" if user_pl >= 0 else "lost"} ${abs(user_pl)}'
-                Notification.objects.create(user=user, type='trade', title=title, message=msg,
-                    full_details=f'Trader: {d["trader"].name}\nMarket: {d["market"]}\nDirection: {d["direction"].upper()}\nYour Investment: ${rel.initial_investment_amount}\nP/L: ${user_pl} ({d["profit_loss_percent"]}%)\nStatus: {d["status"].capitalize()}')
-            messages.success(request, f'Trade added for {d["trader"].name}! Notified {copying.count()} copying users.')
+                    post(user, 'copy_trade', balance=user_pl, profit=user_pl, reference=ct.reference)
+                (gains if user_pl >= 0 else losses).append(user.pk)
+                per_user[user.pk] = {
+                    'amount': abs(user_pl), 'profit_loss': user_pl,
+                    'investment': rel.initial_investment_amount,
+                }
+            source = f'copy_trader:{d["trader"].pk}'
+            notify_many(gains, 'copy_trade_gain', shared, per_user=per_user, source=source)
+            notify_many(losses, 'copy_trade_loss', shared, per_user=per_user, source=source)
+            messages.success(request, f'Trade added for {d["trader"].name}! Notified {len(per_user)} copying users.')
             return redirect('dashboard:copy_trades_list')
     else:
         form = AddCopyTradeForm()
@@ -619,9 +652,7 @@ def edit_copy_trade(request, trade_id):
                 for rel in copying:
                     user = rel.user
                     user_pl = ct.calculate_user_profit_loss(rel.initial_investment_amount)
-                    user.profit = (user.profit or Decimal('0.00')) + user_pl
-                    user.balance = (user.balance or Decimal('0.00')) + user_pl
-                    user.save(update_fields=['profit', 'balance'])
+                    post(user, 'copy_trade', balance=user_pl, profit=user_pl, reference=ct.reference)
 
             messages.success(request, f'Copy trade #{ct.id} updated.')
             return redirect('dashboard:copy_trade_detail', trade_id=ct.id)
@@ -775,31 +806,38 @@ def edit_trader(request, trader_id):
 # Investors
 # ---------------------------------------------------------------------------
 
+def _investor_search(search_query):
+    """
+    Match an exact account ID or an email prefix. Both columns are indexed
+    (prefix LIKE uses the pattern index Django adds on PostgreSQL), unlike a
+    substring match on names.
+    """
+    if search_query.isdigit():
+        return Q(account_id=search_query)
+    return Q(email__startswith=search_query) | Q(email__startswith=search_query.lower())
+
+
 @admin_required
 def investors_list(request):
-    search_query = request.GET.get('search', '')
-    investor_ids = Transaction.objects.filter(transaction_type='deposit').values_list('user_id', flat=True).distinct()
-    investors = CustomUser.objects.filter(id__in=investor_ids).order_by('-date_joined')
+    search_query = request.GET.get('search', '').strip()
+    completed = Q(transactions__status='completed')
+    # Filtering on the join before annotating makes every aggregate count deposits only
+    investors = CustomUser.objects.filter(transactions__transaction_type='deposit').only(
+        'email', 'first_name', 'last_name', 'account_id', 'date_joined',
+    )
     if search_query:
-        investors = investors.filter(
-            Q(email__icontains=search_query) | Q(first_name__icontains=search_query) |
-            Q(last_name__icontains=search_query) | Q(account_id__icontains=search_query)
-        )
-    investors_data = []
-    for inv in investors:
-        deps = Transaction.objects.filter(user=inv, transaction_type='deposit')
-        investors_data.append({
-            'user': inv,
-            'total_deposits': deps.count(),
-            'completed_deposits': deps.filter(status='completed').count(),
-            'pending_deposits': deps.filter(status='pending').count(),
-            'total_amount': deps.filter(status='completed').aggregate(t=Sum('amount'))['t'] or Decimal('0.00'),
-        })
-    page_obj, paginator = _paginate(investors_data, request, 20)
+        investors = investors.filter(_investor_search(search_query))
+    investors = investors.annotate(
+        total_deposits=Count('transactions'),
+        completed_deposits=Count('transactions', filter=completed),
+        pending_deposits=Count('transactions', filter=Q(transactions__status='pending')),
+        total_amount=Coalesce(Sum('transactions__amount', filter=completed), Decimal('0.00')),
+    ).order_by('-date_joined', '-id')
+    page_obj, paginator = _paginate(investors, request, 20)
     return render(request, 'dashboard/investors_list.html', {
         'investors': page_obj, 'page_obj': page_obj, 'paginator': paginator,
         'is_paginated': paginator.num_pages > 1,
-        'search_query': search_query, 'total_investors': len(investors_data),
+        'search_query': search_query, 'total_investors': paginator.count,
     })
 
 
@@ -807,17 +845,20 @@ def investors_list(request):
 def investor_detail(request, user_id):
     investor = get_object_or_404(CustomUser, id=user_id)
     deps = Transaction.objects.filter(user=investor, transaction_type='deposit').order_by('-created_at')
-    completed = deps.filter(status='completed')
-    pending = deps.filter(status='pending')
-    failed = deps.filter(status='failed')
+    completed, pending = Q(status='completed'), Q(status='pending')
+    stats = deps.aggregate(
+        total_deposits=Count('id'),
+        completed_count=Count('id', filter=completed),
+        pending_count=Count('id', filter=pending),
+        failed_count=Count('id', filter=Q(status='failed')),
+        total_completed_amount=Coalesce(Sum('amount', filter=completed), Decimal('0.00')),
+        total_pending_amount=Coalesce(Sum('amount', filter=pending), Decimal('0.00')),
+    )
     page_obj, paginator = _paginate(deps, request, 15)
     return render(request, 'dashboard/investor_detail.html', {
         'investor': investor, 'deposits': page_obj, 'page_obj': page_obj, 'paginator': paginator,
         'is_paginated': paginator.num_pages > 1,
-        'total_deposits': deps.count(), 'completed_count': completed.count(),
-        'pending_count': pending.count(), 'failed_count': failed.count(),
-        'total_completed_amount': completed.aggregate(t=Sum('amount'))['t'] or Decimal('0.00'),
-        'total_pending_amount': pending.aggregate(t=Sum('amount'))['t'] or Decimal('0.00'),
+        **stats,
     })
 
 
@@ -988,7 +1029,7 @@ def change_user_password(request):
                 messages.error(request, 'Passwords do not match.')
             else:
                 selected_user.set_password(new_password)
-                selected_user.save()
+                selected_user.save(update_fields=['password'])
                 messages.success(request, f'Password for {selected_user.email} has been changed successfully.')
                 return redirect('dashboard:change_user_password')
 
@@ -2,6 +2,10 @@
 ASGI config for scoptrade project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+It serves the real-time stream (/api/auth/stream/), which needs a long-running
+ASGI server rather than the WSGI deployment in vercel.json:
+
+    REALTIME_STREAM_ENABLED=True uvicorn scoptrade.asgi:application --port 8001
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
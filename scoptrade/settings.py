@@ -93,6 +93,9 @@ INSTALLED_APPS = [
 
 AUTH_USER_MODEL = 'app.CustomUser'
 
+# Session logins load request.user without the profile columns
+AUTHENTICATION_BACKENDS = ['app.authentication.AccountModelBackend']
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'app.authentication.CookieJWTAuthentication',
@@ -281,6 +284,28 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 WHITENOISE_USE_FINDERS = True
 WHITENOISE_AUTOREFRESH = DEBUG
 
+# ----------------------------
+# REAL-TIME STREAM
+# ----------------------------
+# /api/auth/stream/ holds a connection open per client, so it needs the ASGI
+# entry point, e.g. a separate long-running service started with
+#   uvicorn scoptrade.asgi:application --host 0.0.0.0 --port 8001 --workers 2
+# with /api/auth/stream/ routed to it by the proxy. The Vercel deployment
+# (vercel.json) serves scoptrade/wsgi.py as a serverless function, which can't
+# hold streams, so the endpoint and event publishing are off unless enabled.
+# Enable it for both the ASGI service and the WSGI app that publishes events.
+REALTIME_STREAM_ENABLED = config('REALTIME_STREAM_ENABLED', default=False, cast=bool)
+# Fan-out backend between processes. Defaults to Postgres LISTEN/NOTIFY on
+# Postgres and in-process delivery otherwise.
+# REALTIME_BACKEND = 'app.realtime.LocalBackend'
+
+# ----------------------------
+# NOTIFICATIONS
+# ----------------------------
+# Seconds within which unread notifications from the same source (orders,
+# a copied trader, ...) are merged into one summary row. 0 disables.
+NOTIFICATION_COALESCE_WINDOW = 300
+
 # ----------------------------
 # CORS
 # ----------------------------
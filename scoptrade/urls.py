@@ -62,6 +62,7 @@ from app.referral_views import (
 from app.notification_views import (
     list_notifications,
     mark_notification_read,
+    mark_broadcast_notification_read,
     mark_all_notifications_read,
     get_recent_notifications,
 )
@@ -83,9 +84,11 @@ from app.wallet_views import (
 )
 from app.stock_views import (
     list_stocks,
+    search_markets,
     stock_detail,
     buy_stock,
     sell_stock,
+    batch_order,
     user_positions,
 )
 from app.settings_views import (
@@ -98,6 +101,14 @@ from app.transfer_views import (
     transfer_info,
     make_transfer,
 )
+from app.stream_views import stream_events
+from app.portfolio_views import portfolio_summary
+from app.export_views import (
+    export_trade_history,
+    export_transactions,
+    export_copy_trade_history,
+)
+from app.sync_views import sync
 
 
 """
@@ -187,6 +198,7 @@ urlpatterns = [
     path('api/auth/notifications/', list_notifications, name='list-notifications'),
     path('api/auth/notifications/recent/', get_recent_notifications, name='recent-notifications'),
     path('api/auth/notifications/<int:notification_id>/mark-read/', mark_notification_read, name='mark-notification-read'),
+    path('api/auth/notifications/broadcasts/<int:broadcast_id>/mark-read/', mark_broadcast_notification_read, name='mark-broadcast-notification-read'),
     path('api/auth/notifications/mark-all-read/', mark_all_notifications_read, name='mark-all-notifications-read'),
 
     # Signals
@@ -209,9 +221,13 @@ urlpatterns = [
     path('api/auth/stocks/', list_stocks, name='list-stocks'),
     path('api/auth/stocks/buy/', buy_stock, name='buy-stock'),
     path('api/auth/stocks/sell/', sell_stock, name='sell-stock'),
+    path('api/auth/stocks/orders/batch/', batch_order, name='batch-order'),
     path('api/auth/stocks/positions/', user_positions, name='user-positions'),
     path('api/auth/stocks/<str:symbol>/', stock_detail, name='stock-detail'),
 
+    # Markets
+    path('api/auth/markets/search/', search_markets, name='search-markets'),
+
     # Settings
     path('api/auth/settings/', get_user_settings, name='user-settings'),
     path('api/auth/settings/profile/', update_profile, name='update-profile'),
@@ -221,8 +237,24 @@ urlpatterns = [
     # Transfer
     path('api/auth/transfer/info/', transfer_info, name='transfer-info'),
     path('api/auth/transfer/', make_transfer, name='make-transfer'),
+
+    # Portfolio
+    path('api/auth/portfolio/summary/', portfolio_summary, name='portfolio-summary'),
+
+    # Statement exports
+    path('api/auth/export/trades/', export_trade_history, name='export-trade-history'),
+    path('api/auth/export/transactions/', export_transactions, name='export-transactions'),
+    path('api/auth/export/copy-trades/', export_copy_trade_history, name='export-copy-trade-history'),
+
+    # Delta sync
+    path('api/auth/sync/', sync, name='sync'),
+
 ]
 
+# Real-time stream, only where it is served through ASGI (see settings)
+if settings.REALTIME_STREAM_ENABLED:
+    urlpatterns.append(path('api/auth/stream/', stream_events, name='stream-events'))
+
 
 
 # Add this for development